@@ -0,0 +1,115 @@
+# accounts.py
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from driver_manager import drivers, is_logged_in
+from scraper import login_to_linkedin, fetch_notifications
+import config
+
+try:
+    import keyring
+except ImportError:  # keyring is optional; passwords then come from the environment only
+    keyring = None
+
+# Fetching several LinkedIn accounts at once. The accounts are listed in config.ACCOUNTS_FILE:
+#   [{"name": "alice", "email": "alice@example.com", "scrolls_per_minute": 20}, ...]
+# Each account keeps its own browser profile (chrome_profiles/<name>), so a password is only
+# needed when its LinkedIn session has expired. It is read from the NOTIFY_PASSWORD_<NAME>
+# environment variable or, if the keyring package is installed, from the system keyring
+# (service "notify-this", user = the account's email).
+# A bounded pool of config.FETCH_WORKERS threads fetches the accounts, each driving its own
+# browser, so N accounts take about as long as the slowest one rather than the sum of all.
+
+KEYRING_SERVICE = "notify-this"
+
+
+class Account:
+    '''One configured LinkedIn account. Its name tags the rows it fetches (the account_id column).'''
+
+    def __init__(self, name, email=None, scrolls_per_minute=None):
+        self.name = name
+        self.email = email
+        self.scrolls_per_minute = scrolls_per_minute or config.ACCOUNT_SCROLLS_PER_MINUTE
+
+    @property
+    def scroll_interval(self):
+        return 60.0 / self.scrolls_per_minute if self.scrolls_per_minute else 0
+
+
+def load_accounts(path=None):
+    '''Reads the configured accounts. Returns [] when the accounts file doesn't exist.'''
+    path = path or config.ACCOUNTS_FILE
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        entries = json.load(f)
+    accounts = [Account(entry["name"], entry.get("email"), entry.get("scrolls_per_minute")) for entry in entries]
+    if any(account.name == config.DEFAULT_ACCOUNT for account in accounts):
+        raise ValueError(f"The account name '{config.DEFAULT_ACCOUNT}' is reserved for single-account fetches")
+    if len({account.name for account in accounts}) != len(accounts):
+        raise ValueError(f"Account names in {path} must be unique")
+    return accounts
+
+
+def account_password(account):
+    '''Looks up an account's password in the environment, then in the keyring. Returns None if not found.'''
+    password = os.environ.get("NOTIFY_PASSWORD_" + re.sub(r"\W", "_", account.name).upper())
+    if password is None and keyring is not None and account.email:
+        password = keyring.get_password(KEYRING_SERVICE, account.email)
+    return password
+
+
+def fetch_account(account, max_items=None):
+    '''
+    Logs in if needed and fetches one account's new notifications, tagging them with its name.
+    Never raises: returns a result dict (account, worker, items, saved, seconds, items_per_sec,
+    stop_reason, error).
+    '''
+    result = {"account": account.name, "worker": threading.current_thread().name, "items": 0, "saved": 0,
+              "stop_reason": None, "error": None}
+    start = time.perf_counter()
+    try:
+        driver = drivers.get(account.name)
+        if not is_logged_in(driver):
+            password = account_password(account)
+            if not (account.email and password):
+                raise RuntimeError("LinkedIn session expired and no email/password is configured")
+            if not login_to_linkedin(driver, account.email, password):
+                raise RuntimeError("LinkedIn login failed")
+        stats = fetch_notifications(driver, max_items=max_items, account_id=account.name,
+                                    scroll_interval=account.scroll_interval)
+        if stats is None:
+            raise RuntimeError("Failed to load notifications")
+        result.update(items=stats.items, saved=stats.saved, stop_reason=stats.stop_reason)
+    except Exception as e:
+        result["error"] = str(e).strip() or type(e).__name__
+    finally:
+        drivers.discard(account.name)  # at most one browser per worker; the profile keeps the login
+    result["seconds"] = time.perf_counter() - start
+    result["items_per_sec"] = result["items"] / result["seconds"] if result["seconds"] else 0.0
+    return result
+
+
+def fetch_accounts(accounts, workers=None, max_items=None):
+    '''
+    Fetches every account on a pool of at most workers browser sessions.
+    Returns (per-account results in input order, per-worker summary dict, wall-clock seconds).
+    '''
+    workers = max(1, min(workers or config.FETCH_WORKERS, len(accounts)))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        results = list(pool.map(lambda account: fetch_account(account, max_items), accounts))
+    elapsed = time.perf_counter() - start
+    by_worker = {}
+    for result in results:
+        worker = by_worker.setdefault(result["worker"], {"accounts": 0, "items": 0, "saved": 0, "seconds": 0.0})
+        worker["accounts"] += 1
+        worker["items"] += result["items"]
+        worker["saved"] += result["saved"]
+        worker["seconds"] += result["seconds"]
+    for worker in by_worker.values():
+        worker["items_per_sec"] = worker["items"] / worker["seconds"] if worker["seconds"] else 0.0
+    return results, by_worker, elapsed
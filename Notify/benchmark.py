@@ -0,0 +1,829 @@
+# benchmark.py
+import argparse
+import io
+import json
+import os
+import pathlib
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager, redirect_stdout
+from rich.console import Console
+from rich.table import Table
+import sqlalchemy
+from sqlalchemy import event, select
+import classifier
+import config
+import db
+import duplicates
+import migrations
+import utils
+from database_setup import Base, Category, Rule, Sorted, Unsorted
+from ingest import ingest_notifications
+from operations import move_to_sorted, move_to_unsorted, delete_notifications
+from pipeline import IngestWriter, ingest_source
+from queries import get_by_ordinal, iter_pages, keyset_page, category_counts, SORTED_LOAD_OPTIONS
+from rules import RuleMatcher, apply_rules, _compile
+from search import search
+from utils import session_scope
+import sources
+import stats
+import transfer
+
+# Standalone benchmarks for the hot paths. Every benchmark runs against a throwaway SQLite file,
+# never against notify_this.db.
+# Usage: python benchmark.py ingest --rows 10000
+#        python benchmark.py suite --rows 1000 100000 1000000 --json after.json --compare before.json
+#        python benchmark.py startup --rows 1000
+# --json saves the results (with the commit they were measured on) and --compare checks a run
+# against a saved one, failing when any path got slower than --tolerance allows.
+
+FIXTURES_DIR = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+console = Console()
+
+
+@contextmanager
+def temp_database():
+    '''Points the shared engine at a fresh temporary SQLite file with the schema created.'''
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="notify_bench_")
+    os.close(fd)
+    db.configure(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(db.get_engine())
+        migrations.upgrade(db.get_engine(), Base.metadata)
+        yield path
+    finally:
+        db.configure(None)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def synthetic_records(count, first=0):
+    '''Generates count fake scraped notifications.'''
+    for i in range(first, first + count):
+        yield {
+            "title": f"Person {i % 997}",
+            "content": f"Person {i % 997} reacted to your post about topic {i % 113} ({i})",
+        }
+
+
+def seed_unsorted(rows, first=0):
+    '''Fills the unsorted table with synthetic rows (fingerprints included) using bulk inserts.'''
+    with session_scope() as session:
+        for chunk in utils.chunked(synthetic_records(rows, first), 10000):
+            session.execute(Unsorted.__table__.insert(), [
+                {**record, "fingerprint": utils.notification_fingerprint(record["title"], record["content"])}
+                for record in chunk
+            ])
+
+
+def seed_sorted(rows, categories=8):
+    '''Fills the category and sorted tables with synthetic rows using bulk inserts.'''
+    with session_scope() as session:
+        session.execute(Category.__table__.insert(), [{"name": f"Category {i}"} for i in range(1, categories + 1)])
+        for chunk in utils.chunked(enumerate(synthetic_records(rows)), 10000):
+            session.execute(Sorted.__table__.insert(), [
+                {
+                    "title": record["title"],
+                    "content": record["content"],
+                    "category_id": i % categories + 1,
+                    "importance_level": i % 5 + 1,
+                    "note": None,
+                }
+                for i, record in chunk
+            ])
+
+
+@contextmanager
+def count_queries():
+    '''Counts the SQL statements executed on the shared engine inside the block.'''
+    counter = {"queries": 0}
+
+    def on_execute(*args):
+        counter["queries"] += 1
+
+    engine = db.get_engine()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+def timed(fn, *args, **kwargs):
+    '''Runs fn and returns (elapsed_seconds, result).'''
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _orm_ingest(records):
+    '''The pre-bulk path: one Unsorted ORM object per notification.'''
+    with session_scope() as session:
+        for record in records:
+            session.add(Unsorted(title=record["title"], content=record["content"]))
+        session.commit()
+
+
+def bench_ingest(rows):
+    '''Compares per-object ORM inserts with ingest_notifications() bulk inserts.'''
+    results = []
+    for label, fn in (("orm session.add", _orm_ingest), ("ingest_notifications", ingest_notifications)):
+        with temp_database():
+            records = list(synthetic_records(rows))
+            elapsed, _ = timed(fn, records)
+            results.append({"path": label, "rows": rows, "seconds": elapsed, "rows_per_sec": rows / elapsed})
+    return results
+
+
+def build_notifications_page(rows, fixture="notifications.html"):
+    '''
+    Writes a copy of the saved notifications page with its items repeated up to rows items.
+    Returns the path of the temporary HTML file.
+    '''
+    html = (FIXTURES_DIR / fixture).read_text(encoding="utf-8")
+    items = re.findall(r"<div data-finite-scroll-hotkey-item=.*?</div>", html, flags=re.DOTALL)
+    repeated = []
+    for i in range(rows):
+        item = re.sub(r'data-finite-scroll-hotkey-item="\d+"', f'data-finite-scroll-hotkey-item="{i}"', items[i % len(items)])
+        repeated.append(item)
+    start, end = html.index(items[0]), html.index(items[-1]) + len(items[-1])
+    fd, path = tempfile.mkstemp(suffix=".html", prefix="notify_page_")
+    with os.fdopen(fd, "w", encoding="utf-8") as page:
+        page.write(html[:start] + "\n".join(repeated) + html[end:])
+    return path
+
+
+def bench_extract(rows):
+    '''
+    Compares per-element WebDriver extraction with the single execute_script extraction
+    on a local copy of the notifications page (needs Chrome and ChromeDriver, no LinkedIn login).
+    '''
+    import scraper  # only this benchmark needs selenium
+
+    path = build_notifications_page(rows)
+    driver = scraper.setup_driver()
+    results = []
+    try:
+        driver.get(pathlib.Path(path).as_uri())
+        extracted = {}
+        for mode in ("webdriver", "js"):
+            elapsed, records = timed(scraper.extract_notifications, driver, mode)
+            extracted[mode] = [(record["title"], record["content"]) for record in records]
+            results.append({"path": mode, "rows": len(records), "seconds": elapsed, "rows_per_sec": len(records) / elapsed})
+        if extracted["webdriver"] != extracted["js"]:
+            console.print("[bold red]Extractors disagree on the extracted titles/contents.[/]")
+    finally:
+        driver.quit()
+        os.remove(path)
+    return results
+
+
+def bench_listing(rows, pages=5, page_size=10):
+    '''
+    Renders the first pages of the sorted listing and counts the SQL queries each page costs.
+    Every page must cost the same constant number of queries (no per-row category lookups).
+    '''
+    results = []
+    with temp_database():
+        seed_sorted(rows)
+        real_console, utils.console = utils.console, Console(file=io.StringIO())
+        try:
+            with session_scope() as session:
+                page_iter = iter_pages(session, Sorted, page_size, options=SORTED_LOAD_OPTIONS)
+                for page_number in range(1, pages + 1):
+                    with count_queries() as counter:
+                        start = time.perf_counter()
+                        page = next(page_iter, None)
+                        if page is None:
+                            break
+                        utils.render_notifications(page, sorted=True)
+                        elapsed = time.perf_counter() - start
+                    results.append({"page": page_number, "rows": len(page), "queries": counter["queries"], "seconds": elapsed})
+        finally:
+            utils.console = real_console
+    if len({result["queries"] for result in results}) > 1 or results[0]["queries"] > 1:
+        raise AssertionError(f"sorted listing is not a constant single query per page: {results}")
+    return results
+
+
+def _orm_move_category(session, category_id):
+    '''The pre-set-based remove_category loop: one Unsorted object added and one Sorted deleted per row.'''
+    for notification in session.query(Sorted).filter_by(category_id=category_id).all():
+        session.add(Unsorted(title=notification.title, content=notification.content, fingerprint=notification.fingerprint))
+        session.delete(notification)
+
+
+def bench_move(rows):
+    '''
+    Moves a whole category of rows back to unsorted, per-row ORM vs move_to_unsorted(), then
+    moves them all into the sorted table again with move_to_sorted(). Counts the SQL statements.
+    '''
+    results = []
+    for label, fn in (("orm per-row move", _orm_move_category),
+                      ("move_to_unsorted", lambda session, category_id: move_to_unsorted(session, category_id=category_id))):
+        with temp_database():
+            seed_sorted(rows, categories=1)
+            with session_scope() as session, count_queries() as counter:
+                elapsed, _ = timed(lambda: (fn(session, 1), session.commit()))
+            results.append({"path": label, "rows": rows, "queries": counter["queries"], "seconds": elapsed,
+                            "rows_per_sec": rows / elapsed})
+            if label == "move_to_unsorted":
+                with session_scope() as session, count_queries() as counter:
+                    ids = [row.id for row in session.execute(Unsorted.__table__.select())]
+                    elapsed, _ = timed(lambda: (move_to_sorted(session, ids, 1, 3), session.commit()))
+                results.append({"path": "move_to_sorted (by ids)", "rows": rows, "queries": counter["queries"],
+                                "seconds": elapsed, "rows_per_sec": rows / elapsed})
+    return results
+
+
+def bench_search(rows, queries=("reacted topic", "person 42*", "post 7")):
+    '''Times full-text searches over rows unsorted notifications.'''
+    results = []
+    with temp_database():
+        ingest_notifications(synthetic_records(rows))
+        with session_scope() as session:
+            for query in queries:
+                elapsed, matches = timed(search, session, query, limit=20)
+                results.append({"query": query, "rows": rows, "matches": len(matches), "seconds": elapsed})
+    return results
+
+
+def bench_stats(rows, repeat=20):
+    '''
+    What the materialized stats cost and save: ingesting rows notifications with and without the
+    stats triggers, then the summary (per-category counts, backlog size, last fetch) read from the
+    stats table vs counted from rows unsorted and rows sorted notifications.
+    '''
+    results = []
+    for label, keep_triggers in (("ingest without stats triggers", False), ("ingest with stats triggers", True)):
+        with temp_database():
+            if not keep_triggers:
+                with db.get_engine().begin() as connection:
+                    for name in ("unsorted_stats_insert", "unsorted_stats_delete", "sorted_stats_insert",
+                                 "sorted_stats_delete", "sorted_stats_update"):
+                        connection.execute(sqlalchemy.text(f"DROP TRIGGER {name}"))
+            elapsed, _ = timed(ingest_notifications, synthetic_records(rows))
+            results.append({"path": label, "rows": rows, "seconds": elapsed, "per_op_ms": 1000 * elapsed / rows})
+    with temp_database():
+        seed_unsorted(rows)
+        seed_sorted(rows)
+        with session_scope() as session:
+            for label, fn in (("summary by counting the tables", lambda: session.execute(sqlalchemy.text(stats._COUNT_TABLES)).all()),
+                              ("summary from the stats table", lambda: stats.read_stats(session)),
+                              ("category_counts", lambda: category_counts(session))):
+                elapsed, _ = timed(lambda: [fn() for _ in range(repeat)])
+                results.append({"path": label, "rows": rows, "seconds": elapsed / repeat, "per_op_ms": 1000 * elapsed / repeat})
+    return results
+
+
+def seed_rules(count=50, categories=8):
+    '''Saves count synthetic keyword/regex/sender rules spread over the seeded categories.'''
+    kinds = ("keyword", "regex", "sender")
+    patterns = {
+        "keyword": lambda i: f"topic {i * 2}",
+        "regex": lambda i: rf"reacted .* topic {i * 2 + 1}\b",
+        "sender": lambda i: rf"^Person {i * 7}$",
+    }
+    with session_scope() as session:
+        session.execute(Rule.__table__.insert(), [
+            {
+                "kind": kinds[i % 3],
+                "pattern": patterns[kinds[i % 3]](i),
+                "category_id": i % categories + 1,
+                "importance_level": i % 5 + 1,
+            }
+            for i in range(count)
+        ])
+
+
+def bench_rules(rows, rule_count=50):
+    '''
+    Classifies a synthetic unsorted backlog with the combined rule matcher versus trying each
+    rule's regex in turn, then times apply_rules() moving the whole backlog in one transaction.
+    '''
+    results = []
+    with temp_database():
+        ingest_notifications(synthetic_records(rows))
+        with session_scope() as session:
+            session.execute(Category.__table__.insert(), [{"name": f"Category {i}"} for i in range(1, 9)])
+        seed_rules(rule_count)
+        with session_scope() as session:
+            saved_rules = session.query(Rule).order_by(Rule.id).all()
+            backlog = [(n.title, n.content) for n in session.query(Unsorted)]
+            matcher = RuleMatcher(saved_rules)
+            one_by_one = [(rule, _compile([rule])) for rule in saved_rules]
+
+            def classify_combined():
+                return sum(1 for title, content in backlog if matcher.classify(title, content))
+
+            def classify_one_by_one():
+                matched = 0
+                for title, content in backlog:
+                    for rule, regex in one_by_one:
+                        if regex.search(title if rule.kind == "sender" else f"{title}\n{content}"):
+                            matched += 1
+                            break
+                return matched
+
+            for label, fn in (("classify: rule by rule", classify_one_by_one), ("classify: combined matcher", classify_combined)):
+                elapsed, matched = timed(fn)
+                results.append({"path": label, "rows": rows, "matched": matched, "seconds": elapsed, "rows_per_sec": rows / elapsed})
+        with session_scope() as session:
+            elapsed, moved = timed(apply_rules, session)
+        results.append({"path": "apply_rules (classify + move)", "rows": rows, "matched": sum(moved.values()),
+                        "seconds": elapsed, "rows_per_sec": rows / elapsed})
+    return results
+
+
+def _topic_labels(content, categories=8):
+    # the synthetic notifications' topic decides their category and importance, so there is something to learn
+    topic = int(re.search(r"topic (\d+)", content).group(1))
+    return topic % categories + 1, topic % 5 + 1
+
+
+def seed_labelled(rows, first=0):
+    '''Sorts synthetic notifications by their topic (see _topic_labels).'''
+    with session_scope() as session:
+        for chunk in utils.chunked(synthetic_records(rows, first), 10000):
+            session.execute(Sorted.__table__.insert(), [
+                {"title": record["title"], "content": record["content"],
+                 **dict(zip(("category_id", "importance_level"), _topic_labels(record["content"])))}
+                for record in chunk
+            ])
+
+
+def bench_classifier(rows, categories=8):
+    '''
+    Trains the suggestion model on rows sorted notifications (from scratch, then incrementally on 1%
+    more), and suggests categories for an unsorted backlog a tenth that size, one notification at a
+    time versus whole batches at once. Accuracy is measured against the topics the synthetic
+    notifications were sorted by.
+    '''
+    results = []
+    model_path = os.path.join(tempfile.mkdtemp(prefix="notify-bench-"), "model.npz")
+    backlog = max(rows // 10, 1)
+    with temp_database():
+        with session_scope() as session:
+            session.execute(Category.__table__.insert(), [{"name": f"Category {i}"} for i in range(1, categories + 1)])
+        seed_labelled(rows)
+        seed_unsorted(backlog, first=rows)
+        with session_scope() as session:
+            elapsed, (model, trained) = timed(classifier.update_classifier, session, model_path, True)
+        results.append({"path": "train (from scratch)", "rows": trained, "accuracy": "", "seconds": elapsed,
+                        "rows_per_sec": trained / elapsed})
+        new = max(rows // 100, 1)
+        seed_labelled(new, first=rows + backlog)
+        with session_scope() as session:
+            elapsed, (model, trained) = timed(classifier.update_classifier, session, model_path)
+        results.append({"path": "train (incremental, 1% new)", "rows": trained, "accuracy": "", "seconds": elapsed,
+                        "rows_per_sec": trained / elapsed})
+        with session_scope() as session:
+            notifications = session.query(Unsorted).all()
+
+            def one_at_a_time():
+                return [classifier.suggest(session, model, [notification])[0] for notification in notifications]
+
+            def batched():
+                return [suggestion for _, suggestion in classifier.suggest_backlog(session, model)]
+
+            for label, fn in (("suggest: one at a time", one_at_a_time), ("suggest: whole batches", batched)):
+                elapsed, suggestions = timed(fn)
+                correct = sum((suggestion.category_id, suggestion.importance_level) == _topic_labels(n.content)
+                              for n, suggestion in zip(notifications, suggestions))
+                results.append({"path": label, "rows": backlog, "accuracy": f"{correct / backlog:.1%}",
+                                "seconds": elapsed, "rows_per_sec": backlog / elapsed})
+    return results
+
+
+def near_duplicate_records(count, templates=500, seed=7):
+    '''
+    Generates count notifications of which four in five follow one of templates sentence patterns
+    with a different name and number filled in (the "X and 12 others reacted" kind); the rest are
+    one-offs.
+    '''
+    rnd = random.Random(seed)
+    # letters only: numbers are normalized away before hashing, "word12" and "word13" would be the same word
+    word = lambda: "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 9)))
+    vocabulary = [word() for _ in range(5000)]
+    names = [f"{word().title()} {word().title()}" for _ in range(1000)]
+    patterns = [" ".join(rnd.choice(vocabulary) for _ in range(12)) for _ in range(templates)]
+    for i in range(count):
+        name = rnd.choice(names)
+        if rnd.random() < 0.8:
+            content = f"{name} and {rnd.randrange(100)} others {rnd.choice(patterns)}"
+        else:
+            content = f"{name} " + " ".join(rnd.choice(vocabulary) for _ in range(14))
+        yield {"title": name, "content": content}
+
+
+def bench_duplicates(rows, lookups=100):
+    '''
+    Indexes rows notifications for near-duplicate detection (MinHash + LSH buckets), clusters the
+    whole backlog, and looks up the cluster of single notifications through the bucket index
+    versus comparing the notification against every row.
+    '''
+    results = []
+    with temp_database():
+        ingest_notifications(near_duplicate_records(rows))
+        with session_scope() as session:
+            elapsed, indexed = timed(duplicates.index_unsorted, session)
+        results.append({"path": "index (signatures + buckets)", "rows": indexed, "ops": indexed, "found": "",
+                        "seconds": elapsed, "ms_per_op": 1000 * elapsed / indexed})
+        with session_scope() as session:
+            elapsed, clusters = timed(duplicates.find_clusters, session)
+        clustered = sum(len(cluster) for cluster in clusters)
+        results.append({"path": "find_clusters (whole backlog)", "rows": rows, "ops": 1,
+                        "found": f"{len(clusters)} clusters, {clustered} rows", "seconds": elapsed, "ms_per_op": 1000 * elapsed})
+        ids = random.Random(1).sample(range(1, rows + 1), min(lookups, rows))
+        with session_scope() as session:
+            elapsed, sizes = timed(lambda: [len(duplicates.cluster_of(session, i)) for i in ids])
+            results.append({"path": "cluster_of: bucket lookups", "rows": rows, "ops": len(ids),
+                            "found": f"{sum(sizes) / len(ids):.1f} per lookup", "seconds": elapsed,
+                            "ms_per_op": 1000 * elapsed / len(ids)})
+            scan_ids = ids[:max(len(ids) // 10, 1)]  # a full scan per lookup is slow, so fewer of them
+
+            def scan():
+                everything = session.execute(select(Unsorted.id, Unsorted.title, Unsorted.content)).all()
+                signature_rows = duplicates.signatures([(row.title, row.content) for row in everything])
+                position = {row.id: i for i, row in enumerate(everything)}
+                return [int(((signature_rows == signature_rows[position[i]]).mean(axis=1)
+                             >= config.DUPLICATE_SIMILARITY).sum()) for i in scan_ids]
+
+            elapsed, sizes = timed(scan)
+            results.append({"path": "direct neighbours: compare with every row", "rows": rows, "ops": len(scan_ids),
+                            "found": f"{sum(sizes) / len(scan_ids):.1f} per lookup", "seconds": elapsed,
+                            "ms_per_op": 1000 * elapsed / len(scan_ids)})
+    return results
+
+
+def peak_memory(fn, *args):
+    '''Runs fn again under tracemalloc and returns the peak Python memory it allocated, in MiB.'''
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_transfer(rows, formats=("jsonl", "csv", "parquet")):
+    '''
+    Exports the sorted table in each format, then imports every file into an empty database,
+    reporting rows/s and the peak Python memory of each step (which must not grow with the row count).
+    Memory is measured in a second, traced run, since tracing slows the timed run down several times.
+    '''
+    formats = [fmt for fmt in formats if fmt != "parquet" or transfer.pyarrow is not None]
+    results = []
+
+    def export(fmt, path):
+        with session_scope() as session, open(path, "wb") as out:
+            return transfer.export_table(session, "sorted", out, fmt)
+
+    def import_(fmt, path):
+        with temp_database():
+            with session_scope() as session:  # the categories the rows point at
+                session.execute(Category.__table__.insert(), [{"name": f"Category {i}"} for i in range(1, 9)])
+            with session_scope() as session, open(path, "rb") as infile:
+                return timed(transfer.import_table, session, "sorted", infile, fmt)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {fmt: os.path.join(directory, f"sorted.{fmt}") for fmt in formats}
+        with temp_database():
+            seed_sorted(rows)
+            for fmt, path in paths.items():
+                elapsed, written = timed(export, fmt, path)
+                results.append({"path": f"export {fmt}", "rows": written, "seconds": elapsed,
+                                "rows_per_sec": written / elapsed, "peak_mib": peak_memory(export, fmt, path)})
+        for fmt, path in paths.items():
+            elapsed, inserted = import_(fmt, path)
+            results.append({"path": f"import {fmt}", "rows": inserted, "seconds": elapsed,
+                            "rows_per_sec": inserted / elapsed, "peak_mib": peak_memory(import_, fmt, path)})
+    return results
+
+
+def bench_pipeline(rows, batch_size=10, scroll_seconds=0.01):
+    '''
+    Simulates a scrape that loads batch_size items per scroll_seconds scroll and compares writing
+    each batch inline (scrolling waits for the database) with the background IngestWriter.
+    '''
+    batches = list(utils.chunked(synthetic_records(rows), batch_size))
+    results = []
+
+    def inline():
+        for batch in batches:
+            time.sleep(scroll_seconds)
+            ingest_notifications(batch)
+        return rows
+
+    def pipelined():
+        with IngestWriter() as writer:
+            for batch in batches:
+                time.sleep(scroll_seconds)
+                writer.put(batch)
+        return writer.inserted
+
+    for label, fn in (("inline writes", inline), ("IngestWriter", pipelined)):
+        with temp_database():
+            elapsed, inserted = timed(fn)
+        results.append({"path": label, "rows": inserted, "scrolls": len(batches),
+                        "scrolling_seconds": len(batches) * scroll_seconds, "seconds": elapsed})
+    return results
+
+
+def bench_sources(rows):
+    '''
+    Runs the offline sources end to end through ingest_source() (no browser needed): generated
+    notifications, and a saved notifications page with rows items parsed by HtmlSource (needs lxml;
+    the page repeats the fixture's few items, so only those are new).
+    '''
+    candidates = [("SyntheticSource", lambda: sources.SyntheticSource(count=rows, batch_size=50))]
+    page = None
+    if sources.lxml is not None:
+        page = build_notifications_page(rows)
+        candidates.append(("HtmlSource", lambda: sources.HtmlSource([page])))
+    results = []
+    try:
+        for label, make_source in candidates:
+            with temp_database():
+                elapsed, (writer, _) = timed(ingest_source, make_source())
+            results.append({"path": label, "rows": writer.received, "saved": writer.inserted, "writes": writer.writes,
+                            "seconds": elapsed, "rows_per_sec": writer.received / elapsed})
+    finally:
+        if page:
+            os.remove(page)
+    return results
+
+
+class FakeDriver:
+    '''
+    Stands in for the Selenium WebDriver so fetch_notifications() runs without a browser: the
+    "page" holds total generated notifications, and every scroll loads page_size more of them.
+    '''
+
+    def __init__(self, total, page_size=10):
+        self.records = list(sources.SyntheticSource(count=total, batch_size=total, first=10 ** 9))
+        self.page_size = page_size
+        self.loaded = min(page_size, total)
+
+    def get(self, url):
+        pass
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def find_elements(self, by, value):
+        return self.records[:self.loaded]
+
+    def execute_script(self, script, *args):
+        if "querySelectorAll" in script and "map" not in script:  # scroller.COUNT_ITEMS_JS
+            return self.loaded
+        return [dict(record) for record in self.records[args[0]:self.loaded]]  # EXTRACT_NOTIFICATIONS_JS
+
+    def execute_async_script(self, script, selector, count, timeout_ms, since_last_seen):
+        self.loaded = min(self.loaded + self.page_size, len(self.records))
+        return {"count": self.loaded, "seen": False}
+
+
+def _suite_fetch(items=1000):
+    import scraper  # selenium is only needed for this path
+
+    with redirect_stdout(io.StringIO()):
+        stats = scraper.fetch_notifications(FakeDriver(items))
+    return items, stats.saved
+
+
+def _suite_display(pages=10, page_size=10):
+    real_console, utils.console = utils.console, Console(file=io.StringIO())
+    try:
+        with session_scope() as session:
+            for model, options in ((Unsorted, ()), (Sorted, SORTED_LOAD_OPTIONS)):
+                page_iter = iter_pages(session, model, page_size, options=options)
+                for _, page in zip(range(pages), page_iter):
+                    utils.render_notifications(page, sorted=model is Sorted)
+    finally:
+        utils.console = real_console
+    return 2 * pages, None
+
+
+def _suite_categorize(rounds=50, selected=5):
+    # the categorize menu: show a page, pick some notifications, move them (one commit each)
+    for _ in range(rounds):
+        with session_scope() as session:
+            ids = [notification.id for notification in keyset_page(session, Unsorted, None, selected)]
+            move_to_sorted(session, ids, 1, 3, "benchmark")
+    return rounds, None
+
+
+def _suite_delete(rounds=50):
+    # the delete menu: resolve the chosen display # to a row, delete it (one commit each)
+    for _ in range(rounds):
+        with session_scope() as session:
+            notification = get_by_ordinal(session, Unsorted, 10)
+            delete_notifications(session, Unsorted, [notification.id])
+    return rounds, None
+
+
+def _suite_remove_category():
+    with session_scope() as session:
+        moved = move_to_unsorted(session, category_id=2)
+        session.query(Category).filter_by(id=2).delete()
+    return 1, moved
+
+
+SUITE = (
+    ("fetch (fake driver, 1000 items)", _suite_fetch),
+    ("display (10 pages of each list)", _suite_display),
+    ("categorize (50 moves of 5)", _suite_categorize),
+    ("delete (50 by display #)", _suite_delete),
+    ("remove_category", _suite_remove_category),
+)
+
+
+def bench_suite(rows):
+    '''
+    The hot paths of the menus, run one after another against a database already holding rows
+    unsorted and rows sorted notifications: fetching (through a fake WebDriver), listing, moving
+    selected notifications, deleting by display number and removing a whole category.
+    '''
+    results = []
+    with temp_database():
+        seed_unsorted(rows)
+        seed_sorted(rows)
+        for label, fn in SUITE:
+            with count_queries() as counter:
+                elapsed, (ops, moved) = timed(fn)
+            result = {"path": label, "rows": rows, "ops": ops, "queries": counter["queries"], "seconds": elapsed,
+                      "ms_per_op": 1000 * elapsed / ops}
+            if moved is not None:
+                result["ops"] = f"{ops} ({moved} rows)"
+            results.append(result)
+    return results
+
+
+# what each startup case runs in a fresh interpreter ({uri} is the temporary database)
+STARTUP_CASES = (
+    ("python -c pass", "pass"),
+    ("import cli (main menu)", "import cli"),
+    ("import commands", "import commands"),
+    ("cli.py list --limit 10", "import sys, db; db.configure({uri!r}); import cli; sys.argv = ['cli.py', 'list', '--limit', '10']; cli.main()"),
+)
+HEAVY_PACKAGES = ("sqlalchemy", "selenium", "numpy")
+_IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", re.MULTILINE)
+
+
+def profile_startup(code, repeat=5):
+    '''
+    Runs code in repeat fresh interpreters with -X importtime. Returns the fastest wall time,
+    the import time python reported for that run (seconds), the number of modules imported and
+    which of HEAVY_PACKAGES were loaded.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=pathlib.Path(__file__).resolve().parent,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            imports = _IMPORT_TIME.findall(process.stderr)
+            top_level = sum(int(cumulative) for cumulative, indent, _ in imports if len(indent) == 1)
+            loaded = {name.split(".")[0] for _, _, name in imports}
+            best = (elapsed, top_level / 1e6, len(imports), [package for package in HEAVY_PACKAGES if package in loaded])
+    return best
+
+
+def bench_startup(rows):
+    '''
+    Time from launching python to the main menu (importing cli), to a subcommand being ready
+    (importing commands) and to a whole `list` run against a database of rows notifications,
+    each in fresh interpreters. Also shows what was imported: the menus should start without
+    SQLAlchemy, Selenium or numpy, and `list` without Selenium or numpy.
+    '''
+    results = []
+    with temp_database() as path:
+        seed_unsorted(rows)
+        db.get_engine().dispose()
+        for label, code in STARTUP_CASES:
+            elapsed, import_time, modules, heavy = profile_startup(code.format(uri=f"sqlite:///{path}"))
+            results.append({"path": label, "rows": rows, "seconds": elapsed, "import_seconds": import_time,
+                            "modules": modules, "loads": ", ".join(heavy) or "-"})
+    return results
+
+
+BENCHMARKS = {
+    "ingest": bench_ingest,
+    "extract": bench_extract,
+    "listing": bench_listing,
+    "search": bench_search,
+    "rules": bench_rules,
+    "move": bench_move,
+    "transfer": bench_transfer,
+    "pipeline": bench_pipeline,
+    "sources": bench_sources,
+    "suite": bench_suite,
+    "classifier": bench_classifier,
+    "duplicates": bench_duplicates,
+    "startup": bench_startup,
+    "stats": bench_stats,
+}
+
+
+def print_results(name, results):
+    table = Table(title=name, show_header=True, header_style="bold magenta")
+    for column in results[0]:
+        table.add_column(column)
+    for result in results:
+        table.add_row(*[f"{value:,.3f}" if isinstance(value, float) else str(value) for value in result.values()])
+    console.print(table)
+
+
+def run_metadata():
+    '''Where a run was measured: the commit (with a + when the tree has local changes) and versions.'''
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    commit = git("rev-parse", "--short", "HEAD")
+    if commit and git("status", "--porcelain", "--untracked-files=no", "."):
+        commit += "+"
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def _result_key(run):
+    # a result is identified by its benchmark, size and first column (the path, mode, page, ...)
+    return run["benchmark"], run["size"], str(next(iter(run["result"].values())))
+
+
+def compare_runs(before, after, tolerance):
+    '''
+    Prints the seconds of every result found in both runs side by side. Returns the results that
+    got slower than tolerance times the saved time.
+    '''
+    saved = {_result_key(run): run["result"] for run in before["runs"]}
+    table = Table(title=f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}",
+                  show_header=True, header_style="bold magenta")
+    for column in ("benchmark", "size", "path", "before", "after", "ratio"):
+        table.add_column(column)
+    regressions = []
+    for run in after["runs"]:
+        key = _result_key(run)
+        if key not in saved or "seconds" not in run["result"]:
+            continue
+        old, new = saved[key]["seconds"], run["result"]["seconds"]
+        ratio = new / old if old else 1.0
+        style = "red" if ratio > tolerance else "green" if ratio < 1 / tolerance else ""
+        table.add_row(*map(str, key), f"{old:.3f}", f"{new:.3f}", f"[{style}]{ratio:.2f}x[/{style}]" if style else f"{ratio:.2f}x")
+        if ratio > tolerance:
+            regressions.append(key)
+    console.print(table)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Notify This hot paths on a temporary database.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000],
+                        help="number(s) of synthetic notifications; the benchmark runs once per size")
+    parser.add_argument("--json", metavar="FILE", help="save the results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="slowdown factor that counts as a regression (default 1.5)")
+    args = parser.parse_args(argv)
+    before = None
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+    runs = []
+    for rows in args.rows:
+        results = BENCHMARKS[args.benchmark](rows)
+        print_results(f"{args.benchmark} ({rows:,} rows)", results)
+        runs.extend({"benchmark": args.benchmark, "size": rows, "result": result} for result in results)
+    after = {"meta": run_metadata(), "runs": runs}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(after, f, indent=2)
+        console.print(f"[green]Results saved to {args.json}[/green]")
+    if before is not None and compare_runs(before, after, args.tolerance):
+        console.print(f"[red]Slower than {args.tolerance}x the saved results.[/red]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+# classifier.py
+import json
+import os
+import random
+import re
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from datetime import datetime
+from sqlalchemy import select, and_, or_, not_
+from database_setup import Category, Sorted, Unsorted
+from operations import move_to_sorted
+from utils import chunked
+import config
+
+try:
+    import numpy as np
+except ImportError:  # suggestions are optional: pip install numpy
+    np = None
+
+# Local classifier that learns from past sorting. Every sorted notification is a labelled example
+# (title and content -> category and importance), so the model suggests both for unsorted ones.
+#   features - hashed TF-IDF: title words, content words and content word pairs are hashed into
+#              N_FEATURES buckets (no vocabulary to keep), weighted by sublinear term frequency
+#              times inverse document frequency and L2-normalized. Document frequencies are counted
+#              as examples arrive, so the feature space never has to be refitted.
+#   model    - two softmax (multinomial logistic) regressions over those features, one for the
+#              category and one for the importance level, trained with mini-batch SGD. The
+#              softmax probability of the winning class is the suggestion's confidence.
+# Training is incremental: the model remembers the newest sorted notification it has seen (by
+# sorted_at, then id; ids alone can be reused by SQLite once the top rows are deleted) and only learns
+# from newer rows (a shuffled chunk at a time, several passes over each), so keeping it current
+# after a sorting session takes a moment. The trained model is cached in
+# config.CLASSIFIER_MODEL_FILE. Predictions are made for whole batches of notifications at once
+# with array operations. Nothing leaves the machine.
+
+N_FEATURES = 2 ** 18
+EPOCHS = 5  # passes over each chunk of new examples
+LEARNING_RATE = 0.5
+BATCH_SIZE = 64  # examples per SGD step
+SHUFFLE_CHUNK = 4096  # examples read from the database and shuffled together
+MODEL_VERSION = 2
+
+_WORD = re.compile(r"\w+")
+
+Suggestion = namedtuple("Suggestion", "category_id category_confidence importance_level importance_confidence")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Suggestions need numpy (pip install numpy).")
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token):
+    # crc32 rather than hash(): string hashes change between runs, the cached model must not
+    return zlib.crc32(token.encode("utf-8")) % N_FEATURES
+
+
+def _tokens(title, content):
+    words = _WORD.findall((content or "").lower())
+    yield from ("t:" + word for word in _WORD.findall((title or "").lower()))
+    yield from words
+    yield from (f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+class _Head:
+    '''One softmax regression: a weight column and a bias per label.'''
+
+    def __init__(self, labels=(), weights=None, bias=None):
+        self.labels = list(labels)
+        self.weights = weights if weights is not None else np.zeros((N_FEATURES, len(self.labels)), np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(self.labels), np.float32)
+
+    def add_labels(self, labels):
+        new = sorted(set(labels) - set(self.labels))
+        if new:
+            self.labels.extend(new)
+            self.weights = np.hstack([self.weights, np.zeros((N_FEATURES, len(new)), np.float32)])
+            self.bias = np.concatenate([self.bias, np.zeros(len(new), np.float32)])
+
+    def probabilities(self, features):
+        rows, cols, values, n = features
+        scores = np.zeros((n, len(self.labels)), np.float32)
+        if len(rows):
+            present, starts = np.unique(rows, return_index=True)
+            scores[present] = np.add.reduceat(self.weights[cols] * values[:, None], starts)
+        scores += self.bias
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def step(self, features, labels):
+        '''One SGD step on the cross-entropy of a mini-batch.'''
+        rows, cols, values, n = features
+        gradient = self.probabilities(features)
+        gradient[np.arange(n), [self.labels.index(label) for label in labels]] -= 1
+        gradient *= LEARNING_RATE / n
+        # sum the updates per bucket (sorted + reduceat, far faster than np.add.at), then apply them
+        order = np.argsort(cols, kind="stable")
+        buckets, starts = np.unique(cols[order], return_index=True)
+        self.weights[buckets] -= np.add.reduceat(values[order, None] * gradient[rows[order]], starts)
+        self.bias -= gradient.sum(axis=0)
+
+
+class Classifier:
+    '''Suggests a category and an importance level for notifications; see the notes at the top.'''
+
+    def __init__(self):
+        _require_numpy()
+        self.document_frequency = np.zeros(N_FEATURES, np.int32)
+        self.documents = 0
+        self.examples = 0  # examples trained on
+        self.trained_through = None  # (sorted_at, id) of the newest sorted notification trained on
+        self.category = _Head()
+        self.importance = _Head()
+
+    @property
+    def ready(self):
+        '''True once the model has seen enough examples (and categories) to be worth asking.'''
+        return self.examples >= config.CLASSIFIER_MIN_EXAMPLES and len(self.category.labels) > 1
+
+    def _counts(self, texts):
+        '''Hashed term counts of (title, content) pairs as (row, column, count) arrays, sorted by row.'''
+        keys = [row * N_FEATURES + _bucket(token) for row, (title, content) in enumerate(texts)
+                for token in _tokens(title, content)]
+        keys, counts = np.unique(np.array(keys, np.int64), return_counts=True)
+        return keys // N_FEATURES, keys % N_FEATURES, counts
+
+    def _features(self, counts, n):
+        rows, cols, term_counts = counts
+        idf = np.log((1 + self.documents) / (1 + self.document_frequency[cols])) + 1
+        values = ((1 + np.log(term_counts)) * idf).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, values * values, minlength=n))
+        return rows, cols, values / norms[rows], n
+
+    def features(self, texts):
+        return self._features(self._counts(texts), len(texts))
+
+    def partial_fit(self, examples, epochs=1):
+        '''
+        Trains on a chunk of (title, content, category_id, importance_level) tuples: adds them to
+        the document frequencies, then makes epochs passes of mini-batch SGD steps over them.
+        Every example is tokenized and hashed once, however many passes there are.
+        '''
+        self.category.add_labels(example[2] for example in examples)
+        self.importance.add_labels(example[3] for example in examples)
+        batches = [(self._counts([example[:2] for example in batch]), batch) for batch in chunked(examples, BATCH_SIZE)]
+        for counts, batch in batches:
+            np.add.at(self.document_frequency, counts[1], 1)  # (row, bucket) pairs are unique: one per document
+        self.documents += len(examples)
+        for _ in range(epochs):
+            for counts, batch in batches:
+                features = self._features(counts, len(batch))
+                self.category.step(features, [example[2] for example in batch])
+                self.importance.step(features, [example[3] for example in batch])
+        self.examples += len(examples)
+
+    def predict(self, texts, category_ids=None):
+        '''
+        Returns a Suggestion for each (title, content) pair. category_ids, if given, restricts the
+        suggested categories (e.g. to those that still exist); when none of the categories the model
+        knows is left, every suggestion is None.
+        '''
+        if not texts:
+            return []
+        features = self.features(texts)
+        category = self.category.probabilities(features)
+        if category_ids is not None:
+            # drop the other categories without renormalizing, so the confidence stays what the
+            # model thinks of the suggestion among all the categories it learned
+            excluded = np.array([label not in category_ids for label in self.category.labels], bool)
+            if excluded.all():
+                return [None] * len(texts)
+            category[:, excluded] = 0
+        importance = self.importance.probabilities(features)
+        best_category, best_importance = category.argmax(axis=1), importance.argmax(axis=1)
+        return [
+            Suggestion(self.category.labels[c], float(category[i, c]), self.importance.labels[m], float(importance[i, m]))
+            for i, (c, m) in enumerate(zip(best_category, best_importance))
+        ]
+
+    def save(self, path=None):
+        '''Writes the model to path (config.CLASSIFIER_MODEL_FILE by default), replacing it atomically.'''
+        path = path or config.CLASSIFIER_MODEL_FILE
+        meta = {"version": MODEL_VERSION, "n_features": N_FEATURES, "documents": self.documents,
+                "examples": self.examples,
+                "trained_through": self.trained_through and (self.trained_through[0].isoformat(), self.trained_through[1])}
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(
+                f, meta=np.array(json.dumps(meta)), document_frequency=self.document_frequency,
+                category_labels=np.array(self.category.labels, np.int64), category_weights=self.category.weights,
+                category_bias=self.category.bias, importance_labels=np.array(self.importance.labels, np.int64),
+                importance_weights=self.importance.weights, importance_bias=self.importance.bias)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=None):
+        '''Reads a saved model. Returns None if there is none, or it was saved with other settings.'''
+        path = path or config.CLASSIFIER_MODEL_FILE
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            if meta.get("version") != MODEL_VERSION or meta.get("n_features") != N_FEATURES:
+                return None
+            classifier = cls()
+            classifier.documents = meta["documents"]
+            classifier.examples = meta["examples"]
+            if meta["trained_through"]:
+                sorted_at, row_id = meta["trained_through"]
+                classifier.trained_through = (datetime.fromisoformat(sorted_at), row_id)
+            classifier.document_frequency = saved["document_frequency"]
+            classifier.category = _Head(saved["category_labels"].tolist(), saved["category_weights"], saved["category_bias"])
+            classifier.importance = _Head(saved["importance_labels"].tolist(), saved["importance_weights"],
+                                          saved["importance_bias"])
+        return classifier
+
+
+def _after(mark):
+    # rows sorted after the (sorted_at, id) mark; as a tuple comparison SQLite couldn't use the index
+    sorted_ = Sorted.__table__
+    sorted_at, row_id = mark
+    return or_(sorted_.c.sorted_at > sorted_at, and_(sorted_.c.sorted_at == sorted_at, sorted_.c.id > row_id))
+
+
+def _examples(session, after, through):
+    sorted_ = Sorted.__table__
+    query = select(sorted_.c.title, sorted_.c.content, sorted_.c.category_id, sorted_.c.importance_level)
+    if after is not None:
+        query = query.where(_after(after))
+    return session.execute(
+        query.where(not_(_after(through)))
+        .order_by(sorted_.c.sorted_at, sorted_.c.id)
+        .execution_options(yield_per=SHUFFLE_CHUNK))
+
+
+def train(session, classifier=None, epochs=EPOCHS):
+    '''
+    Trains classifier (a new one if None) on the sorted notifications it hasn't seen yet, reading
+    them in shuffled chunks of SHUFFLE_CHUNK and making epochs passes over each chunk.
+    Returns (classifier, number of new examples).
+    '''
+    classifier = classifier or Classifier()
+    after = classifier.trained_through
+    newest = session.execute(
+        select(Sorted.sorted_at, Sorted.id).where(Sorted.sorted_at.is_not(None))
+        .order_by(Sorted.sorted_at.desc(), Sorted.id.desc()).limit(1)).first()
+    if newest is None:
+        return classifier, 0
+    through = (newest.sorted_at, newest.id)
+    if after is not None and through <= after:
+        return classifier, 0
+    shuffle = random.Random(newest.id)  # repeatable
+    new = 0
+    for chunk in chunked(_examples(session, after, through), SHUFFLE_CHUNK):
+        chunk = [tuple(example) for example in chunk]
+        shuffle.shuffle(chunk)
+        classifier.partial_fit(chunk, epochs)
+        new += len(chunk)
+    classifier.trained_through = through
+    return classifier, new
+
+
+def update_classifier(session, path=None, rebuild=False):
+    '''
+    Loads the cached model, trains it on the notifications sorted since it was saved and saves it
+    again. rebuild starts from scratch (e.g. after many notifications were moved back or deleted).
+    Returns (classifier, number of new examples). Raises RuntimeError without numpy.
+    '''
+    _require_numpy()
+    classifier = None if rebuild else Classifier.load(path)
+    classifier, new = train(session, classifier)
+    if new or rebuild:
+        classifier.save(path)
+    return classifier, new
+
+
+def existing_categories(session):
+    return set(session.execute(select(Category.id)).scalars())
+
+
+def suggest(session, classifier, notifications):
+    '''
+    Suggestions for a page of notifications (anything with title and content), in the same order,
+    or [] when none of the categories the model learned exists any more.
+    '''
+    suggestions = classifier.predict([(n.title, n.content) for n in notifications], existing_categories(session))
+    return [] if None in suggestions else suggestions
+
+
+def suggest_backlog(session, classifier, batch_size=1000):
+    '''
+    Streams the unsorted notifications and yields (row, Suggestion); row has id, title and content.
+    Yields nothing when none of the categories the model learned exists any more.
+    '''
+    unsorted = Unsorted.__table__
+    category_ids = existing_categories(session)
+    rows = session.execute(
+        select(unsorted.c.id, unsorted.c.title, unsorted.c.content)
+        .order_by(unsorted.c.id)
+        .execution_options(yield_per=batch_size))
+    for batch in rows.partitions():
+        suggestions = classifier.predict([(row.title, row.content) for row in batch], category_ids)
+        if None in suggestions:
+            return
+        yield from zip(batch, suggestions)
+
+
+def confidence(suggestion):
+    '''A suggestion is only as sure as its less certain half.'''
+    return min(suggestion.category_confidence, suggestion.importance_confidence)
+
+
+def accept_suggestions(session, classifier, threshold=None, dry_run=False):
+    '''
+    Moves every unsorted notification whose suggestion is at least threshold sure (default
+    config.CLASSIFIER_AUTO_ACCEPT) to the suggested category and importance, one set-based move
+    per suggestion, inside the caller's transaction.
+    Returns {category name: number of notifications moved} (or that would be moved, with dry_run).
+    '''
+    threshold = config.CLASSIFIER_AUTO_ACCEPT if threshold is None else threshold
+    names = dict(session.execute(select(Category.id, Category.name)).all())
+    moves = {}  # (category id, importance level) -> unsorted ids
+    for row, suggestion in suggest_backlog(session, classifier):
+        if confidence(suggestion) >= threshold:
+            moves.setdefault((suggestion.category_id, suggestion.importance_level), []).append(row.id)
+    summary = {}
+    for (category_id, importance_level), ids in moves.items():
+        summary[names[category_id]] = summary.get(names[category_id], 0) + len(ids)
+        if not dry_run:
+            move_to_sorted(session, ids, category_id, importance_level)
+    return summary
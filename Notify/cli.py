@@ -1,46 +1,27 @@
-from selenium.common.exceptions import WebDriverException, TimeoutException
-from scraper import setup_driver, login_to_linkedin, fetch_notifications
-from database_setup import Unsorted, Sorted, setup_database, Category
-from sqlalchemy import func
-from sqlalchemy.exc import SQLAlchemyError
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.table import Table
 import os
 import sys
-from utils import (
-    session_scope,
-    prompt_for_integer_input,
-    prompt_for_importance_level,
-    prompt_for_note,
-    display_notifications
-)
+import threading
+import profiling
 
-console = Console()
+# Startup: only rich is imported up front, so the splash screen and main menu show up at once.
+# SQLAlchemy and the modules built on it are imported on a background thread meanwhile (see
+# start_loading_database), and every menu action imports what it uses itself; by the time the
+# user has picked an option the imports are done, and if not, the import just waits for them.
+# Selenium (scraper, driver_manager, accounts) and numpy (classifier, duplicates) are only loaded
+# by the actions that need them.
 
-def reset_table_sequencing():
-    '''
-    This function resets the order of the notification IDs in the database.
-    Example.  When the first item of one of our 3 tables is moved/deleted/altered, this will leave a gap in the ID order.
-    this function will then reorder the IDs so that they are sequential IN THEIR RESPECTIVE TABLES.
-    '''
-    with session_scope() as session:
-        unsorted_notifications = session.query(Unsorted).all()
-        sorted_notifications = session.query(Sorted).all()
-        categories = session.query(Category).all()
-        
-        for idx, notification in enumerate(unsorted_notifications, start=1):
-            notification.id = idx
-        for idx, notification in enumerate(sorted_notifications, start=1):
-            notification.id = idx
-        for idx, category in enumerate(categories, start=1):
-            category.id = idx
-        session.commit()
-        console.print("[bold green]Table sequencing reset successfully.[/]")
+console = Console()
 
 def add_category():
     '''
     Add a new category to the database.
     '''
+    from database_setup import Category
+    from utils import session_scope
+
     category_name = console.input("[bold green]Enter the name of the category:[/] ")
     with session_scope() as session:
         new_category = Category(name=category_name)
@@ -50,44 +31,37 @@ def add_category():
         press_any_key_to_continue()
 
 def remove_category():
-    #console.print all categories and their ids
+    from database_setup import Category
+    from queries import get_by_ordinal, category_counts
+    from operations import move_to_unsorted
+    from utils import session_scope, prompt_for_integer_input
+
+    #console.print all categories and their display numbers
     with session_scope() as session:
-        category_notification_count = session.query(Sorted.category_id, func.count(Sorted.category_id)).group_by(Sorted.category_id).all() # category_notification_count is a list of tuples: [(category_id, count), ...]
-        categories = session.query(Category).all()
+        categories = category_counts(session) # list of tuples: [(category, notification count), ...]
         if not categories:
             console.print("[bold red]No categories found.[/]")
             return
-        for category in categories:
-            console.print(f"ID: {category.id}, Name: {category.name} - {next((count for cat_id, count in category_notification_count if cat_id == category.id), 0)} notifications") # this 
-    category_id = prompt_for_integer_input("[bold green]Enter the ID of the category to remove:[/] ")
-    category_to_remove = session.query(Category).filter_by(id=category_id).first()
-    if not category_to_remove:
-        console.print("[bold red]Category not found.[/]")
-        return
-    affected_notifications = session.query(Sorted).filter_by(category_id=category_id).count()
-    console.print(f"[bold yellow]This will affect {affected_notifications} notifications. They will be moved back to unsorted[/]")
-    confirm = console.input("[bold red]Are you sure you want to remove this category? (y/n):[/] ")
-    if confirm.lower() == 'y':
-        affected = session.query(Sorted).filter_by(category_id=category_id).all()
-        for notification in affected:
-            unsorted_notification = Unsorted(
-                title=notification.title,
-                content=notification.content
-            )
-            session.add(unsorted_notification)
-            session.delete(notification)
-        
-        session.delete(category_to_remove)
-        session.commit()
-        reset_table_sequencing()
-        for notification in session.query(Sorted).all():
-            if notification.category_id > category_id:
-                notification.category_id -= 1
-        session.commit()
-        console.print(f"[bold green]Category '{category_to_remove.name}' removed successfully.[/]")
-        press_any_key_to_continue()
-    else:
-        console.print("Category removal cancelled.")
+        for idx, (category, count) in enumerate(categories, start=1):
+            console.print(f"#{idx}, Name: {category.name} - {count} notifications")
+        category_number = prompt_for_integer_input("[bold green]Enter the # of the category to remove:[/] ")
+        category_to_remove = get_by_ordinal(session, Category, category_number)
+        if not category_to_remove:
+            console.print("[bold red]Category not found.[/]")
+            return
+        category_name = category_to_remove.name
+        affected_notifications = categories[category_number - 1][1]
+        console.print(f"[bold yellow]This will affect {affected_notifications} notifications. They will be moved back to unsorted[/]")
+        confirm = console.input("[bold red]Are you sure you want to remove this category? (y/n):[/] ")
+        if confirm.lower() == 'y':
+            # one INSERT ... SELECT and one DELETE, however many notifications the category holds
+            move_to_unsorted(session, category_id=category_to_remove.id)
+            session.delete(category_to_remove)
+            session.commit()
+            console.print(f"[bold green]Category '{category_name}' removed successfully.[/]")
+            press_any_key_to_continue()
+        else:
+            console.print("Category removal cancelled.")
     # the commented code below is the original code for removing a category by name.
     # category_name = console.input("[bold green]Enter the name of the category to remove:[/] ")
     # with session_scope() as session:
@@ -108,7 +82,6 @@ def remove_category():
                 
     #             session.delete(category)
     #             session.commit()
-    #             reset_table_sequencing()
     #             console.print(f"[bold green]Category '{category_name}' removed successfully.[/]")
     #         else:
     #             console.print("Category removal cancelled.")
@@ -168,17 +141,20 @@ def display_notifications_menu():
              --------------------------------------------------------------------------------------------
             | 1. Display Unsorted Notifications -- View notifications that have not been categorized yet.|
             | 2. Display Sorted Notifications -- View notifications that have been categorized.          |
-            | 3. Go Back                                                                                 |
+            | 3. Search Notifications -- Find notifications by words in their title, content or note.    |
+            | 4. Go Back                                                                                 |
              --------------------------------------------------------------------------------------------
             """
     console.print(menu, style="bold yellow")
     choice = Prompt.ask("[bold green]Enter choice[/bold green]",
-                        choices=["1", "2", "3"], default="1")
+                        choices=["1", "2", "3", "4"], default="1")
     if choice == "1":
         display_unsorted_notifications()
     elif choice == "2":
         display_sorted_notifications()
     elif choice == "3":
+        search_notifications_cli()
+    elif choice == "4":
         return
 
 def modify_notifications_menu():
@@ -197,12 +173,14 @@ def modify_notifications_menu():
         | 3. Delete Notifications -- Delete notifications from either the unsorted or sorted list.|
         | 4. Add Category -- Add a new category.                                                  |
         | 5. Remove Category -- Remove a category.                                                |
-        | 6. Go Back                                                                              |    
+        | 6. Auto-Categorize -- Apply the saved rules to every unsorted notification.             |
+        | 7. Near-Duplicates -- Categorize or delete a whole cluster of similar notifications.    |
+        | 8. Go Back                                                                              |    
          -----------------------------------------------------------------------------------------
         """
     console.print(menu, style="bold yellow")
     choice = Prompt.ask("[bold green]Enter choice[/bold green]",
-                        choices=["1", "2", "3", "4", "5", "6"], default="1")
+                        choices=["1", "2", "3", "4", "5", "6", "7", "8"], default="1")
     if choice == "1":
         categorize_notifications_cli()
     elif choice == "2":
@@ -214,6 +192,10 @@ def modify_notifications_menu():
     elif choice == "5":
         remove_category()
     elif choice == "6":
+        auto_categorize_cli()
+    elif choice == "7":
+        near_duplicates_cli()
+    elif choice == "8":
         return
 
 def delete_notifications_menu():
@@ -251,78 +233,179 @@ def delete_notifications_menu():
 def fetch_notifications_cli():
     '''
     Fetch notifications from LinkedIn via scraper and save them to the database.
+    The browser is kept warm between fetches and only asks for credentials when its saved session has expired.
+    When accounts are configured (see accounts.py), they can all be fetched at once instead.
     '''
-    email = console.input("[bold green]Enter your LinkedIn email:[/] ")
-    password = console.input(
-        "[bold green]Enter your LinkedIn password (input will be hidden):[/]", password=True)
-    driver = None
+    from selenium.common.exceptions import WebDriverException, TimeoutException
+    from scraper import login_to_linkedin, fetch_notifications
+    from driver_manager import drivers, is_logged_in
+    from accounts import load_accounts
+    import config
+
     try:
-        driver = setup_driver()
-        login_success = login_to_linkedin(driver, email, password)
-        if login_success:
-            console.print("[bold green]Logged in successfully.[/]")
-            fetch_notifications(driver)
+        accounts = load_accounts()
+    except (ValueError, KeyError, TypeError) as e:  # json.JSONDecodeError is a ValueError
+        console.print(f"[bold red]Invalid accounts file {config.ACCOUNTS_FILE}: {e}[/]")
+        return
+    if accounts and console.input(
+            f"[bold green]Fetch all {len(accounts)} configured accounts at once? (y/n):[/] ").lower() == 'y':
+        fetch_accounts_cli(accounts)
+        return
+    try:
+        driver = drivers.get()
+        if is_logged_in(driver):
+            console.print("[bold green]Using saved LinkedIn session.[/]")
         else:
-            console.print(
-                "[bold red]Login failed. Please check your credentials.[/]")
+            email = console.input("[bold green]Enter your LinkedIn email:[/] ")
+            password = console.input(
+                "[bold green]Enter your LinkedIn password (input will be hidden):[/]", password=True)
+            if not login_to_linkedin(driver, email, password):
+                console.print(
+                    "[bold red]Login failed. Please check your credentials.[/]")
+                return
+            console.print("[bold green]Logged in successfully.[/]")
+        fetch_notifications(driver, account_id=config.DEFAULT_ACCOUNT)
     except TimeoutException:
         console.print(
             "[bold red]Timeout occurred while trying to access LinkedIn.[/]")
     except WebDriverException as e:
         console.print(f"[bold red]Web driver error occurred: {e}[/]")
+        drivers.discard()
     except Exception as e:
         console.print(f"[bold red]An unexpected error occurred: {e}[/]")
-    finally:
-        if driver:
-            driver.quit()
+
+def fetch_accounts_cli(accounts):
+    '''Fetches the configured accounts concurrently and shows how each one (and each worker) did.'''
+    from accounts import fetch_accounts
+
+    results, by_worker, elapsed = fetch_accounts(accounts)
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Account", "Worker", "Items", "New", "Seconds", "Items/s", "Result"):
+        table.add_column(column)
+    for result in results:
+        table.add_row(result["account"], result["worker"], str(result["items"]), str(result["saved"]),
+                      f"{result['seconds']:.1f}", f"{result['items_per_sec']:.1f}",
+                      f"[red]{result['error']}[/]" if result["error"] else result["stop_reason"] or "")
+    console.print(table)
+    for name, worker in by_worker.items():
+        console.print(f"{name}: {worker['accounts']} account(s), {worker['items_per_sec']:.1f} items/s")
+    console.print(f"[bold green]{len(results)} accounts fetched in {elapsed:.1f}s.[/]")
+    press_any_key_to_continue()
 
 def display_sorted_notifications():
     '''helper function to display sorted notifications.'''
+    from database_setup import Sorted
+    from queries import iter_pages, SORTED_LOAD_OPTIONS
+    from utils import session_scope, page_notifications
+
     with session_scope() as session:
-        notifications = session.query(Sorted).all()
-        display_notifications(notifications, sorted=True)
+        page_notifications(iter_pages(session, Sorted, page_size=10, options=SORTED_LOAD_OPTIONS), sorted=True)
 
 def display_unsorted_notifications():
     '''helper function to display unsorted notifications.'''
+    from database_setup import Unsorted
+    from queries import iter_pages
+    from utils import session_scope, page_notifications
+
     with session_scope() as session:
-        notifications = session.query(Unsorted).all()
-        display_notifications(notifications)
+        page_notifications(iter_pages(session, Unsorted, page_size=10))
+
+def search_notifications_cli():
+    '''Prompts for search words and shows the best-matching notifications from both lists.'''
+    from search import search
+    from utils import session_scope
+
+    query = console.input("[bold green]Search for (end a word with * to match its prefix):[/] ")
+    with session_scope() as session:
+        results = search(session, query)
+    if not results:
+        console.print("[bold red]No matching notifications.[/]")
+        return
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("List")
+    table.add_column("ID", style="dim", width=8)
+    table.add_column("Title")
+    table.add_column("Match", overflow="fold")
+    for result in results:
+        table.add_row(result["kind"], str(result["id"]), result["title"], result["snippet"])
+    console.print(table)
+    press_any_key_to_continue()
+
+def load_classifier(session):
+    '''
+    The suggestion model (see classifier.py) updated with the latest sorting, or None when numpy
+    isn't installed or there aren't enough sorted notifications to learn from yet.
+    '''
+    from classifier import update_classifier
+
+    try:
+        model, _ = update_classifier(session)
+    except RuntimeError:
+        return None
+    return model if model.ready else None
 
 def categorize_notifications_cli():
     '''
     Categorize unsorted notifications and save them to the database.
     This also removes the categorized notifications from the unsorted list while adding them to the sorted list.
     '''
+    from classifier import suggest, confidence
+    from database_setup import Unsorted, Category
+    from queries import keyset_page
+    from operations import move_to_sorted
+    from utils import (session_scope, prompt_for_integer_input, prompt_for_importance_level, prompt_for_note,
+                       parse_selection, display_notifications)
+
     with session_scope() as session:
-        offset = 0 # offset for pagination
+        after_id = None # keyset cursor for pagination: id of the last notification on the previous page
         batch_size = 5  # amount of notifications to display at a time
+        model = load_classifier(session) # suggests a category for each notification, None until it has learned enough
         while True:
             # Fetch a batch of unsorted notifications
-            unsorted_notifications = session.query(Unsorted).offset(offset).limit(batch_size).all()
+            unsorted_notifications = keyset_page(session, Unsorted, after_id, batch_size)
             if not unsorted_notifications:
                 console.print("[bold red]No more unsorted notifications to display.[/]")
                 break
 
             # Display the notifications using the utility function
             display_notifications(unsorted_notifications)
+            suggestions = suggest(session, model, unsorted_notifications) if model else []
+            if suggestions:
+                category_names = {category.id: category.name for category in session.query(Category)}
+                for number, suggestion in enumerate(suggestions, start=1):
+                    console.print(f"Suggested for #{number}: {category_names[suggestion.category_id]}, "
+                                  f"importance {suggestion.importance_level} ({confidence(suggestion):.0%} sure)")
 
             # Prompt the user for a choice
-            console.print("[bold green]Enter the number of the notification to categorize, 'n' for next page, or 'm' to return to Main Menu:[/]")
-            choices = [str(i) for i in range(1, len(unsorted_notifications) + 1)] + ['n', 'm']
-            choice = Prompt.ask("", choices=choices)
+            console.print("[bold green]Enter the number(s) of the notifications to categorize (e.g. 1,3-5 or 'all'), "
+                          + ("'s' to accept the suggestions, " if suggestions else "")
+                          + "'n' for next page, or 'm' to return to Main Menu:[/]")
+            choice = console.input("").strip().lower()
 
             # Handle pagination and returning to the main menu
-            if choice.lower() == 'n':
-                offset += batch_size
+            if choice == 'n':
+                after_id = unsorted_notifications[-1].id
                 continue
-            elif choice.lower() == 'm':
+            elif choice == 'm':
                 break
+            elif choice == 's' and suggestions:
+                moves = {} # (category id, importance level) -> ids, so each suggestion is one set-based move
+                for notification, suggestion in zip(unsorted_notifications, suggestions):
+                    moves.setdefault((suggestion.category_id, suggestion.importance_level), []).append(notification.id)
+                moved = sum(move_to_sorted(session, ids, category_id, importance_level)
+                            for (category_id, importance_level), ids in moves.items())
+                session.commit()
+                console.print(f"[bold green]{moved} notification(s) categorized as suggested.[/]")
+                continue
 
-            # At this point, choice should be a notification number, so we can proceed to categorize
-            selected_index = int(choice) - 1
-            selected_notification = unsorted_notifications[selected_index]
+            # At this point, choice should be a selection of notification numbers, so we can proceed to categorize
+            selection = parse_selection(choice, len(unsorted_notifications))
+            if not selection:
+                console.print("[bold red]Invalid selection. Please try again.[/]")
+                continue
+            selected_ids = [unsorted_notifications[number - 1].id for number in selection]
 
-            # Categorize the notification
+            # Categorize the notifications
             categories = session.query(Category).all()
             if not categories:
                 console.print("[bold red]No categories found. Please add a category first.[/]")
@@ -339,32 +422,106 @@ def categorize_notifications_cli():
             importance_level = prompt_for_importance_level()
             note = prompt_for_note()
 
-            # Create a new Sorted instance and update the database
-            sorted_notification = Sorted(
-                title=selected_notification.title,
-                content=selected_notification.content,
-                category_id=selected_category.id,
-                importance_level=importance_level,
-                note=note,
-                notification_id=selected_notification.id
-            )
-            session.add(sorted_notification)
-            session.delete(selected_notification)
+            # Move the selected notifications to the sorted table in one set-based step
+            moved = move_to_sorted(session, selected_ids, selected_category.id, importance_level, note)
             session.commit()
-            reset_table_sequencing()
-            console.print("[bold green]Notification categorized successfully.[/]")
+            console.print(f"[bold green]{moved} notification(s) categorized successfully.[/]")
             press_any_key_to_continue()
 
+def auto_categorize_cli():
+    '''
+    Applies the saved rules (see rules.py, managed with `python cli.py rules ...`) to the whole
+    unsorted list after showing what would be moved.
+    '''
+    from rules import apply_rules
+    from utils import session_scope
+
+    with session_scope() as session:
+        preview = apply_rules(session, dry_run=True)
+        if not preview:
+            console.print("[bold red]No unsorted notifications match the saved rules.[/]")
+            return
+        for category_name, count in preview.items():
+            console.print(f"{category_name}: {count} notifications")
+        confirm = console.input("[bold green]Move these notifications? (y/n):[/] ")
+        if confirm.lower() != 'y':
+            console.print("Auto-categorization cancelled.")
+            return
+        moved = apply_rules(session)
+        session.commit()
+        console.print(f"[bold green]{sum(moved.values())} notifications categorized successfully.[/]")
+        press_any_key_to_continue()
+
+def near_duplicates_cli():
+    '''
+    Lists clusters of near-identical unsorted notifications (see duplicates.py) and categorizes or
+    deletes a chosen cluster as a whole.
+    '''
+    from duplicates import find_clusters
+    from database_setup import Unsorted, Category
+    from operations import move_to_sorted, delete_notifications
+    from utils import (session_scope, prompt_for_integer_input, prompt_for_importance_level, prompt_for_note,
+                       display_notifications)
+
+    with session_scope() as session:
+        try:
+            clusters = find_clusters(session)
+        except RuntimeError as e:
+            console.print(f"[bold red]{e}[/]")
+            return
+        if not clusters:
+            console.print("[bold red]No near-duplicate notifications found.[/]")
+            return
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("#", width=6)
+        table.add_column("Size", width=6)
+        table.add_column("Example", overflow="fold")
+        for number, cluster in enumerate(clusters[:20], start=1):
+            example = session.get(Unsorted, cluster[0])
+            table.add_row(str(number), str(len(cluster)), example.content[:120])
+        console.print(table)
+        number = prompt_for_integer_input("[bold green]Enter the # of the cluster (0 to go back):[/] ")
+        if not (1 <= number <= min(len(clusters), 20)):
+            return
+        cluster = clusters[number - 1]
+        display_notifications(session.query(Unsorted).filter(Unsorted.id.in_(cluster)).order_by(Unsorted.id).all())
+        action = console.input(f"[bold green]'c' to categorize all {len(cluster)}, 'd' to delete all {len(cluster)}, or any other key to go back:[/] ").strip().lower()
+        if action == 'c':
+            categories = session.query(Category).all()
+            for idx, category in enumerate(categories, start=1):
+                console.print(f"{idx}. {category.name}")
+            category_index = prompt_for_integer_input("select the category number: ")
+            if not (1 <= category_index <= len(categories)):
+                console.print("[bold red]Invalid category number.[/]")
+                return
+            moved = move_to_sorted(session, cluster, categories[category_index - 1].id,
+                                   prompt_for_importance_level(), prompt_for_note())
+            session.commit()
+            console.print(f"[bold green]{moved} notification(s) categorized successfully.[/]")
+        elif action == 'd':
+            confirm = console.input(f"[bold red]Delete these {len(cluster)} notifications? (y/n):[/] ")
+            if confirm.lower() != 'y':
+                console.print("Deletion cancelled.")
+                return
+            deleted = delete_notifications(session, Unsorted, cluster)
+            session.commit()
+            console.print(f"[bold green]{deleted} notification(s) deleted successfully.[/]")
+        else:
+            return
+        press_any_key_to_continue()
+
 def update_notes_cli():
     '''
     Update the user's custom notes for sorted notifications and save them to the database.
     '''
+    from database_setup import Sorted
+    from queries import keyset_page
+    from utils import session_scope, prompt_for_note
+
     with session_scope() as session:
-        offset = 0
         batch_size = 5
         while True:
-            sorted_notifications = session.query(
-                Sorted).offset(offset).limit(batch_size).all()
+            sorted_notifications = keyset_page(session, Sorted, limit=batch_size)
             if not sorted_notifications:
                 console.print("[bold red]No more notifications to display.[/]")
                 break
@@ -403,30 +560,43 @@ def update_notes_cli():
 def delete_notification_cli(sorted=False):
     '''
     Delete a notification from the database.
-    or to delete all unsorted notifications.
+    Shows the notifications a page at a time (keyset pagination, so the cost doesn't grow with the table).
     '''
+    from sqlalchemy.exc import SQLAlchemyError
+    from database_setup import Unsorted, Sorted
+    from queries import keyset_page
+    from utils import session_scope
+
+    model = Sorted if sorted else Unsorted
     with session_scope() as session:
         try:
-            if sorted:
-                notifications = session.query(Sorted).all()
-            else:
-                notifications = session.query(Unsorted).all()
-            if not notifications:
-                console.print("[bold red]No notifications to delete.[/]")
-                return
-            for notification in notifications:
-                console.print(f"ID: {notification.id}, Title: {notification.title}")
-            notification_id = prompt_for_integer_input("[bold green]Enter the ID of the notification to delete:[/] ")
-            notification_to_delete = session.query(
-                Sorted if sorted else Unsorted).filter_by(id=notification_id).first()
-            if not notification_to_delete:
-                console.print("Notification not found.", style="bold red")
+            after_id = None # keyset cursor: id of the last notification on the previous page
+            first_number = 1 # the # shown for the first notification on the page
+            page_size = 10
+            while True:
+                notifications = keyset_page(session, model, after_id, page_size)
+                if not notifications:
+                    console.print("[bold red]No " + ("more " if after_id else "") + "notifications to delete.[/]")
+                    return
+                for idx, notification in enumerate(notifications, start=first_number):
+                    console.print(f"#{idx}, Title: {notification.title}")
+                console.print("[bold green]Enter the # of the notification to delete, 'n' for next page, "
+                              "or 'm' to return to Main Menu:[/]")
+                choice = console.input("").strip().lower()
+                if choice == 'n':
+                    after_id = notifications[-1].id
+                    first_number += len(notifications)
+                    continue
+                if choice == 'm':
+                    return
+                if not choice.isdigit() or not 0 <= int(choice) - first_number < len(notifications):
+                    console.print("Notification not found.", style="bold red")
+                    continue
+                session.delete(notifications[int(choice) - first_number])
+                session.commit()
+                console.print("Notification deleted successfully.", style="bold green")
+                press_any_key_to_continue()
                 return
-            session.delete(notification_to_delete)
-            session.commit()
-            reset_table_sequencing()
-            press_any_key_to_continue()
-            console.print("Notification deleted successfully.",style="bold green")
         except SQLAlchemyError as e:
             console.print(f"An error occurred: {e}", style="bold red")
         except Exception as e:
@@ -435,9 +605,14 @@ def delete_notification_cli(sorted=False):
 def delete_all_unsorted_notifications():
     '''helper function to delete all unsorted notifications.
     used in the delete_notifications_menu function.'''
+    from sqlalchemy.exc import SQLAlchemyError
+    from database_setup import Unsorted
+    from operations import delete_all_notifications
+    from utils import session_scope
+
     with session_scope() as session:
         try:
-            session.query(Unsorted).delete()
+            delete_all_notifications(session, Unsorted)
             session.commit()
             press_any_key_to_continue()
             console.print("[bold green]All unsorted notifications deleted successfully.[/]")
@@ -448,23 +623,56 @@ def delete_all_unsorted_notifications():
 
 def delete_all_sorted_notifications():
     '''helper function to delete all sorted notifications. used in the delete_notifications_menu function.'''
+    from sqlalchemy.exc import SQLAlchemyError
+    from database_setup import Sorted
+    from operations import delete_all_notifications
+    from utils import session_scope
+
     with session_scope() as session:
         try:
-            session.query(Sorted).delete()
+            delete_all_notifications(session, Sorted)
             session.commit()
-            press_any_key_to_continue
+            press_any_key_to_continue()
             console.print("[bold green]All sorted notifications deleted successfully.[/]")
         except SQLAlchemyError as e:
             console.print(f"An error occurred: {e}", style="bold red")
         except Exception as e:
             console.print(f"An error occurred: {e}", style="bold red")
 
+_database_loader = None
+
+def _load_database():
+    # the modules nearly every menu action uses; importing them here leaves them in sys.modules
+    import database_setup, queries, operations, utils
+
+def start_loading_database():
+    '''Imports the database modules on a background thread while the splash screen and menu are shown.'''
+    global _database_loader
+    _database_loader = threading.Thread(target=_load_database, name="load-database", daemon=True)
+    _database_loader.start()
+
+def wait_for_database():
+    '''Waits for the background imports and makes sure the database is set up (once).'''
+    global _database_loader
+    if _database_loader is None:
+        return
+    _database_loader.join()
+    _database_loader = None
+    from database_setup import setup_database
+    setup_database()  # Ensure the database is setup (skipped when its schema is already current)
+
 def main():
-    setup_database()  # Ensure the database is setup
+    argv = profiling.enable_from_environment(sys.argv[1:]) # NOTIFY_PROFILE=1 or --profile times everything (see profiling.py)
+    if argv: # Subcommands (fetch, list, categorize, ...) run without any prompts
+        from commands import main as run_command
+        sys.exit(run_command(argv))
+    start_loading_database()
     os.system('clear') # Clear the console so that the splash screen is displayed cleanly
     display_splash_screen() # Display the splash screen
     while True:
         choice = main_menu()
+        if choice in ("1", "2", "3"):
+            wait_for_database()
         if choice == "1":
             display_notifications_menu()
         elif choice == "2":
@@ -0,0 +1,558 @@
+# commands.py
+import argparse
+import json
+import os
+import re
+import sys
+from contextlib import redirect_stdout
+from database_setup import Category, Unsorted, Sorted, setup_database
+from queries import keyset_page, SORTED_LOAD_OPTIONS
+from utils import session_scope
+import config
+import operations
+import profiling
+import retention
+import rules
+import search
+import stats
+import transfer
+
+# Non-interactive subcommands for cron jobs and scripts, e.g.
+#   python cli.py fetch --max-items 200
+#   python cli.py fetch --accounts --workers 4
+#   python cli.py fetch --source html --pages saved/*.html
+#   python cli.py fetch --source synthetic --count 10000 --rate 500
+#   python cli.py list --sorted --limit 20
+#   python cli.py categorize --rule "hiring|job" --category Work --importance 4
+#   python cli.py delete --ids 3 7 11
+#   python cli.py delete --sorted --older-than 90d --archive old.jsonl.gz
+#   python cli.py vacuum
+#   python cli.py export --sorted > sorted.jsonl
+#   python cli.py export --table sorted --output sorted.parquet
+#   python cli.py import sorted.parquet --table sorted
+#   python cli.py search "python dev*" --category Work
+#   python cli.py rules add keyword "hiring" --category Work --importance 4
+#   python cli.py rules apply
+#   python cli.py classify suggest --limit 20
+#   python cli.py duplicates list
+#   python cli.py duplicates categorize 42 --category Social --importance 1
+#   python cli.py classify accept --threshold 0.95
+#   python cli.py stats
+# Results are written to stdout as JSON lines; progress messages and errors go to stderr.
+
+
+def regex(value):
+    '''argparse type that rejects patterns that are not valid regular expressions.'''
+    try:
+        re.compile(value)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"invalid regex {value!r}: {e}")
+    return value
+
+
+def age(value):
+    '''argparse type for ages such as 90d, 12h or 2w.'''
+    try:
+        return retention.parse_age(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def emit(obj):
+    '''Writes one JSON line to stdout.'''
+    sys.stdout.write(json.dumps(obj, default=str) + "\n")
+
+
+def error(message):
+    '''Writes an error message to stderr and returns the failing exit status.'''
+    sys.stderr.write(f"error: {message}\n")
+    return 1
+
+
+def cmd_fetch(args):
+    if args.source != "linkedin":
+        return cmd_fetch_offline(args)
+    if args.accounts is not None:
+        return cmd_fetch_accounts(args)
+    # scraping pulls in selenium, so only load it when a fetch actually runs
+    from selenium.common.exceptions import WebDriverException, TimeoutException
+    from driver_manager import drivers, is_logged_in
+    from scraper import login_to_linkedin, fetch_notifications
+
+    try:
+        with redirect_stdout(sys.stderr):  # keep the scraper's progress output off stdout
+            driver = drivers.get(args.profile)
+            if not is_logged_in(driver):
+                email, password = os.environ.get("NOTIFY_EMAIL"), os.environ.get("NOTIFY_PASSWORD")
+                if not (email and password):
+                    return error("LinkedIn session expired; set NOTIFY_EMAIL and NOTIFY_PASSWORD to log in.")
+                if not login_to_linkedin(driver, email, password):
+                    return error("LinkedIn login failed.")
+            stats = fetch_notifications(driver, max_items=args.max_items, since_last_seen=args.since_last_seen,
+                                        account_id=args.profile)
+    except TimeoutException as e:
+        return error(f"Timed out loading LinkedIn: {e}")
+    except WebDriverException as e:
+        drivers.discard(args.profile)  # don't hand the broken browser to the next fetch
+        return error(str(e))
+    if stats is None:
+        return error("Failed to load notifications.")
+    emit({
+        "items": stats.items,
+        "saved": stats.saved,
+        "scrolls": stats.scrolls,
+        "seconds_waiting": round(stats.time_waiting, 3),
+        "stop_reason": stats.stop_reason,
+    })
+    return 0
+
+
+def cmd_fetch_offline(args):
+    from pipeline import ingest_source
+    import sources
+
+    if args.source == "html":
+        if not args.pages:
+            return error("--source html needs --pages.")
+        source = sources.HtmlSource(args.pages)
+    else:
+        source = sources.SyntheticSource(count=args.count, rate=args.rate, first=args.first)
+    try:
+        with source:
+            writer, stop_reason = ingest_source(source, max_items=args.max_items, since_last_seen=args.since_last_seen)
+    except sources.SourceError as e:
+        return error(str(e))
+    emit({
+        "source": source.name,
+        "items": writer.received,
+        "saved": writer.inserted,
+        "writes": writer.writes,
+        "seconds_writing": round(writer.time_writing, 3),
+        "stop_reason": stop_reason or source.stop_reason,
+    })
+    return 0
+
+
+def cmd_fetch_accounts(args):
+    import accounts  # pulls in selenium too
+
+    try:
+        configured = accounts.load_accounts()
+    except (ValueError, KeyError, TypeError) as e:  # json.JSONDecodeError is a ValueError
+        return error(f"Invalid accounts file {config.ACCOUNTS_FILE}: {e}")
+    if args.accounts:
+        unknown = set(args.accounts) - {account.name for account in configured}
+        if unknown:
+            return error(f"Unknown account(s): {', '.join(sorted(unknown))}")
+        configured = [account for account in configured if account.name in args.accounts]
+    if not configured:
+        return error(f"No accounts configured in {config.ACCOUNTS_FILE}.")
+    with redirect_stdout(sys.stderr):
+        results, by_worker, elapsed = accounts.fetch_accounts(configured, workers=args.workers, max_items=args.max_items)
+    for result in results:
+        emit({**result, "seconds": round(result["seconds"], 3), "items_per_sec": round(result["items_per_sec"], 2)})
+    emit({
+        "accounts": len(results),
+        "failed": sum(1 for result in results if result["error"]),
+        "items": sum(result["items"] for result in results),
+        "saved": sum(result["saved"] for result in results),
+        "seconds": round(elapsed, 3),
+        "by_worker": {name: {**worker, "seconds": round(worker["seconds"], 3),
+                             "items_per_sec": round(worker["items_per_sec"], 2)}
+                      for name, worker in by_worker.items()},
+    })
+    return 1 if any(result["error"] for result in results) else 0
+
+
+def cmd_list(args):
+    model = Sorted if args.sorted else Unsorted
+    with session_scope() as session:
+        options = SORTED_LOAD_OPTIONS if args.sorted else ()
+        for notification in keyset_page(session, model, args.after_id, args.limit, options):
+            emit(operations.notification_to_dict(notification))
+    return 0
+
+
+def cmd_categorize(args):
+    with session_scope() as session:
+        category = operations.find_category(session, args.category)
+        if category is None:
+            return error(f"Category '{args.category}' not found.")
+        if args.ids:
+            moved = operations.move_to_sorted(session, args.ids, category.id, args.importance, args.note)
+        else:
+            moved = operations.categorize_matching(session, args.rule, category.id, args.importance, args.note)
+        category_name = category.name
+    emit({"moved": moved, "category": category_name})
+    return 0
+
+
+def cmd_delete(args):
+    model = Sorted if args.sorted else Unsorted
+    if args.older_than is not None:
+        # chunked, one short transaction per chunk, then hand the freed pages back
+        deleted = retention.purge_older_than(model, args.older_than, archive_path=args.archive)
+        emit({"deleted": deleted, "table": model.__tablename__, "archive": args.archive,
+              "pages_freed": retention.reclaim_space() if deleted else 0})
+        return 0
+    if args.archive:
+        return error("--archive only works with --older-than.")
+    with session_scope() as session:
+        if args.all:
+            deleted = operations.delete_all_notifications(session, model)
+        else:
+            deleted = operations.delete_notifications(session, model, args.ids)
+    emit({"deleted": deleted, "table": model.__tablename__})
+    return 0
+
+
+def cmd_vacuum(args):
+    # the one-off conversion rewrites the whole file under an exclusive lock, so it is never implicit
+    switched = retention.enable_incremental_vacuum()
+    emit({"switched_to_incremental": switched, "pages_freed": retention.reclaim_space()})
+    return 0
+
+
+def cmd_export(args):
+    table = args.table or ("sorted" if args.sorted else "unsorted")
+    fmt = args.format or transfer.format_for(args.output)
+    if fmt == "parquet" and not args.output:
+        return error("Parquet can't be written to stdout; use --output FILE.")
+    try:
+        with session_scope() as session:
+            if args.output:
+                with transfer.open_file(args.output, "wb") as out:
+                    written = transfer.export_table(session, table, out, fmt)
+            else:
+                written = transfer.export_table(session, table, sys.stdout.buffer, fmt)
+    except RuntimeError as e:
+        return error(str(e))
+    if args.output:  # stdout carries the rows themselves
+        emit({"exported": written, "table": table, "format": fmt, "output": args.output})
+    return 0
+
+
+def cmd_import(args):
+    fmt = args.format or transfer.format_for(args.file)
+    try:
+        # a failed load is rolled back as a whole; keep session_scope's report of it off stdout
+        with redirect_stdout(sys.stderr), session_scope() as session, transfer.open_file(args.file, "rb") as infile:
+            inserted = transfer.import_table(session, args.table, infile, fmt)
+    except (RuntimeError, ValueError, OSError) as e:
+        return error(str(e))
+    emit({"imported": inserted, "table": args.table, "format": fmt})
+    return 0
+
+
+def cmd_search(args):
+    with session_scope() as session:
+        category_id = None
+        if args.category is not None:
+            category = operations.find_category(session, args.category)
+            if category is None:
+                return error(f"Category '{args.category}' not found.")
+            category_id = category.id
+        for result in search.search(session, args.query, prefix=args.prefix, sorted_only=args.sorted,
+                                     category_id=category_id, importance_level=args.importance, limit=args.limit):
+            emit(result)
+    return 0
+
+
+def cmd_stats(args):
+    with session_scope() as session:
+        if args.rebuild:
+            stats.rebuild_stats(session.connection())
+        summary = stats.read_stats(session)
+        categories = []
+        for category in session.query(Category).order_by(Category.id):
+            by_importance = summary["by_category"].get(category.id, {})
+            categories.append({"category": category.name, "category_id": category.id, "count": sum(by_importance.values()),
+                               "by_importance": {str(level): by_importance.get(level, 0) for level in config.IMPORTANCE_LEVELS}})
+    last_fetched_at = summary["last_fetched_at"]
+    emit({"unsorted": summary["unsorted"], "sorted": summary["sorted"],
+          "last_fetched_at": last_fetched_at.isoformat() if last_fetched_at else None, "categories": categories})
+    return 0
+
+
+def cmd_rules_add(args):
+    with session_scope() as session:
+        category = operations.find_category(session, args.category)
+        if category is None:
+            return error(f"Category '{args.category}' not found.")
+        try:
+            rule = rules.add_rule(session, args.kind, args.pattern, category.id, args.importance, args.note)
+        except ValueError as e:
+            return error(str(e))
+        emit({"id": rule.id, "kind": rule.kind, "pattern": rule.pattern,
+              "category": category.name, "importance_level": rule.importance_level})
+    return 0
+
+
+def cmd_rules_list(args):
+    with session_scope() as session:
+        for rule in session.query(rules.Rule).order_by(rules.Rule.id):
+            emit({"id": rule.id, "kind": rule.kind, "pattern": rule.pattern, "category": rule.category.name,
+                  "importance_level": rule.importance_level, "note": rule.note})
+    return 0
+
+
+def cmd_rules_remove(args):
+    with session_scope() as session:
+        deleted = session.query(rules.Rule).filter(rules.Rule.id.in_(args.ids)).delete(synchronize_session=False)
+    emit({"deleted": deleted})
+    return 0
+
+
+def cmd_rules_apply(args):
+    with session_scope() as session:
+        moved = rules.apply_rules(session, dry_run=args.dry_run)
+    emit({"moved": sum(moved.values()), "by_category": moved, "dry_run": args.dry_run})
+    return 0
+
+
+def trained_classifier(rebuild=False):
+    '''The cached classifier, brought up to date. Returns (classifier, new examples) or an error message.'''
+    import classifier  # pulls in numpy
+
+    try:
+        with session_scope() as session:
+            model, new = classifier.update_classifier(session, rebuild=rebuild)
+    except RuntimeError as e:
+        return None, str(e)
+    if not model.ready:
+        return None, (f"Not enough sorted notifications to learn from yet "
+                      f"(need {config.CLASSIFIER_MIN_EXAMPLES} in at least two categories).")
+    return model, new
+
+
+def cmd_classify_train(args):
+    model, new = trained_classifier(rebuild=args.rebuild)
+    if model is None:
+        return error(new)
+    emit({"trained": new, "examples": model.examples, "categories": len(model.category.labels),
+          "model": config.CLASSIFIER_MODEL_FILE})
+    return 0
+
+
+def cmd_classify_suggest(args):
+    import classifier  # pulls in numpy
+
+    model, message = trained_classifier()
+    if model is None:
+        return error(message)
+    with session_scope() as session:
+        names = {category.id: category.name for category in session.query(Category)}
+        for (row, suggestion), _ in zip(classifier.suggest_backlog(session, model), range(args.limit)):
+            emit({"id": row.id, "title": row.title, "category": names[suggestion.category_id], **suggestion._asdict(),
+                  "confidence": classifier.confidence(suggestion)})
+    return 0
+
+
+def cmd_classify_accept(args):
+    import classifier  # pulls in numpy
+
+    model, message = trained_classifier()
+    if model is None:
+        return error(message)
+    with session_scope() as session:
+        moved = classifier.accept_suggestions(session, model, args.threshold, dry_run=args.dry_run)
+    emit({"moved": sum(moved.values()), "by_category": moved, "dry_run": args.dry_run})
+    return 0
+
+
+def cmd_duplicates_list(args):
+    import duplicates  # pulls in numpy
+
+    try:
+        with session_scope() as session:
+            clusters = duplicates.find_clusters(session, min_size=args.min_size)
+            for number, cluster in enumerate(clusters[:args.limit], start=1):
+                example = session.get(Unsorted, cluster[0])
+                emit({"cluster": number, "size": len(cluster), "ids": cluster,
+                      "title": example.title, "content": example.content})
+    except RuntimeError as e:
+        return error(str(e))
+    return 0
+
+
+def cmd_duplicates_categorize(args):
+    import duplicates  # pulls in numpy
+
+    try:
+        with session_scope() as session:
+            category = operations.find_category(session, args.category)
+            if category is None:
+                return error(f"Category '{args.category}' not found.")
+            cluster = duplicates.cluster_of(session, args.id)
+            if not cluster:
+                return error(f"Unsorted notification {args.id} not found.")
+            moved = operations.move_to_sorted(session, cluster, category.id, args.importance, args.note)
+            category_name = category.name
+    except RuntimeError as e:
+        return error(str(e))
+    emit({"moved": moved, "category": category_name, "ids": cluster})
+    return 0
+
+
+def cmd_duplicates_delete(args):
+    import duplicates  # pulls in numpy
+
+    try:
+        with session_scope() as session:
+            cluster = duplicates.cluster_of(session, args.id)
+            if not cluster:
+                return error(f"Unsorted notification {args.id} not found.")
+            deleted = operations.delete_notifications(session, Unsorted, cluster)
+    except RuntimeError as e:
+        return error(str(e))
+    emit({"deleted": deleted, "ids": cluster})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="notify", description="Notify This batch commands. Run without arguments for the interactive menu.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subcommands.add_parser("fetch", help="fetch new LinkedIn notifications")
+    fetch.add_argument("--max-items", type=int, help="stop after this many notifications")
+    fetch.add_argument("--since-last-seen", help="source id (data-urn) of the newest notification already saved")
+    fetch.add_argument("--profile", default=config.DEFAULT_ACCOUNT, help="browser profile holding the LinkedIn session")
+    fetch.add_argument("--accounts", nargs="*", metavar="NAME",
+                       help="fetch the accounts configured in the accounts file concurrently (all of them if no names are given)")
+    fetch.add_argument("--workers", type=int, help="with --accounts, how many browsers fetch at once")
+    fetch.add_argument("--source", choices=("linkedin", "html", "synthetic"), default="linkedin",
+                       help="where notifications come from: LinkedIn (default), saved pages or generated ones")
+    fetch.add_argument("--pages", nargs="+", metavar="PAGE",
+                       help="with --source html, saved notifications pages (files or URLs)")
+    fetch.add_argument("--count", type=int, default=1000, help="with --source synthetic, notifications to generate")
+    fetch.add_argument("--rate", type=float, help="with --source synthetic, notifications per second (default: unlimited)")
+    fetch.add_argument("--first", type=int, default=0,
+                       help="with --source synthetic, number of the first notification (a new range yields unseen ones)")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    list_ = subcommands.add_parser("list", help="list notifications as JSON lines")
+    list_.add_argument("--sorted", action="store_true", help="list sorted instead of unsorted notifications")
+    list_.add_argument("--limit", type=int, default=50)
+    list_.add_argument("--after-id", type=int, help="only list notifications with a larger id")
+    list_.set_defaults(handler=cmd_list)
+
+    categorize = subcommands.add_parser("categorize", help="move unsorted notifications into a category")
+    target = categorize.add_mutually_exclusive_group(required=True)
+    target.add_argument("--rule", type=regex, help="regex matched (case-insensitively) against title and content")
+    target.add_argument("--ids", type=int, nargs="+", help="ids of the unsorted notifications to move")
+    categorize.add_argument("--category", required=True, help="category name or id")
+    categorize.add_argument("--importance", type=int, required=True, choices=sorted(config.IMPORTANCE_LEVELS),
+                            help="importance level")
+    categorize.add_argument("--note", help="note stored with every moved notification")
+    categorize.set_defaults(handler=cmd_categorize)
+
+    delete = subcommands.add_parser("delete", help="delete notifications")
+    delete.add_argument("--sorted", action="store_true", help="delete from sorted instead of unsorted")
+    which = delete.add_mutually_exclusive_group(required=True)
+    which.add_argument("--ids", type=int, nargs="+", help="ids of the notifications to delete")
+    which.add_argument("--all", action="store_true", help="delete every notification in the table")
+    which.add_argument("--older-than", type=age, metavar="AGE",
+                       help="delete notifications fetched (or, with --sorted, categorized) longer ago than AGE, e.g. 90d")
+    delete.add_argument("--archive", metavar="FILE",
+                        help="with --older-than, also append the deleted rows to this gzip-compressed JSON-lines file")
+    delete.set_defaults(handler=cmd_delete)
+
+    vacuum = subcommands.add_parser("vacuum", help="hand free pages back to the OS, switching an older database "
+                                                   "to incremental auto_vacuum first (one full VACUUM, locks the database)")
+    vacuum.set_defaults(handler=cmd_vacuum)
+
+    export = subcommands.add_parser("export", help="stream a whole table to stdout or a file")
+    table = export.add_mutually_exclusive_group()
+    table.add_argument("--sorted", action="store_true", help="export sorted instead of unsorted notifications")
+    table.add_argument("--table", choices=list(transfer.TABLES), help="table to export (default: unsorted)")
+    export.add_argument("--format", choices=transfer.FORMATS,
+                        help="output format (default: from the --output file name, else jsonl)")
+    export.add_argument("--output", metavar="FILE", help="write to FILE instead of stdout; a .gz name compresses it")
+    export.set_defaults(handler=cmd_export)
+
+    import_ = subcommands.add_parser("import", help="bulk-load a file written by export")
+    import_.add_argument("file", help="JSON lines, CSV or Parquet file (optionally .gz)")
+    import_.add_argument("--table", required=True, choices=list(transfer.TABLES), help="table to load into")
+    import_.add_argument("--format", choices=transfer.FORMATS, help="input format (default: from the file name)")
+    import_.set_defaults(handler=cmd_import)
+
+    search_ = subcommands.add_parser("search", help="full-text search over titles, contents and notes")
+    search_.add_argument("query", help="words that must all appear; end a word with * for a prefix match")
+    search_.add_argument("--prefix", action="store_true", help="treat every word as a prefix")
+    search_.add_argument("--sorted", action="store_true", help="only search sorted notifications")
+    search_.add_argument("--category", help="only sorted notifications in this category (name or id)")
+    search_.add_argument("--importance", type=int, choices=sorted(config.IMPORTANCE_LEVELS),
+                         help="only sorted notifications with this importance level")
+    search_.add_argument("--limit", type=int, default=20)
+    search_.set_defaults(handler=cmd_search)
+
+    stats_ = subcommands.add_parser("stats", help="counts per category and importance level, backlog size and last fetch")
+    stats_.add_argument("--rebuild", action="store_true", help="recount the stats table from the notifications first")
+    stats_.set_defaults(handler=cmd_stats)
+
+    rules_ = subcommands.add_parser("rules", help="manage and apply auto-categorization rules")
+    rule_commands = rules_.add_subparsers(dest="rules_command", required=True)
+    rule_add = rule_commands.add_parser("add", help="save a new rule")
+    rule_add.add_argument("kind", choices=rules.RULE_KINDS,
+                          help="keyword: whole word in title/content, regex: regex in title/content, sender: regex on the title")
+    rule_add.add_argument("pattern")
+    rule_add.add_argument("--category", required=True, help="category name or id")
+    rule_add.add_argument("--importance", type=int, required=True, choices=sorted(config.IMPORTANCE_LEVELS))
+    rule_add.add_argument("--note", help="note stored with every notification the rule moves")
+    rule_add.set_defaults(handler=cmd_rules_add)
+    rule_list = rule_commands.add_parser("list", help="list saved rules")
+    rule_list.set_defaults(handler=cmd_rules_list)
+    rule_remove = rule_commands.add_parser("remove", help="delete saved rules")
+    rule_remove.add_argument("ids", type=int, nargs="+")
+    rule_remove.set_defaults(handler=cmd_rules_remove)
+    rule_apply = rule_commands.add_parser("apply", help="categorize the whole unsorted backlog with the saved rules")
+    rule_apply.add_argument("--dry-run", action="store_true", help="only report what would be moved")
+    rule_apply.set_defaults(handler=cmd_rules_apply)
+
+    classify = subcommands.add_parser("classify", help="suggest categories learned from past sorting")
+    classify_commands = classify.add_subparsers(dest="classify_command", required=True)
+    classify_train = classify_commands.add_parser("train", help="update the model with newly sorted notifications")
+    classify_train.add_argument("--rebuild", action="store_true", help="retrain from scratch on every sorted notification")
+    classify_train.set_defaults(handler=cmd_classify_train)
+    classify_suggest = classify_commands.add_parser("suggest", help="list suggestions for unsorted notifications")
+    classify_suggest.add_argument("--limit", type=int, default=50)
+    classify_suggest.set_defaults(handler=cmd_classify_suggest)
+    classify_accept = classify_commands.add_parser("accept", help="move notifications whose suggestion is sure enough")
+    classify_accept.add_argument("--threshold", type=float,
+                                 help=f"minimum confidence, 0-1 (default {config.CLASSIFIER_AUTO_ACCEPT})")
+    classify_accept.add_argument("--dry-run", action="store_true", help="only report what would be moved")
+    classify_accept.set_defaults(handler=cmd_classify_accept)
+
+    duplicates_ = subcommands.add_parser("duplicates", help="find near-duplicate unsorted notifications and act on whole clusters")
+    duplicate_commands = duplicates_.add_subparsers(dest="duplicates_command", required=True)
+    duplicate_list = duplicate_commands.add_parser("list", help="list clusters of near-duplicates, largest first")
+    duplicate_list.add_argument("--min-size", type=int, default=2, help="smallest cluster to list")
+    duplicate_list.add_argument("--limit", type=int, default=20)
+    duplicate_list.set_defaults(handler=cmd_duplicates_list)
+    duplicate_categorize = duplicate_commands.add_parser(
+        "categorize", help="move a notification and all its near-duplicates into a category")
+    duplicate_categorize.add_argument("id", type=int, help="id of any unsorted notification in the cluster")
+    duplicate_categorize.add_argument("--category", required=True, help="category name or id")
+    duplicate_categorize.add_argument("--importance", type=int, required=True, choices=sorted(config.IMPORTANCE_LEVELS))
+    duplicate_categorize.add_argument("--note", help="note stored with every moved notification")
+    duplicate_categorize.set_defaults(handler=cmd_duplicates_categorize)
+    duplicate_delete = duplicate_commands.add_parser("delete", help="delete a notification and all its near-duplicates")
+    duplicate_delete.add_argument("id", type=int, help="id of any unsorted notification in the cluster")
+    duplicate_delete.set_defaults(handler=cmd_duplicates_delete)
+
+    return parser
+
+
+def main(argv=None):
+    argv = profiling.enable_from_environment(sys.argv[1:] if argv is None else argv)
+    args = build_parser().parse_args(argv)
+    with redirect_stdout(sys.stderr):
+        with profiling.span("setup_database", "db"):
+            setup_database()
+    with profiling.span(f"command {args.command}", "app"):
+        return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
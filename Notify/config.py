@@ -1,7 +1,68 @@
 CHROME_DRIVER_PATH = "./chromedriver" # Path to the ChromeDriver executable
+HEADLESS = True # Set to False to watch the browser while it scrapes
+CHROME_PROFILE_DIR = "./chrome_profiles" # Persistent Chrome profiles (cookies) so logins survive restarts
+
+# How notifications are read off the page: "js" (one execute_script call for the whole page)
+# or "webdriver" (several WebDriver round trips per notification)
+EXTRACTION_MODE = "js"
+
+# Infinite-scroll loading (see scroller.py). After each scroll the scraper waits for new items
+# for SCROLL_TIMEOUT seconds; if none appear the wait is multiplied by SCROLL_BACKOFF and retried,
+# and the feed is considered fully loaded once a SCROLL_MAX_TIMEOUT wait comes back empty.
+SCROLL_TIMEOUT = 0.5
+SCROLL_BACKOFF = 2
+SCROLL_MAX_TIMEOUT = 4
+# Stop scrolling once this many consecutive notifications are already in the database
+KNOWN_RUN_LIMIT = 20
+# Multi-account fetching (see accounts.py): the accounts file, how many browsers fetch at once,
+# and the default per-account rate limit
+ACCOUNTS_FILE = "./accounts.json"
+FETCH_WORKERS = 3
+ACCOUNT_SCROLLS_PER_MINUTE = 30
+# Browser profile and account_id of a single-account fetch (the menu's, or `fetch` without
+# --accounts); reserved, so no configured account can share its session or its rows
+DEFAULT_ACCOUNT = "default"
+
+# Scraped batches buffered for the background database writer before scrolling waits on it
+INGEST_QUEUE_SIZE = 8
 
 DATABASE_URI = "sqlite:///notify_this.db"  # Example for SQLite, adjust for other DBMS if needed
 
+# Connection pool settings for the shared engine (see db.py)
+DB_POOL_SIZE = 5  # connections kept open in the pool
+DB_MAX_OVERFLOW = 10  # extra connections allowed when the pool is exhausted
+DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection before giving up
+
+# PRAGMAs applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",  # lets retention.py hand freed pages back to the OS (set before journal_mode)
+    "journal_mode": "WAL",  # readers don't block the writer
+    "synchronous": "NORMAL",  # safe with WAL, far fewer fsyncs than FULL
+    "mmap_size": 268435456,  # 256 MiB memory-mapped I/O
+    "cache_size": -65536,  # negative means KiB, so 64 MiB page cache
+    "busy_timeout": 5000,  # ms to wait on a locked database instead of failing immediately
+}
+
+# Retention: rows deleted (or archived) per transaction, so a purge never holds the write lock for long
+RETENTION_CHUNK_SIZE = 1000
+
+# Suggestions learned from past sorting (see classifier.py): where the trained model is cached,
+# how many sorted notifications it needs before it makes suggestions, and how sure a suggestion
+# must be for `classify accept` to apply it without asking
+CLASSIFIER_MODEL_FILE = "./classifier_model.npz"
+CLASSIFIER_MIN_EXAMPLES = 20
+CLASSIFIER_AUTO_ACCEPT = 0.9
+
+# Near-duplicates (see duplicates.py): share of words and word pairs two notifications must have
+# in common to land in the same cluster (a different name in an otherwise identical sentence
+# still leaves well over half)
+DUPLICATE_SIMILARITY = 0.5
+
+# Profiling (see profiling.py; on with NOTIFY_PROFILE=1 or --profile): where the trace is written
+# at exit, in Chrome's trace format (chrome://tracing, ui.perfetto.dev), or as JSON lines if the
+# name ends in .jsonl. NOTIFY_PROFILE_TRACE in the environment overrides it
+PROFILE_TRACE_FILE = "./profile_trace.json"
+
 # Levels of Importance
 IMPORTANCE_LEVELS = {
     1: "Not important",
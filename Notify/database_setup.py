@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, ForeignKey, Index, LargeBinary, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
-import config
+from sqlalchemy.orm import relationship, backref
+import db
+import migrations
 
 
 Base = declarative_base()
@@ -18,6 +20,16 @@ class Unsorted(Base): # this is a model
     id = Column(Integer, primary_key=True)
     title = Column(String(250), nullable=False)
     content = Column(Text, nullable=False)
+    fingerprint = Column(String(64), nullable=True) # content hash used to skip already-fetched notifications
+    fetched_at = Column(DateTime, default=datetime.utcnow) # when the notification was scraped (UTC)
+    account_id = Column(String(50), nullable=True) # name of the LinkedIn account it was fetched for (see accounts.py)
+    __table_args__ = (
+        Index('ix_unsorted_fingerprint_account', 'fingerprint', 'account_id', unique=True), # one copy per account
+        Index('ix_unsorted_fingerprint_unassigned', 'fingerprint', unique=True,
+              sqlite_where=text('account_id IS NULL'), postgresql_where=text('account_id IS NULL')), # and one without
+        Index('ix_unsorted_fetched_at', 'fetched_at'),
+        Index('ix_unsorted_account_id', 'account_id'),
+    )
 
 class Sorted(Base): #this is a model
     __tablename__ = 'sorted'
@@ -30,14 +42,60 @@ class Sorted(Base): #this is a model
     note = Column(Text, nullable=True)
     notification_id = Column(Integer, ForeignKey('unsorted.id'))
     notification = relationship(Unsorted, backref="sorted_notifications")
+    fingerprint = Column(String(64), nullable=True) # carried over from the unsorted notification
+    fetched_at = Column(DateTime, default=datetime.utcnow) # carried over from the unsorted notification
+    sorted_at = Column(DateTime, default=datetime.utcnow) # when the notification was categorized (UTC)
+    account_id = Column(String(50), nullable=True) # carried over from the unsorted notification
+    __table_args__ = (
+        Index('ix_sorted_fingerprint_account', 'fingerprint', 'account_id', unique=True),
+        Index('ix_sorted_fingerprint_unassigned', 'fingerprint', unique=True,
+              sqlite_where=text('account_id IS NULL'), postgresql_where=text('account_id IS NULL')),
+        Index('ix_sorted_fetched_at', 'fetched_at'),
+        Index('ix_sorted_sorted_at', 'sorted_at'),
+        Index('ix_sorted_category_importance', 'category_id', 'importance_level'),
+        Index('ix_sorted_notification_id', 'notification_id'),
+        Index('ix_sorted_account_id', 'account_id'),
+    )
+class UnsortedBand(Base): # this is a model
+    __tablename__ = 'unsorted_band' # LSH buckets of the unsorted notifications (see duplicates.py)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True) # hash of the band's MinHash values
+    notification_id = Column(Integer, ForeignKey('unsorted.id', ondelete='CASCADE'), primary_key=True)
+    __table_args__ = (
+        Index('ix_unsorted_band_notification_id', 'notification_id'),
+        {'sqlite_with_rowid': False}, # the primary key is the table: no separate rowid b-tree to maintain
+    )
+
+class UnsortedSignature(Base): # this is a model
+    __tablename__ = 'unsorted_signature' # MinHash signatures of the unsorted notifications (see duplicates.py)
+    notification_id = Column(Integer, ForeignKey('unsorted.id', ondelete='CASCADE'), primary_key=True)
+    signature = Column(LargeBinary, nullable=False) # NUM_PERM little-endian uint32 values
+
+
+class Rule(Base): # this is a model
+    __tablename__ = 'rule'
+    id = Column(Integer, primary_key=True) # lower ids win when several rules match at the same spot
+    kind = Column(String(20), nullable=False) # 'keyword', 'regex' or 'sender' (see rules.py)
+    pattern = Column(Text, nullable=False)
+    category_id = Column(Integer, ForeignKey('category.id'), nullable=False)
+    category = relationship("Category", backref=backref("rules", cascade="all, delete-orphan"))
+    importance_level = Column(Integer, nullable=False)
+    note = Column(Text, nullable=True)
 
 def setup_database(): # this function sets up the database
-    """Sets up the database, creating tables based on defined models."""
-    engine = create_engine(config.DATABASE_URI)
+    """Sets up the database, creating tables based on defined models. Does nothing when it is already current."""
+    engine = db.get_engine()
+    # a database at the latest migration already has every table, index and default category,
+    # so the usual start only costs this one version lookup
+    with engine.connect() as connection:
+        if migrations.current_version(connection) == migrations.HEAD:
+            return
     Base.metadata.create_all(engine)
+    # bring existing databases up to date in place (see migrations.py)
+    for version, description in migrations.upgrade(engine, Base.metadata):
+        print(f"Applied migration {version}: {description}.")
     
-    DBSession = sessionmaker(bind=engine)
-    session = DBSession()
+    session = db.get_session_factory()()
     
     if not session.query(Category).count():
         default_categories = ["General", "Work", "Personal", "Social", "Promotions", "Miscellaneous"]
@@ -52,7 +110,7 @@ def setup_database(): # this function sets up the database
 
 def drop_all(): # this function drops all tables
     """Drops all tables, cleaning the database."""
-    engine = create_engine(config.DATABASE_URI)
+    engine = db.get_engine()
     Base.metadata.drop_all(engine)
     print("Database dropped.")
 
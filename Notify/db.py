@@ -0,0 +1,170 @@
+# db.py
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import config
+
+# Process-wide engine and session factory. The engine (and its connection pool) is built the first
+# time it is asked for and then shared by every session_scope(), setup_database() and drop_all() call.
+
+_lock = threading.Lock()
+_engine = None
+_session_factory = None
+_database_uri = None
+_metrics_hook = None
+
+
+class PoolMetrics:
+    '''Counters for connection checkouts and the time spent waiting on the pool.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0  # new DBAPI connections opened
+            self.checkouts = 0  # connections handed out by the pool
+            self.checkins = 0  # connections returned to the pool
+            self.total_wait = 0.0  # seconds spent waiting for a checkout
+            self.max_wait = 0.0
+
+    def record_checkout(self, wait):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def snapshot(self):
+        '''Returns the current counters as a dict.'''
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "avg_wait": self.total_wait / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    '''QueuePool that times every checkout and reports it to the metrics hook.'''
+
+    def connect(self):
+        start = time.perf_counter()
+        connection = super().connect()
+        wait = time.perf_counter() - start
+        metrics.record_checkout(wait)
+        if _metrics_hook is not None:
+            _metrics_hook("checkout", wait)
+        return connection
+
+
+def set_metrics_hook(hook):
+    '''
+    Registers a callable invoked as hook(event_name, wait_seconds) on every pool checkout.
+    Pass None to remove the hook.
+    '''
+    global _metrics_hook
+    _metrics_hook = hook
+
+
+def pool_metrics():
+    '''Returns a snapshot of the pool counters (checkouts, connects, wait times).'''
+    return metrics.snapshot()
+
+
+def _is_memory_database(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    '''Applies config.SQLITE_PRAGMAS to every new SQLite connection.'''
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in config.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+
+def _count_connect(dbapi_connection, connection_record):
+    metrics.record_connect()
+
+
+def _count_checkin(dbapi_connection, connection_record):
+    metrics.record_checkin()
+
+
+def _build_engine(database_uri):
+    url = make_url(database_uri)
+    engine_kwargs = {}
+    if not _is_memory_database(url):
+        # an in-memory SQLite database lives inside a single connection, so only file
+        # databases (and other backends) get a real pool.
+        engine_kwargs.update(
+            poolclass=MeteredQueuePool,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+    engine = create_engine(database_uri, **engine_kwargs)
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(engine, "connect", _count_connect)
+    event.listen(engine, "checkin", _count_checkin)
+    return engine
+
+
+def get_engine():
+    '''Returns the shared engine, building it on first use.'''
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                uri = _database_uri or config.DATABASE_URI
+                _engine = _build_engine(uri)
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+    return _engine
+
+
+def get_session_factory():
+    '''Returns the shared sessionmaker bound to the shared engine.'''
+    get_engine()
+    return _session_factory
+
+
+def configure(database_uri=None):
+    '''
+    Points the shared engine at a different database (e.g. a temporary file for benchmarks).
+    The current engine, if any, is disposed and a new one is built lazily on next use.
+    '''
+    global _database_uri
+    dispose()
+    _database_uri = database_uri
+
+
+def dispose():
+    '''Closes every pooled connection and forgets the shared engine.'''
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+    metrics.reset()
@@ -0,0 +1,93 @@
+# driver_manager.py
+import atexit
+import os
+import threading
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from scraper import setup_driver
+import config
+
+# Keeps warm Chrome sessions around between fetches. Each session uses its own persistent
+# profile directory, so LinkedIn cookies survive restarts and login can be skipped while
+# the session is still valid.
+
+LINKEDIN_FEED_URL = "https://www.linkedin.com/feed/"
+
+
+def profile_dir(profile=config.DEFAULT_ACCOUNT):
+    '''Returns the Chrome user-data directory used for the given profile name.'''
+    return os.path.abspath(os.path.join(config.CHROME_PROFILE_DIR, profile))
+
+
+def is_healthy(driver):
+    '''Returns True if the browser behind driver still answers commands.'''
+    try:
+        driver.execute_script("return 1;")
+        return True
+    except WebDriverException:
+        return False
+
+
+def is_logged_in(driver, timeout=5):
+    '''
+    Returns True if the browser still holds a valid LinkedIn session.
+    Loads the feed; an expired session gets redirected away from it to the login page.
+    '''
+    try:
+        driver.get(LINKEDIN_FEED_URL)
+        WebDriverWait(driver, timeout).until(EC.url_contains("linkedin.com/feed"))
+        return True
+    except (TimeoutException, WebDriverException):
+        return False
+
+
+class DriverManager:
+    '''Hands out one warm, health-checked WebDriver per profile and quits them all on exit.'''
+
+    def __init__(self):
+        self._drivers = {}
+        self._lock = threading.Lock()
+        self._profile_locks = {}  # one per profile, so browsers for different profiles start in parallel
+
+    def get(self, profile=config.DEFAULT_ACCOUNT):
+        '''Returns the warm driver for profile, starting (or restarting) it if needed.'''
+        with self._lock:
+            profile_lock = self._profile_locks.setdefault(profile, threading.Lock())
+        with profile_lock:
+            with self._lock:
+                driver = self._drivers.get(profile)
+            if driver is not None and not is_healthy(driver):
+                self._quit(driver)
+                driver = None
+            if driver is None:
+                driver = setup_driver(profile_dir=profile_dir(profile))
+                with self._lock:
+                    self._drivers[profile] = driver
+            return driver
+
+    def discard(self, profile=config.DEFAULT_ACCOUNT):
+        '''Quits the driver for profile (e.g. after an error left it in a bad state).'''
+        with self._lock:
+            driver = self._drivers.pop(profile, None)
+        if driver is not None:
+            self._quit(driver)
+
+    def close_all(self):
+        '''Quits every managed driver.'''
+        with self._lock:
+            drivers = list(self._drivers.values())
+            self._drivers.clear()
+        for driver in drivers:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+drivers = DriverManager()
+atexit.register(drivers.close_all)
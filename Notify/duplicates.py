@@ -0,0 +1,247 @@
+# duplicates.py
+import re
+import zlib
+from functools import lru_cache
+from itertools import groupby
+from sqlalchemy import select, func
+from database_setup import Unsorted, UnsortedBand, UnsortedSignature
+from utils import chunked
+import config
+
+try:
+    import numpy as np
+except ImportError:  # near-duplicate detection is optional: pip install numpy
+    np = None
+
+# Near-duplicate detection for the unsorted list ("X and 12 others reacted to your post" in many
+# slight variations), so a whole cluster can be categorized or deleted in one go.
+#   MinHash  - a notification's content is reduced to its set of words and word pairs (numbers
+#              normalized, so "12 others" and "13 others" agree) and summarized by NUM_PERM
+#              minimum hash values. Two signatures agree in about as many places as the two
+#              sets overlap (Jaccard similarity).
+#   LSH      - each signature is cut into BANDS bands and every band hashed to a bucket. The
+#              (band, bucket, notification_id) rows live in the unsorted_band table, so similar
+#              notifications are found through an index lookup on a shared bucket instead of by
+#              comparing every pair. With 16 bands of 4 values, notifications with 60% overlap
+#              share a bucket about 9 times in 10, while ones with 20% rarely do.
+# Candidates that share a bucket are kept together only if their signatures agree in at least
+# config.DUPLICATE_SIMILARITY of the places. Signatures are computed once, when a notification is
+# indexed, and stored in the unsorted_signature table next to its buckets; comparisons read them
+# back instead of hashing the text again. Indexing is lazy, for the unsorted rows that don't have
+# a signature yet; triggers (see migrations.py) drop a notification's signature and buckets when
+# it leaves the unsorted table.
+
+NUM_PERM = 64
+BANDS = 16
+INDEX_BATCH_SIZE = 500  # notifications hashed per batch
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Near-duplicate detection needs numpy (pip install numpy).")
+
+
+@lru_cache(maxsize=None)
+def _permutations():
+    # fixed seed: buckets stored by an earlier run must stay comparable
+    rng = np.random.default_rng(20240101)
+    return (rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)[:, None],
+            rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)[:, None],
+            rng.integers(1, 1 << 62, NUM_PERM // BANDS, dtype=np.uint64))
+
+
+def _shingles(title, content):
+    words = _WORD.findall(_NUMBER.sub("0", (content or title or "").lower())) or [""]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def signatures(texts):
+    '''MinHash signatures of (title, content) pairs as an array of shape (len(texts), NUM_PERM).'''
+    _require_numpy()
+    a, b, _ = _permutations()
+    hashes, starts = [], []
+    for title, content in texts:
+        starts.append(len(hashes))
+        hashes.extend(zlib.crc32(shingle.encode("utf-8")) for shingle in _shingles(title, content))
+    values = (a * (np.array(hashes, np.uint64) % _PRIME) + b) % _PRIME
+    return np.minimum.reduceat(values, starts, axis=1).T.astype(np.uint32)
+
+
+def band_buckets(signature_rows):
+    '''The LSH bucket of every band of every signature, as int64 array of shape (rows, BANDS).'''
+    *_, multipliers = _permutations()
+    bands = signature_rows.astype(np.uint64).reshape(len(signature_rows), BANDS, NUM_PERM // BANDS)
+    return (bands * multipliers).sum(axis=2).view(np.int64)  # wraps around, which is fine for a hash
+
+
+def similarity(first, second):
+    '''Estimated Jaccard similarity of the notifications behind two signatures.'''
+    return float((first == second).mean())
+
+
+def _pack(signature):
+    return signature.astype("<u4").tobytes()
+
+
+def _unpack(blob):
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def index_unsorted(session):
+    '''
+    Stores the MinHash signature and LSH buckets of the unsorted notifications that don't have them
+    yet, inside the caller's transaction. Returns the number of notifications indexed.
+    '''
+    _require_numpy()
+    unsorted, bands, stored = Unsorted.__table__, UnsortedBand.__table__, UnsortedSignature.__table__
+    # an anti-join rather than "ids above the highest indexed one": imports can bring in lower ids,
+    # and SQLite reuses the ids of deleted top rows (whose signatures the trigger has dropped)
+    indexed = select(stored.c.notification_id).where(stored.c.notification_id == unsorted.c.id).exists()
+    ids = session.execute(select(unsorted.c.id).where(~indexed).order_by(unsorted.c.id)).scalars().all()
+    for chunk in chunked(ids, INDEX_BATCH_SIZE):
+        rows = session.execute(
+            select(unsorted.c.id, unsorted.c.title, unsorted.c.content).where(unsorted.c.id.in_(chunk))).all()
+        signature_rows = signatures([(row.title, row.content) for row in rows])
+        session.execute(stored.insert(), [
+            {"notification_id": row.id, "signature": _pack(signature)}
+            for row, signature in zip(rows, signature_rows)
+        ])
+        session.execute(bands.insert(), [
+            {"band": band, "bucket": bucket, "notification_id": row.id}
+            for row, row_buckets in zip(rows, band_buckets(signature_rows).tolist())
+            for band, bucket in enumerate(row_buckets)
+        ])
+    return len(ids)
+
+
+def _signatures_by_id(session, ids):
+    '''The stored signatures of the given (indexed) notifications, by id.'''
+    stored = UnsortedSignature.__table__
+    found = {}
+    for chunk in chunked(ids, INDEX_BATCH_SIZE):
+        for row in session.execute(select(stored).where(stored.c.notification_id.in_(chunk))):
+            found[row.notification_id] = _unpack(row.signature)
+    return found
+
+
+class _Components:
+    '''Union-find over notification ids.'''
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+    def groups(self):
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups.values()
+
+
+def _join_similar(components, buckets, signature_of, threshold):
+    '''Within each bucket (a list of ids), joins the notifications similar enough to each other.'''
+    for members in buckets:
+        while len(members) > 1:
+            # the first member leads; everything similar enough to it joins its cluster
+            leader, rest = members[0], members[1:]
+            similar = (np.array([signature_of[member] for member in rest]) == signature_of[leader]).mean(axis=1)
+            for member, score in zip(rest, similar):
+                if score >= threshold:
+                    components.union(member, leader)
+            members = [member for member, score in zip(rest, similar) if score < threshold]
+
+
+def find_clusters(session, min_size=2, threshold=None):
+    '''
+    Groups the unsorted notifications into clusters of near-duplicates (indexing new ones first).
+    Only notifications sharing an LSH bucket are ever compared, and only their stored signatures
+    are read, a few hundred at a time as the shared buckets are streamed in. Returns lists of ids,
+    largest cluster first; notifications without a near-duplicate are left out.
+    '''
+    threshold = config.DUPLICATE_SIMILARITY if threshold is None else threshold
+    index_unsorted(session)
+    bands = UnsortedBand.__table__
+    shared = (select(bands.c.band, bands.c.bucket)
+              .group_by(bands.c.band, bands.c.bucket)
+              .having(func.count() > 1)
+              .subquery())
+    rows = session.execute(
+        select(bands.c.band, bands.c.bucket, bands.c.notification_id)
+        .join(shared, (bands.c.band == shared.c.band) & (bands.c.bucket == shared.c.bucket))
+        .order_by(bands.c.band, bands.c.bucket)
+        .execution_options(yield_per=INDEX_BATCH_SIZE))
+    components = _Components()
+    pending, pending_ids = [], set()  # buckets waiting for their members' signatures
+    for _, members in groupby(rows, key=lambda row: (row.band, row.bucket)):
+        members = [row.notification_id for row in members]
+        if len({components.find(member) for member in members}) < 2:
+            continue  # already joined through an earlier band
+        pending.append(members)
+        pending_ids.update(members)
+        if len(pending_ids) >= INDEX_BATCH_SIZE:
+            _join_similar(components, pending, _signatures_by_id(session, pending_ids), threshold)
+            pending, pending_ids = [], set()
+    if pending:
+        _join_similar(components, pending, _signatures_by_id(session, pending_ids), threshold)
+    clusters = [sorted(group) for group in components.groups() if len(group) >= min_size]
+    return sorted(clusters, key=lambda cluster: (-len(cluster), cluster[0]))
+
+
+def cluster_of(session, notification_id, threshold=None):
+    '''
+    The near-duplicates of one unsorted notification, found by following shared buckets out from
+    it (index lookups only, so the cost depends on the cluster, not on the size of the backlog).
+    Only the notifications in buckets that collide with the cluster have their signatures read.
+    Every bucket is opened once; the notifications in it join when they are similar enough to a
+    cluster member that brought the bucket in.
+    Returns the sorted ids of the cluster, the notification included, or [] if it doesn't exist.
+    '''
+    threshold = config.DUPLICATE_SIMILARITY if threshold is None else threshold
+    index_unsorted(session)
+    bands = UnsortedBand.__table__
+    signature_of = _signatures_by_id(session, [notification_id])  # the cluster so far
+    if notification_id not in signature_of:
+        return []
+    opened = set()  # (band, bucket) pairs already expanded
+    frontier = [notification_id]
+    while frontier:
+        leaders = {}  # newly reached bucket -> the cluster member that brought it in
+        for chunk in chunked(frontier, INDEX_BATCH_SIZE):
+            for row in session.execute(select(bands).where(bands.c.notification_id.in_(chunk))):
+                if (row.band, row.bucket) not in opened:
+                    leaders.setdefault((row.band, row.bucket), row.notification_id)
+        opened.update(leaders)
+        members = {}  # bucket -> notifications in it that aren't in the cluster yet
+        by_band = {}
+        for band, bucket in leaders:
+            by_band.setdefault(band, []).append(bucket)
+        for band, buckets in by_band.items():
+            # one band at a time: SQLite can't use the primary key for a (band, bucket) IN (...) list
+            for chunk in chunked(buckets, INDEX_BATCH_SIZE):
+                for row in session.execute(select(bands).where(bands.c.band == band, bands.c.bucket.in_(chunk))):
+                    if row.notification_id not in signature_of:
+                        members.setdefault((row.band, row.bucket), []).append(row.notification_id)
+        candidates = _signatures_by_id(session, {member for found in members.values() for member in found})
+        frontier = []
+        for bucket, found in members.items():
+            found = [member for member in found if member in candidates and member not in signature_of]
+            if not found:
+                continue
+            similar = (np.array([candidates[member] for member in found]) == signature_of[leaders[bucket]]).mean(axis=1)
+            for member, score in zip(found, similar):
+                if score >= threshold:
+                    signature_of[member] = candidates[member]
+                    frontier.append(member)
+    return sorted(signature_of)
@@ -0,0 +1,127 @@
+# ingest.py
+from sqlalchemy import select, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from database_setup import Unsorted, Sorted
+from utils import session_scope, notification_fingerprint, chunked
+
+DEFAULT_BATCH_SIZE = 500  # rows per executemany call
+
+# INSERT ... ON CONFLICT DO NOTHING constructors for the backends that support it
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _to_row(record):
+    '''Normalizes a scraped record (dict or (title, content) pair) into an insert row.'''
+    account_id = None
+    if isinstance(record, dict):
+        title, content = record["title"], record["content"]
+        fingerprint = record.get("fingerprint") or notification_fingerprint(
+            title, content, record.get("source_time"))
+        account_id = record.get("account_id")
+    else:
+        title, content = record
+        fingerprint = notification_fingerprint(title, content)
+    return {"title": title, "content": content, "fingerprint": fingerprint, "account_id": account_id}
+
+
+def record_key(record):
+    '''Returns the (account_id, fingerprint) a scraped record will be stored under.'''
+    row = _to_row(record)
+    return row["account_id"], row["fingerprint"]
+
+
+def known_fingerprints(session, fingerprints, account_id=None):
+    '''
+    Returns the subset of fingerprints already stored in either the unsorted or the sorted table for
+    account_id, or without an account. With account_id None, rows of any account count.
+    '''
+    fingerprints = list(fingerprints)
+    known = set()
+    for chunk in chunked(fingerprints, DEFAULT_BATCH_SIZE):
+        for model in (Unsorted, Sorted):
+            query = select(model.fingerprint).where(model.fingerprint.in_(chunk))
+            if account_id is not None:
+                query = query.where(or_(model.account_id == account_id, model.account_id.is_(None)))
+            known.update(session.execute(query).scalars())
+    return known
+
+
+def _stored_forms(record, fingerprint):
+    '''
+    Returns the fingerprints the notification may already be stored under: its own, and for a
+    scraped record with a source_time the one without it, which is what rows fetched before
+    source_time was hashed (and rows backfilled by migration 1) carry.
+    '''
+    if isinstance(record, dict) and record.get("source_time") and not record.get("fingerprint"):
+        return [fingerprint, notification_fingerprint(record["title"], record["content"])]
+    return [fingerprint]
+
+
+def _known(session, forms):
+    '''Takes {(account_id, fingerprint): [stored forms]} and returns the keys with any form already stored.'''
+    owners = {}  # account_id -> {form: keys}
+    for key, stored_forms in forms.items():
+        for form in stored_forms:
+            owners.setdefault(key[0], {}).setdefault(form, set()).add(key)
+    known = set()
+    for account_id, account_owners in owners.items():
+        for form in known_fingerprints(session, account_owners, account_id):
+            known.update(account_owners[form])
+    return known
+
+
+def known_records(session, records):
+    '''
+    Returns the keys (as record_key() gives them) of the records already stored in the unsorted or
+    sorted table, under their own fingerprint or an older one (see known_fingerprints for accounts).
+    '''
+    forms = {}
+    for record in records:
+        key = record_key(record)
+        forms[key] = _stored_forms(record, key[1])
+    return _known(session, forms)
+
+
+def ingest_notifications(records, batch_size=DEFAULT_BATCH_SIZE, session=None):
+    '''
+    Inserts scraped notifications into the unsorted table, skipping ones already stored.
+    Rows are sent as Core executemany batches of batch_size, all inside one transaction,
+    so no ORM objects are built per notification. A notification is skipped when its
+    fingerprint is already in the unsorted or sorted table for the same account or without one
+    (or, for a record with a source_time, the fingerprint without it, see _stored_forms()), or
+    repeats within the same batch. Each account keeps its own copy of a notification.
+    Args:
+        records: iterable of dicts with 'title', 'content' and optional 'source_time' and
+            'account_id' keys (or (title, content) pairs).
+        batch_size (int): number of rows per executemany call.
+        session: optional open session to run in; a new session_scope() is used otherwise.
+    Returns:
+        int: the number of rows inserted.
+    '''
+    if session is None:
+        with session_scope() as session:
+            return ingest_notifications(records, batch_size=batch_size, session=session)
+
+    upsert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if upsert is not None:
+        insert_stmt = upsert(Unsorted.__table__).on_conflict_do_nothing()  # either fingerprint index
+    else:
+        insert_stmt = Unsorted.__table__.insert()
+    inserted = 0
+    for chunk in chunked(records, batch_size):
+        unique_rows, forms = {}, {}
+        for record in chunk:
+            row = _to_row(record)
+            key = row["account_id"], row["fingerprint"]
+            if key not in unique_rows:
+                unique_rows[key] = row
+                forms[key] = _stored_forms(record, row["fingerprint"])
+        known = _known(session, forms)
+        chunk = [row for key, row in unique_rows.items() if key not in known]
+        if not chunk:
+            continue
+        inserted += session.execute(insert_stmt, chunk).rowcount
+    return inserted
@@ -0,0 +1,185 @@
+# migrations.py
+from datetime import datetime
+from sqlalchemy import inspect, text
+from utils import notification_fingerprint
+from search import install_search_index
+from stats import install_stats
+
+# Small built-in versioned migrator. The schema_version table holds the number of the last
+# migration applied; upgrade() runs the newer ones in order, so an existing notify_this.db is
+# brought up to date in place. create_all() already gives a new database the latest tables,
+# and the migrations then only fill in what is missing: every step checks before it adds a
+# column or an index, so running one again (e.g. after an interrupted upgrade) is harmless.
+#
+# To change the schema, update the model in database_setup.py and append a migration here that
+# makes the same change to an existing database. Never edit or reorder migrations once released.
+
+VERSION_TABLE = "schema_version"
+
+
+def _columns(connection, table_name):
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _add_column(connection, table, column_name):
+    '''Adds a column declared on the model to an existing table, unless it is already there.'''
+    if column_name in _columns(connection, table.name):
+        return False
+    column = table.c[column_name]
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}"))
+    return True
+
+
+def _create_indexes(connection, table, *names):
+    '''Creates the named indexes declared on the model, skipping the ones that already exist.'''
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+
+def add_fingerprints(connection, metadata):
+    '''
+    Adds the fingerprint columns, backfills them and creates their unique indexes.
+    When older rows contain duplicates (in either table), only the first copy gets a fingerprint.
+    The item's source_time was never stored, so these fingerprints leave it out; ingest matches
+    newly scraped items against that form too (see ingest._stored_forms).
+    '''
+    seen = set()  # shared so a fingerprint is held by at most one row across both tables
+    for table_name in ("unsorted", "sorted"):
+        table = metadata.tables[table_name]
+        if _add_column(connection, table, "fingerprint"):
+            updates = []
+            for row_id, title, content in connection.execute(
+                    text(f"SELECT id, title, content FROM {table.name} ORDER BY id")):
+                fingerprint = notification_fingerprint(title, content)
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    updates.append({"fingerprint": fingerprint, "id": row_id})
+            if updates:
+                connection.execute(
+                    text(f"UPDATE {table.name} SET fingerprint = :fingerprint WHERE id = :id"), updates)
+        _create_indexes(connection, table, f"ix_{table_name}_fingerprint")  # no longer declared: see migration 8
+
+
+def add_search_index(connection, metadata):
+    '''Creates the full-text search index (see search.py), filled from the existing rows.'''
+    install_search_index(connection)
+
+
+def add_fetched_at_and_query_indexes(connection, metadata):
+    '''
+    Adds the fetched_at timestamps and indexes the columns the listings filter, group and order by.
+    Rows that predate the column get the time of the upgrade, the earliest time we can vouch for.
+    '''
+    upgraded_at = datetime.utcnow()
+    for table_name in ("unsorted", "sorted"):
+        table = metadata.tables[table_name]
+        if _add_column(connection, table, "fetched_at"):
+            connection.execute(table.update().values(fetched_at=upgraded_at))
+        _create_indexes(connection, table, f"ix_{table_name}_fetched_at")
+    _create_indexes(connection, metadata.tables["sorted"],
+                    "ix_sorted_category_importance", "ix_sorted_notification_id")
+
+
+def add_sorted_at(connection, metadata):
+    '''Adds sorted_at to the sorted table. Older rows take their fetched_at, the best estimate left.'''
+    table = metadata.tables["sorted"]
+    if _add_column(connection, table, "sorted_at"):
+        connection.execute(table.update().values(sorted_at=table.c.fetched_at))
+    _create_indexes(connection, table, "ix_sorted_sorted_at")
+
+
+def add_account_id(connection, metadata):
+    '''Adds the account_id columns. Rows fetched before multi-account support stay NULL (unknown account).'''
+    for table_name in ("unsorted", "sorted"):
+        table = metadata.tables[table_name]
+        _add_column(connection, table, "account_id")
+        _create_indexes(connection, table, f"ix_{table_name}_account_id")
+
+
+def add_duplicate_index(connection, metadata):
+    '''
+    Creates the table of near-duplicate (LSH) buckets, filled lazily by duplicates.py. On SQLite,
+    where foreign keys aren't enforced, a trigger drops the buckets of deleted unsorted rows.
+    '''
+    table = metadata.tables["unsorted_band"]
+    table.create(connection, checkfirst=True)
+    _create_indexes(connection, table, "ix_unsorted_band_notification_id")
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("""CREATE TRIGGER IF NOT EXISTS unsorted_band_delete AFTER DELETE ON unsorted BEGIN
+            DELETE FROM unsorted_band WHERE notification_id = old.id;
+        END"""))
+
+
+def add_stats_table(connection, metadata):
+    '''Creates the materialized per-category counts (see stats.py), counted from the existing rows.'''
+    install_stats(connection)
+
+
+def scope_fingerprints_by_account(connection, metadata):
+    '''
+    Replaces the unique fingerprint indexes with ones per account, so every account keeps its own
+    copy of a notification. The existing rows already satisfy them: their fingerprints are unique.
+    '''
+    for table_name in ("unsorted", "sorted"):
+        connection.execute(text(f"DROP INDEX IF EXISTS ix_{table_name}_fingerprint"))
+        _create_indexes(connection, metadata.tables[table_name],
+                        f"ix_{table_name}_fingerprint_account", f"ix_{table_name}_fingerprint_unassigned")
+
+
+def add_duplicate_signatures(connection, metadata):
+    '''
+    Creates the table of stored MinHash signatures (see duplicates.py) and empties the bucket table,
+    so buckets and signatures are rebuilt together the next time duplicates are looked up.
+    '''
+    metadata.tables["unsorted_signature"].create(connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("""CREATE TRIGGER IF NOT EXISTS unsorted_signature_delete AFTER DELETE ON unsorted BEGIN
+            DELETE FROM unsorted_signature WHERE notification_id = old.id;
+        END"""))
+    connection.execute(text("DELETE FROM unsorted_band"))
+    connection.execute(text("DELETE FROM unsorted_signature"))
+
+
+# (version, description, step); versions are consecutive, starting at 1
+MIGRATIONS = [
+    (1, "fingerprint columns", add_fingerprints),
+    (2, "full-text search index", add_search_index),
+    (3, "fetched_at timestamps and query indexes", add_fetched_at_and_query_indexes),
+    (4, "sorted_at timestamp", add_sorted_at),
+    (5, "account_id columns", add_account_id),
+    (6, "near-duplicate index", add_duplicate_index),
+    (7, "notification stats", add_stats_table),
+    (8, "fingerprints unique per account", scope_fingerprints_by_account),
+    (9, "stored MinHash signatures", add_duplicate_signatures),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    '''Returns the number of the last migration applied to the database (0 if none).'''
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return 0
+    return connection.execute(text(f"SELECT max(version) FROM {VERSION_TABLE}")).scalar() or 0
+
+
+def upgrade(engine, metadata):
+    '''
+    Applies every migration newer than the database's version, each in its own transaction
+    together with the version bump. Returns the list of (version, description) applied.
+    '''
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)"))
+        version = current_version(connection)
+    applied = []
+    for number, description, step in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as connection:
+            step(connection, metadata)
+            connection.execute(text(f"DELETE FROM {VERSION_TABLE}"))
+            connection.execute(text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:version)"), {"version": number})
+        applied.append((number, description))
+    return applied
@@ -0,0 +1,110 @@
+# operations.py
+import re
+from sqlalchemy import select, literal
+from database_setup import Unsorted, Sorted, Category
+from utils import chunked
+import config
+
+# Prompt-free building blocks shared by the interactive menus (cli.py) and the
+# non-interactive subcommands (commands.py). They work inside a caller-provided session
+# and leave committing to the caller's session_scope().
+#
+# Moves between the unsorted and sorted tables are set-based: one INSERT ... SELECT copies
+# the rows and one DELETE removes the originals, both in the caller's transaction, so no
+# ORM objects are built for the moved rows. Id lists are sent in chunks of MOVE_CHUNK_SIZE
+# to stay under the database's bound-parameter limit.
+
+MOVE_CHUNK_SIZE = 500
+
+
+def notification_to_dict(notification):
+    '''Returns a JSON-serializable dict for an Unsorted or Sorted notification.'''
+    data = {
+        "id": notification.id,
+        "title": notification.title,
+        "content": notification.content,
+        "fingerprint": notification.fingerprint,
+        "account_id": notification.account_id,
+    }
+    if isinstance(notification, Sorted):
+        data.update(
+            category=notification.category.name if notification.category else None,
+            category_id=notification.category_id,
+            importance_level=notification.importance_level,
+            note=notification.note,
+        )
+    return data
+
+
+def find_category(session, name_or_id):
+    '''Looks a category up by id (if name_or_id is numeric) or by case-insensitive name.'''
+    if str(name_or_id).isdigit():
+        return session.get(Category, int(name_or_id))
+    return session.query(Category).filter(Category.name.ilike(str(name_or_id))).first()
+
+
+def move_to_sorted(session, ids, category_id, importance_level, note=None):
+    '''
+    Moves the unsorted notifications with the given ids into the sorted table with one
+    category, importance level and note. Returns the number of notifications moved.
+    '''
+    if importance_level not in config.IMPORTANCE_LEVELS:
+        raise ValueError(f"Invalid importance level: {importance_level}")
+    unsorted, sorted_ = Unsorted.__table__, Sorted.__table__
+    moved = 0
+    for chunk in chunked(ids, MOVE_CHUNK_SIZE):
+        rows = select(
+            unsorted.c.title, unsorted.c.content, literal(category_id), literal(importance_level),
+            literal(note), unsorted.c.id, unsorted.c.fingerprint, unsorted.c.fetched_at, unsorted.c.account_id,
+        ).where(unsorted.c.id.in_(chunk))
+        session.execute(sorted_.insert().from_select(
+            ["title", "content", "category_id", "importance_level", "note", "notification_id", "fingerprint",
+             "fetched_at", "account_id"],
+            rows))
+        moved += session.execute(unsorted.delete().where(unsorted.c.id.in_(chunk))).rowcount
+    session.expire_all()
+    return moved
+
+
+def move_to_unsorted(session, ids=None, category_id=None):
+    '''
+    Moves sorted notifications back to the unsorted table: those with the given ids, or every
+    notification in category_id. Category, importance and note are dropped. Returns the number moved.
+    '''
+    unsorted, sorted_ = Unsorted.__table__, Sorted.__table__
+    if category_id is not None:
+        conditions = [sorted_.c.category_id == category_id]
+    else:
+        conditions = [sorted_.c.id.in_(chunk) for chunk in chunked(ids, MOVE_CHUNK_SIZE)]
+    moved = 0
+    for condition in conditions:
+        rows = select(sorted_.c.title, sorted_.c.content, sorted_.c.fingerprint, sorted_.c.fetched_at,
+                      sorted_.c.account_id).where(condition)
+        session.execute(unsorted.insert().from_select(
+            ["title", "content", "fingerprint", "fetched_at", "account_id"], rows))
+        moved += session.execute(sorted_.delete().where(condition)).rowcount
+    session.expire_all()
+    return moved
+
+
+def categorize_matching(session, pattern, category_id, importance_level, note=None):
+    '''
+    Moves every unsorted notification whose title or content matches the regex pattern
+    (case-insensitive) into the given category. Returns the number of notifications moved.
+    '''
+    regex = re.compile(pattern, re.IGNORECASE)
+    unsorted = Unsorted.__table__
+    rows = session.execute(
+        select(unsorted.c.id, unsorted.c.title, unsorted.c.content).execution_options(yield_per=1000))
+    ids = [row.id for row in rows if regex.search(row.title) or regex.search(row.content)]
+    return move_to_sorted(session, ids, category_id, importance_level, note)
+
+
+def delete_notifications(session, model, ids):
+    '''Deletes the rows of model with the given ids. Returns the number of rows deleted.'''
+    return session.query(model).filter(model.id.in_(list(ids))).delete(synchronize_session=False)
+
+
+def delete_all_notifications(session, model):
+    '''Deletes every row of model. Returns the number of rows deleted.'''
+    return session.query(model).delete(synchronize_session=False)
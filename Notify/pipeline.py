@@ -0,0 +1,149 @@
+# pipeline.py
+import queue
+import threading
+import time
+from ingest import ingest_notifications, known_records, record_key
+from utils import session_scope
+import config
+import profiling
+
+# Producer/consumer ingestion. The scraper (the producer) hands every batch it extracts to an
+# IngestWriter, whose background thread (the consumer) writes it with ingest_notifications()
+# in a short transaction of its own while the scraper goes on scrolling. The queue between
+# them is bounded (config.INGEST_QUEUE_SIZE batches): when the database falls behind, put()
+# blocks, so the producer slows down instead of piling up records in memory. Batches that queue
+# up while a write is running are merged into the next write.
+# ingest_source() runs a whole NotificationSource (see sources.py) through a writer.
+
+_DONE = object()
+
+
+class IngestWriter:
+    '''
+    Background writer for scraped records. Use as a context manager; leaving the block flushes
+    everything still queued and waits for the writer thread, e.g.
+
+        with IngestWriter() as writer:
+            for batch in batches:
+                writer.put(batch)
+        print(writer.inserted)
+    '''
+
+    def __init__(self, max_pending=None, ingest=ingest_notifications):
+        self._queue = queue.Queue(maxsize=max_pending or config.INGEST_QUEUE_SIZE)
+        self._ingest = ingest
+        self._error = None
+        self.received = 0  # records handed to put()
+        self.inserted = 0  # new rows written
+        self.writes = 0  # transactions committed
+        self.time_writing = 0.0  # seconds the writer spent inside ingest()
+        self.time_blocked = 0.0  # seconds put() waited on a full queue (backpressure)
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # flush even when the scrape failed: whatever was extracted is still worth keeping,
+        # but don't let a writer error hide the original exception
+        self.close(raise_errors=exc_type is None)
+        return False
+
+    def put(self, records):
+        '''Queues a batch of records for writing, waiting while the queue is full.'''
+        if self._error is not None:
+            raise RuntimeError("The ingest writer failed") from self._error
+        records = list(records)
+        if not records:
+            return
+        start = time.perf_counter()
+        self._queue.put(records)
+        self.time_blocked += time.perf_counter() - start
+        self.received += len(records)
+
+    def close(self, raise_errors=True):
+        '''Writes what is still queued, stops the writer thread and re-raises a write error.'''
+        if self._thread.is_alive():
+            self._queue.put(_DONE)
+            self._thread.join()
+        if raise_errors and self._error is not None:
+            raise RuntimeError("The ingest writer failed") from self._error
+
+    def summary(self):
+        return (f"{self.inserted} new of {self.received} in {self.writes} writes, "
+                f"{self.time_writing:.2f}s writing, {self.time_blocked:.2f}s waiting on the writer")
+
+    def _next_records(self):
+        '''Blocks for the next batch and merges in any others already queued. Returns (records, done).'''
+        records, done = [], False
+        item = self._queue.get()
+        while True:
+            if item is _DONE:
+                done = True
+            else:
+                records.extend(item)
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return records, done
+
+    def _run(self):
+        done = False
+        while not done:
+            records, done = self._next_records()
+            if not records or self._error is not None:
+                continue  # after a failure keep draining, so put() never blocks forever
+            start = time.perf_counter()
+            try:
+                self.inserted += self._ingest(records)
+                self.writes += 1
+            except Exception as e:
+                self._error = e
+            self.time_writing += time.perf_counter() - start
+            profiling.record("write", "db", start, time.perf_counter() - start, records=len(records))
+
+
+def ingest_source(source, max_items=None, since_last_seen=None, account_id=None):
+    '''
+    Saves what a NotificationSource yields to the unsorted table through an IngestWriter, batch by
+    batch while the source keeps producing. Stops pulling from the source at the record whose
+    source_id is since_last_seen (the newest one saved by a previous run; it and everything older
+    are skipped), after max_items records, or once config.KNOWN_RUN_LIMIT consecutive records are
+    already stored (for this account, or without one). account_id tags the saved rows.
+    Returns (writer, stop_reason); stop_reason is None when the source ran out by itself.
+    '''
+    known_run = 0  # consecutive already-stored records seen so far
+    queued = set()  # keys handed to the writer this run (they are "stored" by now, but not known)
+    stop_reason = None
+    batches = source.batches()
+    with IngestWriter() as writer:
+        try:
+            for batch in batches:
+                if since_last_seen:
+                    seen_at = next((i for i, record in enumerate(batch) if record.get("source_id") == since_last_seen), None)
+                    if seen_at is not None:
+                        batch, stop_reason = batch[:seen_at], "last_seen"
+                if max_items:
+                    batch = batch[:max(max_items - writer.received, 0)]
+                if account_id is not None:
+                    for record in batch:
+                        record["account_id"] = account_id  # before the lookup: only this account's copies count
+                keys = [record_key(record) for record in batch]
+                with session_scope() as session:
+                    known = known_records(session, batch) - queued
+                queued.update(keys)
+                writer.put(batch)  # written by the writer thread while the source goes on
+                if stop_reason is None and max_items and writer.received >= max_items:
+                    stop_reason = "max_items"
+                for key in keys:
+                    known_run = known_run + 1 if key in known else 0
+                    if stop_reason is None and known_run >= config.KNOWN_RUN_LIMIT:
+                        stop_reason = "known_items"
+                if stop_reason is not None:
+                    break
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+    return writer, stop_reason
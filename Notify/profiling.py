@@ -0,0 +1,163 @@
+# profiling.py
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from rich.console import Console
+from rich.table import Table
+import config
+
+# Opt-in timing instrumentation. Off by default and close to free while off; turned on with
+# NOTIFY_PROFILE=1 in the environment or a leading --profile on the command line (see
+# enable_from_environment).
+# While on, it records:
+#   spans   - timed blocks around scrolling, DOM extraction, background writes, every
+#             session_scope() transaction, rendering of notification tables and whole commands
+#   queries - every SQL statement, through SQLAlchemy's before/after_cursor_execute events
+# At exit the events are written to config.PROFILE_TRACE_FILE, in Chrome's trace event format
+# (open it in chrome://tracing or https://ui.perfetto.dev) or as JSON lines when the file name
+# ends in .jsonl, and a summary table (count, total, mean and max per kind of event) is
+# printed to stderr.
+
+_enabled = False
+_trace_path = None
+_events = []  # list.append is atomic, so the writer thread records without a lock
+_origin = time.perf_counter()
+_finished = False
+_FIRST_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?|JOIN|ON)\s+[\"`]?(\w+)", re.IGNORECASE)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace_path=None):
+    '''Starts recording (writing the trace to trace_path, default config.PROFILE_TRACE_FILE, at exit).'''
+    global _enabled, _trace_path, _finished
+    if _enabled:
+        return
+    _enabled, _finished = True, False
+    _trace_path = trace_path or config.PROFILE_TRACE_FILE
+    from sqlalchemy import event  # not at the top: the interactive menu starts without SQLAlchemy
+    from sqlalchemy.engine import Engine
+    event.listen(Engine, "before_cursor_execute", _before_query)
+    event.listen(Engine, "after_cursor_execute", _after_query)
+    atexit.register(finish)
+
+
+def disable():
+    '''Stops recording and forgets what was recorded (without writing anything).'''
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    event.remove(Engine, "before_cursor_execute", _before_query)
+    event.remove(Engine, "after_cursor_execute", _after_query)
+    atexit.unregister(finish)
+    _events.clear()
+
+
+def enable_from_environment(argv):
+    '''
+    Turns profiling on when NOTIFY_PROFILE=1 is set or argv starts with --profile (only before
+    the subcommand: `fetch --profile NAME` picks a browser profile). Returns argv without it.
+    '''
+    argv = list(argv)
+    flagged = argv[:1] == ["--profile"]
+    if flagged or os.environ.get("NOTIFY_PROFILE", "") not in ("", "0"):
+        enable(os.environ.get("NOTIFY_PROFILE_TRACE"))
+    return argv[1:] if flagged else argv
+
+
+def record(name, category, start, duration, **args):
+    '''Records a finished event that began at start (a time.perf_counter() value) and took duration seconds.'''
+    if _enabled:
+        thread = threading.current_thread()
+        _events.append({"name": name, "cat": category, "start": start - _origin, "dur": duration,
+                        "tid": thread.ident, "thread": thread.name, "args": args})
+
+
+@contextmanager
+def span(name, category="app", **args):
+    '''Times the enclosed block as one event (does nothing while profiling is off).'''
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, category, start, time.perf_counter() - start, **args)
+
+
+# The start time rides on the statement's execution context, so a statement that fails (and never
+# reaches after_cursor_execute) leaves nothing behind to skew the next one on that connection.
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_profile_start", None)
+    if start is None:
+        return
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else "?"
+    table = _FIRST_TABLE.search(statement)
+    name = f"{verb} {table.group(1)}" if table else verb
+    record(name, "sql", start, time.perf_counter() - start, statement=" ".join(statement.split())[:200],
+           rows=cursor.rowcount, executemany=executemany)
+
+
+def summarize(events=None):
+    '''Aggregates events by category and name: [(category, name, count, total, mean, max), ...], slowest total first.'''
+    totals = {}
+    for e in _events if events is None else events:
+        total = totals.setdefault((e["cat"], e["name"]), [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += e["dur"]
+        total[2] = max(total[2], e["dur"])
+    return sorted(((category, name, count, seconds, seconds / count, longest)
+                   for (category, name), (count, seconds, longest) in totals.items()),
+                  key=lambda row: -row[3])
+
+
+def write_trace(path, events=None):
+    '''Writes events as a Chrome trace (.json) or as JSON lines (.jsonl).'''
+    events = list(_events if events is None else events)
+    with open(path, "w") as f:
+        if path.endswith(".jsonl"):
+            for e in events:
+                f.write(json.dumps(e, default=str) + "\n")
+            return
+        threads = {e["tid"]: e["thread"] for e in events}
+        trace = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                 for tid, name in threads.items()]
+        trace.extend({"name": e["name"], "cat": e["cat"], "ph": "X", "pid": os.getpid(), "tid": e["tid"],
+                      "ts": e["start"] * 1e6, "dur": e["dur"] * 1e6, "args": e["args"]} for e in events)
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, default=str)
+
+
+def print_summary(console=None, limit=25):
+    rows = summarize()
+    table = Table(title=f"Profile ({len(_events)} events, trace in {_trace_path})",
+                  show_header=True, header_style="bold magenta")
+    for column in ("category", "event", "count", "total ms", "mean ms", "max ms"):
+        table.add_column(column)
+    for category, name, count, total, mean, longest in rows[:limit]:
+        table.add_row(category, name, str(count), f"{total * 1000:,.1f}", f"{mean * 1000:,.2f}", f"{longest * 1000:,.1f}")
+    (console or Console(stderr=True)).print(table)
+
+
+def finish():
+    '''Writes the trace and prints the summary (once; also runs at exit).'''
+    global _finished
+    if not _enabled or _finished:
+        return
+    _finished = True
+    write_trace(_trace_path)
+    print_summary()
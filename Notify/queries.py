@@ -0,0 +1,72 @@
+# queries.py
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from database_setup import Category, Sorted
+from stats import read_stats
+
+# Read helpers shared by the CLI. Primary keys are never renumbered; what the user sees and types
+# is a display ordinal (the row's 1-based position when the table is ordered by id).
+
+# Loader options for listing sorted notifications: fetch each row's category in the same
+# query instead of one lazy SELECT per row.
+SORTED_LOAD_OPTIONS = (joinedload(Sorted.category),)
+
+
+def ordinal_subquery(model):
+    '''
+    Returns a subquery of (id, ordinal) for every row of model, where ordinal is the row's
+    1-based position ordered by id.
+    '''
+    return select(
+        model.id.label("id"),
+        func.row_number().over(order_by=model.id).label("ordinal")
+    ).subquery()
+
+
+def id_for_ordinal(session, model, ordinal):
+    '''
+    Translates a display ordinal into the row's stable primary key.
+    Returns None if no row has that ordinal.
+    '''
+    ordinals = ordinal_subquery(model)
+    return session.execute(
+        select(ordinals.c.id).where(ordinals.c.ordinal == ordinal)
+    ).scalar()
+
+
+def get_by_ordinal(session, model, ordinal):
+    '''Returns the model instance shown at the given display ordinal, or None.'''
+    row_id = id_for_ordinal(session, model, ordinal)
+    return session.get(model, row_id) if row_id is not None else None
+
+
+def keyset_page(session, model, after_id=None, limit=10, options=()):
+    '''
+    Returns up to limit rows of model with id greater than after_id, ordered by id
+    (WHERE id > :after_id ORDER BY id LIMIT :limit). Cost depends on limit, not table size.
+    options are loader options (e.g. joinedload) applied to the query.
+    '''
+    query = session.query(model).options(*options).order_by(model.id)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    return query.limit(limit).all()
+
+
+def iter_pages(session, model, page_size=10, after_id=None, options=()):
+    '''Yields successive keyset pages of model until the table is exhausted.'''
+    while True:
+        page = keyset_page(session, model, after_id, page_size, options)
+        if not page:
+            return
+        yield page
+        after_id = page[-1].id
+
+
+def category_counts(session):
+    '''
+    Returns [(category, notification_count), ...] for every category, ordered by id. The counts
+    come from the stats table (see stats.py), so the sorted notifications aren't scanned.
+    '''
+    by_category = read_stats(session)["by_category"]
+    return [(category, sum(by_category.get(category.id, {}).values()))
+            for category in session.query(Category).order_by(Category.id)]
@@ -0,0 +1,113 @@
+# retention.py
+import gzip
+import json
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from database_setup import Unsorted, Sorted
+from utils import session_scope
+import config
+import db
+
+# Retention and archival. Old rows are removed in chunks of config.RETENTION_CHUNK_SIZE, each in
+# its own short transaction, so the fetcher and the menus never wait long on the write lock.
+# With an archive path every chunk is appended to a gzip-compressed JSON-lines file (one object
+# per row, all columns) once its delete has committed, so a chunk that fails and is purged again
+# is not archived twice. Afterwards the freed pages are handed back to the OS with an incremental
+# vacuum. Databases created before auto_vacuum was configured need a one-off full VACUUM first,
+# which locks the whole database while it runs; that only happens on request (enable_incremental_vacuum).
+
+# column that dates a row in each table: when it was fetched, or when it was categorized
+AGE_COLUMNS = {Unsorted: "fetched_at", Sorted: "sorted_at"}
+
+_AGE = re.compile(r"^(\d+)([hdw])$")
+_AGE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_age(value):
+    '''Parses an age such as "90d", "12h" or "2w" into a timedelta. Raises ValueError otherwise.'''
+    match = _AGE.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid age {value!r}, expected a number followed by h, d or w (e.g. 90d)")
+    return timedelta(**{_AGE_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def _archive_lines(table_name, rows):
+    return "".join(json.dumps({"table": table_name, **row._asdict()}, default=str) + "\n" for row in rows).encode("utf-8")
+
+
+def purge_older_than(model, age, archive_path=None, chunk_size=None):
+    '''
+    Deletes the rows of model older than age (a timedelta), oldest first, in chunks of chunk_size
+    rows per transaction. With archive_path the rows are appended to that gzip JSON-lines file
+    right after their delete commits. Returns the number of rows deleted.
+    '''
+    chunk_size = chunk_size or config.RETENTION_CHUNK_SIZE
+    table = model.__table__
+    age_column = table.c[AGE_COLUMNS[model]]
+    cutoff = datetime.utcnow() - age
+    archive = gzip.open(archive_path, "ab") if archive_path else None
+    deleted = 0
+    try:
+        while True:
+            lines = None
+            with session_scope() as session:
+                if archive:
+                    rows = session.execute(
+                        select(table).where(age_column < cutoff).order_by(age_column).limit(chunk_size)).all()
+                    ids = [row.id for row in rows]
+                    lines = _archive_lines(table.name, rows)  # serialized before the delete commits
+                else:
+                    ids = session.execute(
+                        select(table.c.id).where(age_column < cutoff).order_by(age_column).limit(chunk_size)
+                    ).scalars().all()
+                if not ids:
+                    break
+                deleted += session.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+            if lines:
+                archive.write(lines)
+                archive.flush()
+    finally:
+        if archive:
+            archive.close()
+    return deleted
+
+
+def incremental_vacuum_enabled(connection):
+    return connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2  # 2 = INCREMENTAL
+
+
+def reclaim_space(pages=None):
+    '''
+    Returns free pages to the OS with PRAGMA incremental_vacuum (all of them unless pages is given).
+    Does nothing on databases other than SQLite, or on ones still without incremental auto_vacuum
+    (see enable_incremental_vacuum). Returns the number of pages freed.
+    '''
+    engine = db.get_engine()
+    if engine.dialect.name != "sqlite":
+        return 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not incremental_vacuum_enabled(connection):
+            return 0
+        free_before = connection.execute(text("PRAGMA freelist_count")).scalar()
+        # executescript() steps the pragma to completion; execute() would free a single page
+        connection.connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(pages) if pages else 0});")
+        return free_before - connection.execute(text("PRAGMA freelist_count")).scalar()
+
+
+def enable_incremental_vacuum():
+    '''
+    Switches a database created before auto_vacuum was configured over to incremental auto_vacuum
+    with one full VACUUM. That rewrites the whole file and locks the database until it is done.
+    Returns False if there was nothing to do (already switched, or not SQLite).
+    '''
+    engine = db.get_engine()
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if incremental_vacuum_enabled(connection):
+            return False
+        connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        connection.execute(text("VACUUM"))
+        return True
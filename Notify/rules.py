@@ -0,0 +1,162 @@
+# rules.py
+import re
+from sqlalchemy import select
+from database_setup import Rule, Unsorted
+from operations import move_to_sorted
+import config
+
+# Rule-based auto-categorization. Every saved Rule maps a pattern to a category and an importance
+# level, and all rules are combined so a notification is classified in a single pass:
+#   keyword - whole words/phrases, ignoring case and spacing. All keywords go into one phrase
+#             dictionary that is probed while walking the notification's words once, so the cost
+#             does not grow with the number of keyword rules.
+#   regex   - case-insensitive regular expression searched in title and content. All regex rules
+#             are joined into one alternation, each in its own named group (numbered
+#             backreferences such as \1 are therefore not supported).
+#   sender  - case-insensitive regular expression matched against the title (the sender's name),
+#             combined the same way.
+#
+# The match starting earliest in the text wins and ties go to the rule with the lowest id;
+# between a sender match and a text match, the lower rule id wins.
+
+RULE_KINDS = ("keyword", "regex", "sender")
+
+_WORD = re.compile(r"\w+")
+
+
+def _rule_regex(rule):
+    '''Returns the regex source for a single rule.'''
+    if rule.kind == "keyword":
+        return r"\b" + r"\s+".join(re.escape(word) for word in rule.pattern.split()) + r"\b"
+    if rule.kind in ("regex", "sender"):
+        return rule.pattern
+    raise ValueError(f"Unknown rule kind: {rule.kind}")
+
+
+def _is_plain_phrase(pattern):
+    '''True if pattern is only words separated by whitespace (so it can live in the phrase dictionary).'''
+    return bool(pattern.split()) and _WORD.findall(pattern) == pattern.split()
+
+
+def _compile(rules):
+    if not rules:
+        return None
+    return re.compile(
+        "|".join(f"(?P<r{rule.id}>{_rule_regex(rule)})" for rule in rules),
+        re.IGNORECASE)
+
+
+class _PhraseIndex:
+    '''Dictionary of keyword phrases (as lowercase word tuples) probed in one walk over a text's words.'''
+
+    def __init__(self, rules):
+        self.phrases = {}  # first word -> [(phrase words, rule id), ...]
+        for rule in rules:  # rules arrive ordered by id, so the lowest id comes first
+            words = tuple(word.lower() for word in rule.pattern.split())
+            self.phrases.setdefault(words[0], []).append((words, rule.id))
+
+    def first_match(self, text):
+        '''Returns (offset, rule_id) of the earliest phrase in text, or None.'''
+        if not self.phrases:
+            return None
+        lowered = text.lower()
+        words = _WORD.findall(lowered)
+        if self.phrases.keys().isdisjoint(words):  # the common case: no phrase can start anywhere
+            return None
+        spans = list(_WORD.finditer(lowered))
+        for i, word in enumerate(words):
+            for phrase, rule_id in self.phrases.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    return spans[i].start(), rule_id
+        return None
+
+
+def validate_rule(kind, pattern):
+    '''Raises ValueError if a rule of this kind and pattern could not be compiled.'''
+    if kind not in RULE_KINDS:
+        raise ValueError(f"Unknown rule kind '{kind}', expected one of {', '.join(RULE_KINDS)}")
+    try:
+        _compile([Rule(id=0, kind=kind, pattern=pattern)])  # compiled the way RuleMatcher combines it
+    except re.error as e:
+        raise ValueError(f"Invalid pattern {pattern!r}: {e}")
+
+
+class RuleMatcher:
+    '''All rules compiled into combined matchers; classify() picks the winning rule for a notification.'''
+
+    def __init__(self, rules):
+        rules = sorted(rules, key=lambda rule: rule.id)
+        self.rules = {rule.id: rule for rule in rules}
+        phrases = [rule for rule in rules if rule.kind == "keyword" and _is_plain_phrase(rule.pattern)]
+        self._phrases = _PhraseIndex(phrases)
+        self._sender = _compile([rule for rule in rules if rule.kind == "sender"])
+        self._text = _compile([rule for rule in rules if rule.kind != "sender" and rule not in phrases])
+
+    @classmethod
+    def from_database(cls, session):
+        return cls(session.query(Rule).order_by(Rule.id).all())
+
+    @staticmethod
+    def _first_match(regex, value):
+        match = regex.search(value) if regex is not None else None
+        return (match.start(), int(match.lastgroup[1:])) if match else None
+
+    def classify(self, title, content):
+        '''Returns the Rule that applies to a notification, or None if no rule matches.'''
+        text = f"{title}\n{content}"
+        candidates = []
+        text_matches = [match for match in (self._phrases.first_match(text), self._first_match(self._text, text)) if match]
+        if text_matches:
+            candidates.append(min(text_matches)[1])  # earliest offset, then lowest rule id
+        sender = self._first_match(self._sender, title)
+        if sender:
+            candidates.append(sender[1])
+        return self.rules[min(candidates)] if candidates else None
+
+
+def classify_backlog(session, matcher, page_size=1000):
+    '''
+    Classifies every unsorted notification in one streamed pass over plain rows (no ORM objects).
+    Yields (row, rule) for each notification some rule matches; row has id, title, content and fingerprint.
+    '''
+    unsorted = Unsorted.__table__
+    rows = session.execute(
+        select(unsorted.c.id, unsorted.c.title, unsorted.c.content, unsorted.c.fingerprint)
+        .order_by(unsorted.c.id)
+        .execution_options(yield_per=page_size))
+    for row in rows:
+        rule = matcher.classify(row.title, row.content)
+        if rule is not None:
+            yield row, rule
+
+
+def apply_rules(session, dry_run=False, batch_size=1000):
+    '''
+    Classifies the whole unsorted backlog with the saved rules and moves every match to the
+    sorted table with set-based moves (one batch per rule) inside the caller's transaction.
+    Returns {category name: number of notifications moved} (or that would be moved, with dry_run).
+    '''
+    matcher = RuleMatcher.from_database(session)
+    category_names = {rule.id: rule.category.name for rule in matcher.rules.values()}
+    moves = {}  # rule id -> ids of the unsorted notifications it matched
+    summary = {}
+    for notification, rule in classify_backlog(session, matcher, batch_size):
+        summary[category_names[rule.id]] = summary.get(category_names[rule.id], 0) + 1
+        moves.setdefault(rule.id, []).append(notification.id)
+    if dry_run:
+        return summary
+    for rule_id, ids in moves.items():
+        rule = matcher.rules[rule_id]
+        move_to_sorted(session, ids, rule.category_id, rule.importance_level, rule.note)
+    return summary
+
+
+def add_rule(session, kind, pattern, category_id, importance_level, note=None):
+    '''Validates and saves a new rule. Returns the Rule.'''
+    validate_rule(kind, pattern)
+    if importance_level not in config.IMPORTANCE_LEVELS:
+        raise ValueError(f"Invalid importance level: {importance_level}")
+    rule = Rule(kind=kind, pattern=pattern, category_id=category_id, importance_level=importance_level, note=note)
+    session.add(rule)
+    session.flush()
+    return rule
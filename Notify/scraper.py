@@ -7,15 +7,52 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from database_setup import Unsorted
-from utils import session_scope
+from pipeline import ingest_source
+from scroller import ScrollStats, scroll_batches
+from sources import NotificationSource, SourceError, NOTIFICATION_ITEM_XPATH, NOTIFICATION_ITEM_SELECTOR
 import config
-import time
+import profiling
 
-def setup_driver():
+NOTIFICATIONS_URL = "https://www.linkedin.com/notifications/?filter=all"
+
+# Pulls every notification (from index arguments[0] on) out of the page in a single WebDriver
+# round trip. Mirrors the per-element extraction below: the first <strong> is the title and the
+# non-empty text of every <span> is joined into the content.
+EXTRACT_NOTIFICATIONS_JS = """
+const items = Array.from(document.querySelectorAll("div[data-finite-scroll-hotkey-item]")).slice(arguments[0] || 0);
+return items.map((item) => {
+    const strong = item.querySelector("strong");
+    const spans = Array.from(item.querySelectorAll("span"), (span) => (span.innerText || "").trim());
+    const urnHolder = item.querySelector("[data-urn]") || item.closest("[data-urn]");
+    const time = item.querySelector("time");
+    return {
+        title: strong ? (strong.innerText || "").trim() : "General Notification",
+        content: spans.filter((text) => text !== "").join(" "),
+        source_id: urnHolder ? urnHolder.getAttribute("data-urn") : null,
+        source_time: time ? time.getAttribute("datetime") : null,
+    };
+});
+"""
+
+def setup_driver(headless=None, profile_dir=None):
+    '''
+    Starts Chrome tuned for scraping: headless (unless config.HEADLESS is False), no images,
+    no extensions, and an "eager" page-load strategy that returns once the DOM is ready.
+    profile_dir is a persistent user-data directory so cookies (and the LinkedIn login) survive restarts.
+    '''
+    headless = config.HEADLESS if headless is None else headless
     chrome_options = Options()
-    # Uncomment the next line to run Chrome in headless mode
-    # chrome_options.add_argument("--headless")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_experimental_option(
+        "prefs", {"profile.managed_default_content_settings.images": 2})
+    chrome_options.page_load_strategy = "eager"
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
     service = Service(config.CHROME_DRIVER_PATH)
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
@@ -39,49 +76,116 @@ def login_to_linkedin(driver, email, password):
         print("Login failed.")
         return False
 
-def fetch_notifications(driver):
-    with session_scope() as session:
-        driver.get("https://www.linkedin.com/notifications/?filter=all")
-        last_height = driver.execute_script(
-            "return document.body.scrollHeight")
-        while True:
-            driver.execute_script(
-                "window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Sleep to allow page to load
-            new_height = driver.execute_script(
-                "return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+def extract_notifications_js(driver, start=0):
+    '''
+    Extracts every notification on the page (from index start on) with one execute_script call.
+    Returns a list of dicts with title, content, source_id and source_time keys.
+    '''
+    return driver.execute_script(EXTRACT_NOTIFICATIONS_JS, start) or []
 
+def extract_notifications_webdriver(driver, start=0):
+    '''
+    Extracts notifications element by element through WebDriver calls.
+    Several HTTP round trips per notification; kept for comparison and as a fallback.
+    Returns the same keys as extract_notifications_js, so both modes fingerprint a notification alike.
+    '''
+    records = []
+    for notification in driver.find_elements(By.XPATH, NOTIFICATION_ITEM_XPATH)[start:]:
         try:
-            # Wait for the notifications to be present
-            WebDriverWait(driver, 10).until(
+            title = notification.find_element(By.XPATH, ".//strong").text.strip() if notification.find_elements(
+                By.XPATH, ".//strong") else "General Notification"
+            content_elements = notification.find_elements(
+                By.XPATH, ".//span")
+            content = " ".join(
+                [elem.text.strip() for elem in content_elements if elem.text.strip() != ""])
+            urn_holders = (notification.find_elements(By.XPATH, ".//*[@data-urn]")
+                           or notification.find_elements(By.XPATH, "ancestor-or-self::*[@data-urn][1]"))
+            times = notification.find_elements(By.XPATH, ".//time")
+            records.append({
+                "title": title,
+                "content": content,
+                "source_id": urn_holders[0].get_attribute("data-urn") if urn_holders else None,
+                "source_time": times[0].get_attribute("datetime") if times else None,
+            })
+        except Exception as e:
+            print(f"Error processing notification: {e}")
+            continue
+    return records
+
+EXTRACTORS = {
+    "js": extract_notifications_js,
+    "webdriver": extract_notifications_webdriver,
+}
+
+def extract_notifications(driver, mode=None, start=0):
+    '''Extracts notifications using the extractor named by mode (defaults to config.EXTRACTION_MODE).'''
+    return EXTRACTORS[mode or config.EXTRACTION_MODE](driver, start)
+
+class LinkedInSource(NotificationSource):
+    '''
+    The live LinkedIn notifications page, scrolled with Selenium. Items are extracted as each
+    scroll loads them; scrolling stops at max_items, at the since_last_seen item, or when the
+    feed stops growing, and at most once every scroll_interval seconds. stats is the ScrollStats
+    of the current run.
+    '''
+
+    name = "linkedin"
+
+    def __init__(self, driver, max_items=None, since_last_seen=None, scroll_interval=0, extraction_mode=None):
+        self.driver = driver
+        self.max_items = max_items
+        self.since_last_seen = since_last_seen
+        self.scroll_interval = scroll_interval
+        self.extraction_mode = extraction_mode
+        self.stats = ScrollStats()
+
+    def batches(self):
+        self.stats = ScrollStats()
+        self.driver.get(NOTIFICATIONS_URL)
+        try:
+            # Wait for the first notifications to be present
+            WebDriverWait(self.driver, 10).until(
                 EC.presence_of_all_elements_located(
-                    (By.XPATH, "//div[@data-finite-scroll-hotkey-item]"))
+                    (By.XPATH, NOTIFICATION_ITEM_XPATH))
             )
-            notifications = driver.find_elements(
-                By.XPATH, "//div[@data-finite-scroll-hotkey-item]")
-
-            for notification in notifications:
-                try:
-                    title = notification.find_element(By.XPATH, ".//strong").text if notification.find_elements(
-                        By.XPATH, ".//strong") else "General Notification"
-                    content_elements = notification.find_elements(
-                        By.XPATH, ".//span")
-                    content = " ".join(
-                        [elem.text for elem in content_elements if elem.text.strip() != ""])
-                    new_notification = Unsorted(title=title, content=content)
-                    session.add(new_notification)
-                except Exception as e:
-                    print(f"Error processing notification: {e}")
-                    continue
-
-            session.commit()
-            print(
-                f"Notifications fetched and saved successfully. Total: {len(notifications)}")
         except TimeoutException:
-            print("Failed to load notifications.")
+            raise SourceError("Failed to load notifications.")
+        for start, end in scroll_batches(self.driver, NOTIFICATION_ITEM_SELECTOR, self.max_items,
+                                         self.since_last_seen, self.scroll_interval, self.stats):
+            with profiling.span("extract", "scrape", items=end - start):
+                batch = extract_notifications(self.driver, self.extraction_mode, start)[:end - start]
+            yield batch
+        self.stop_reason = self.stats.stop_reason
+
+def fetch_notifications(driver, max_items=None, since_last_seen=None, account_id=None, scroll_interval=0):
+    '''
+    Loads the notifications page, scrolls until the feed stops growing (or max_items / since_last_seen
+    is reached), and saves the new notifications to the unsorted table.
+    Items are extracted as each scroll loads them and written by a background IngestWriter
+    (see pipeline.ingest_source) while scrolling continues; scrolling stops early once
+    config.KNOWN_RUN_LIMIT consecutive items are already in the database.
+    since_last_seen is the source_id of the newest notification saved by a previous run; it and
+    everything older than it are skipped.
+    account_id tags the saved rows with the account they were fetched for, and scroll_interval
+    rate-limits scrolling to at most one scroll every that many seconds.
+    Returns the ScrollStats of the run, or None if the page failed to load.
+    '''
+    source = LinkedInSource(driver, max_items=max_items, since_last_seen=since_last_seen,
+                            scroll_interval=scroll_interval)
+    try:
+        with profiling.span("fetch", "scrape", account=account_id):
+            writer, stop_reason = ingest_source(source, max_items, since_last_seen, account_id)
+    except SourceError as e:
+        print(e)
+        return None
+    stats = source.stats
+    stats.saved = writer.inserted
+    stats.stop_reason = stop_reason or stats.stop_reason
+    print(
+        f"Notifications fetched and saved successfully. New: {writer.inserted}, already stored: {writer.received - writer.inserted}")
+    print(f"Scrolling: {stats.summary()}")
+    print(f"Writing: {writer.summary()}")
+    return stats
 
 def main():
     driver = setup_driver()
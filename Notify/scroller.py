@@ -0,0 +1,103 @@
+# scroller.py
+import time
+import config
+import profiling
+
+# Scrolls to the bottom of the feed and resolves as soon as the number of items grows
+# (watched with a MutationObserver), the last-seen item shows up, or timeoutMs passes.
+SCROLL_AND_WAIT_JS = """
+const [selector, previous, timeoutMs, lastSeen] = arguments;
+const done = arguments[arguments.length - 1];
+const count = () => document.querySelectorAll(selector).length;
+const seen = () => lastSeen !== null && document.querySelector(`[data-urn="${CSS.escape(lastSeen)}"]`) !== null;
+window.scrollTo(0, document.body.scrollHeight);
+if (count() > previous || seen()) {
+    done({count: count(), seen: seen()});
+    return;
+}
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (count() > previous || seen()) finish();
+});
+const finish = () => {
+    observer.disconnect();
+    clearTimeout(timer);
+    done({count: count(), seen: seen()});
+};
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(finish, timeoutMs);
+"""
+
+COUNT_ITEMS_JS = "return document.querySelectorAll(arguments[0]).length;"
+
+
+class ScrollStats:
+    '''What a scroll_batches() run did and how long it spent waiting on the page.'''
+
+    def __init__(self):
+        self.scrolls = 0
+        self.items = 0
+        self.time_waiting = 0.0  # seconds spent inside the wait-for-new-items script
+        self.time_throttled = 0.0  # seconds slept to respect the scroll rate limit
+        self.saved = 0  # new rows the fetch wrote to the database
+        self.stop_reason = None  # 'max_items', 'last_seen', 'end_of_feed' or whatever on_new_items returned
+
+    def summary(self):
+        return (f"{self.items} items after {self.scrolls} scrolls, "
+                f"{self.time_waiting:.2f}s waiting ({self.stop_reason})")
+
+
+def scroll_batches(driver, item_selector, max_items=None, since_last_seen=None, min_interval=0, stats=None):
+    '''
+    Scrolls an infinite feed until it stops growing or a stop condition is met, yielding the
+    (start, end) index range of every newly loaded batch of items (the initial page included).
+    The consumer can stop early by simply no longer iterating.
+    Each scroll waits only until new items appear. When none do, the wait is retried with an
+    exponentially longer timeout (config.SCROLL_TIMEOUT up to config.SCROLL_MAX_TIMEOUT) before
+    the end of the feed is assumed.
+    Args:
+        driver: the Selenium WebDriver showing the feed.
+        item_selector (str): CSS selector matching one feed item.
+        max_items (int): stop once at least this many items are loaded.
+        since_last_seen (str): data-urn of the newest item from the previous run; stop once it is loaded.
+        min_interval (float): rate limit, the least number of seconds between the starts of two scrolls.
+        stats (ScrollStats): updated as scrolling goes on (a new one is used if not given).
+    '''
+    stats = stats if stats is not None else ScrollStats()
+    driver.set_script_timeout(config.SCROLL_MAX_TIMEOUT + 5)
+    count = stats.items = driver.execute_script(COUNT_ITEMS_JS, item_selector)
+    timeout = config.SCROLL_TIMEOUT
+    last_scroll = None
+    if count:
+        yield 0, count
+    while True:
+        if max_items and count >= max_items:
+            stats.stop_reason = "max_items"
+            return
+        if min_interval and last_scroll is not None:
+            pause = last_scroll + min_interval - time.perf_counter()
+            if pause > 0:
+                with profiling.span("throttle", "scrape"):
+                    time.sleep(pause)
+                stats.time_throttled += pause
+        start = last_scroll = time.perf_counter()
+        result = driver.execute_async_script(
+            SCROLL_AND_WAIT_JS, item_selector, count, int(timeout * 1000), since_last_seen)
+        stats.time_waiting += time.perf_counter() - start
+        profiling.record("scroll", "scrape", start, time.perf_counter() - start,
+                         timeout_ms=int(timeout * 1000), items=result["count"])
+        stats.scrolls += 1
+        previous, count = count, result["count"]
+        stats.items = count
+        if count > previous:
+            yield previous, count
+        if result["seen"]:
+            stats.stop_reason = "last_seen"
+            return
+        if count > previous:
+            timeout = config.SCROLL_TIMEOUT
+            continue
+        if timeout >= config.SCROLL_MAX_TIMEOUT:
+            stats.stop_reason = "end_of_feed"
+            return
+        timeout = min(timeout * config.SCROLL_BACKOFF, config.SCROLL_MAX_TIMEOUT)
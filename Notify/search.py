@@ -0,0 +1,132 @@
+# search.py
+import re
+from sqlalchemy import text
+
+# Full-text search over notification titles, contents and notes, backed by an SQLite FTS5 table.
+# Both the unsorted and the sorted table feed the same index; triggers keep it in sync on every
+# insert, update and delete. FTS rowids encode where a row lives: unsorted id n is stored as
+# rowid 2n and sorted id n as rowid 2n+1, so a trigger can find its index entry by rowid.
+
+FTS_TABLE = "notification_fts"
+
+SEARCH_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, note,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS unsorted_fts_insert AFTER INSERT ON unsorted BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, note) VALUES (new.id * 2, new.title, new.content, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS unsorted_fts_delete AFTER DELETE ON unsorted BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 2;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS unsorted_fts_update AFTER UPDATE ON unsorted BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 2;
+        INSERT INTO {FTS_TABLE}(rowid, title, content, note) VALUES (new.id * 2, new.title, new.content, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_fts_insert AFTER INSERT ON sorted BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, note)
+        VALUES (new.id * 2 + 1, new.title, new.content, coalesce(new.note, ''));
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_fts_delete AFTER DELETE ON sorted BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 2 + 1;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_fts_update AFTER UPDATE ON sorted BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 2 + 1;
+        INSERT INTO {FTS_TABLE}(rowid, title, content, note)
+        VALUES (new.id * 2 + 1, new.title, new.content, coalesce(new.note, ''));
+    END""",
+]
+
+# Rebuilds the index from scratch (used the first time the index is created on an existing database)
+REBUILD_SEARCH_INDEX = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""INSERT INTO {FTS_TABLE}(rowid, title, content, note)
+        SELECT id * 2, title, content, '' FROM unsorted""",
+    f"""INSERT INTO {FTS_TABLE}(rowid, title, content, note)
+        SELECT id * 2 + 1, title, content, coalesce(note, '') FROM sorted""",
+]
+
+# bm25 column weights: a hit in the title counts more than one in the note or the content
+RANK = f"bm25({FTS_TABLE}, 10.0, 1.0, 4.0)"
+
+
+def install_search_index(connection):
+    '''
+    Creates the FTS5 table and its triggers if they are missing, filling the index from the
+    existing rows the first time. Does nothing on databases other than SQLite.
+    '''
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE}).first()
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    if not exists:
+        for statement in REBUILD_SEARCH_INDEX:
+            connection.execute(text(statement))
+
+
+def build_match_query(query, prefix=False):
+    '''
+    Turns free text into an FTS5 MATCH expression in which every word must appear.
+    Words are quoted so punctuation can't break the query syntax; a trailing '*' on a word
+    (or prefix=True for every word) makes it a prefix match.
+    '''
+    terms = []
+    for word, star in re.findall(r"(\w+)(\*?)", query):
+        terms.append(f'"{word}"' + ("*" if star or prefix else ""))
+    return " ".join(terms)
+
+
+def search(session, query, prefix=False, sorted_only=False, category_id=None, importance_level=None, limit=20):
+    '''
+    Full-text search over unsorted and sorted notifications, best matches first.
+    category_id / importance_level filter on the sorted table (and so imply sorted_only).
+    Returns a list of dicts with kind ('unsorted' or 'sorted'), id, title, snippet, rank
+    and, for sorted notifications, category and importance_level.
+    '''
+    match = build_match_query(query, prefix)
+    if not match:
+        return []
+    sorted_only = sorted_only or category_id is not None or importance_level is not None
+    conditions = [f"{FTS_TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit}
+    if sorted_only:
+        conditions.append(f"{FTS_TABLE}.rowid % 2 = 1")
+    if category_id is not None:
+        conditions.append("sorted.category_id = :category_id")
+        params["category_id"] = category_id
+    if importance_level is not None:
+        conditions.append("sorted.importance_level = :importance_level")
+        params["importance_level"] = importance_level
+    statement = text(f"""
+        SELECT {FTS_TABLE}.rowid AS fts_rowid,
+               {FTS_TABLE}.title AS title,
+               snippet({FTS_TABLE}, -1, '[', ']', '...', 12) AS snippet,
+               {RANK} AS rank,
+               category.name AS category,
+               sorted.importance_level AS importance_level
+        FROM {FTS_TABLE}
+        LEFT JOIN sorted ON {FTS_TABLE}.rowid % 2 = 1 AND sorted.id = {FTS_TABLE}.rowid / 2
+        LEFT JOIN category ON category.id = sorted.category_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY rank
+        LIMIT :limit
+    """)
+    results = []
+    for row in session.execute(statement, params).mappings():
+        is_sorted = row["fts_rowid"] % 2 == 1
+        result = {
+            "kind": "sorted" if is_sorted else "unsorted",
+            "id": row["fts_rowid"] // 2,
+            "title": row["title"],
+            "snippet": row["snippet"],
+            "rank": row["rank"],
+        }
+        if is_sorted:
+            result.update(category=row["category"], importance_level=row["importance_level"])
+        results.append(result)
+    return results
@@ -0,0 +1,150 @@
+# sources.py
+import os
+import time
+from datetime import datetime, timedelta
+
+try:
+    import lxml.html
+except ImportError:  # optional: only HtmlSource needs it (pip install lxml)
+    lxml = None
+try:
+    import requests
+except ImportError:  # optional: HtmlSource can still read saved pages from disk without it
+    requests = None
+
+# Notification sources. Anything that produces scraped notifications implements the
+# NotificationSource interface, and pipeline.ingest_source() saves what it yields, so the
+# ingestion side doesn't care where records come from:
+#   LinkedInSource  (scraper.py) - the live notifications page through Selenium
+#   HtmlSource                   - saved copies of that page (files or URLs), parsed with lxml
+#   SyntheticSource              - generated notifications at a configurable rate, for load tests
+
+# markup of one notification on the LinkedIn notifications page
+NOTIFICATION_ITEM_XPATH = "//div[@data-finite-scroll-hotkey-item]"
+NOTIFICATION_ITEM_SELECTOR = "div[data-finite-scroll-hotkey-item]"
+
+
+class SourceError(Exception):
+    '''Raised by a source that could not produce any notifications (e.g. the page failed to load).'''
+
+
+class NotificationSource:
+    '''
+    Base class of notification sources. batches() yields lists of records, newest first. A record
+    is a dict with title and content plus source_id (a stable id at the source) and source_time
+    (ISO timestamp at the source), either of which may be None. Iterating a source yields single
+    records. Sources are context managers; close() releases whatever the source holds.
+    '''
+
+    name = "source"
+    stop_reason = None  # why batches() ended by itself, e.g. 'end_of_feed'
+
+    def batches(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def parse_notifications_html(html):
+    '''
+    Extracts the notifications from the HTML of the notifications page. Mirrors the scraper's
+    EXTRACT_NOTIFICATIONS_JS: the first <strong> is the title and the non-empty text of every
+    <span> is joined into the content.
+    '''
+    if lxml is None:
+        raise SourceError("Parsing saved pages needs lxml (pip install lxml).")
+    records = []
+    for item in lxml.html.fromstring(html).xpath(NOTIFICATION_ITEM_XPATH):
+        strong = item.xpath(".//strong")
+        spans = (" ".join(span.text_content().split()) for span in item.xpath(".//span"))
+        urns = item.xpath(".//*[@data-urn]/@data-urn") or item.xpath("ancestor-or-self::*[@data-urn][1]/@data-urn")
+        times = item.xpath(".//time/@datetime")
+        records.append({
+            "title": " ".join(strong[0].text_content().split()) if strong else "General Notification",
+            "content": " ".join(text for text in spans if text),
+            "source_id": urns[0] if urns else None,
+            "source_time": times[0] if times else None,
+        })
+    return records
+
+
+class HtmlSource(NotificationSource):
+    '''
+    Reads saved notifications pages, one batch per page. Pages are file paths or http(s) URLs;
+    URLs are downloaded with requests (session may carry cookies or headers).
+    '''
+
+    name = "html"
+
+    def __init__(self, pages, session=None, timeout=30):
+        self.pages = list(pages)
+        self.session = session
+        self.timeout = timeout
+
+    def _read(self, page):
+        if page.startswith(("http://", "https://")):
+            if requests is None:
+                raise SourceError("Downloading pages needs requests (pip install requests).")
+            response = (self.session or requests).get(page, timeout=self.timeout)
+            response.raise_for_status()
+            return response.content
+        if not os.path.exists(page):
+            raise SourceError(f"No such page: {page}")
+        with open(page, "rb") as f:
+            return f.read()
+
+    def batches(self):
+        for page in self.pages:
+            yield parse_notifications_html(self._read(page))
+        self.stop_reason = "end_of_pages"
+
+
+class SyntheticSource(NotificationSource):
+    '''
+    Generates count notifications (endlessly if count is None), numbered from first on, in batches
+    of batch_size, at most rate records per second (as fast as possible if rate is None). Record n
+    always has the same source_id, source_time and text, so repeated runs produce the same
+    notifications; start from a new first to get ones that aren't stored yet.
+    '''
+
+    name = "synthetic"
+
+    def __init__(self, count=None, batch_size=10, rate=None, first=0, newest=datetime(2024, 1, 1)):
+        self.count = count
+        self.first = first
+        self.batch_size = batch_size
+        self.rate = rate
+        self.newest = newest
+
+    def record(self, n):
+        return {
+            "title": f"Person {n % 997}",
+            "content": f"Person {n % 997} reacted to your post about topic {n % 113} ({n})",
+            "source_id": f"urn:synthetic:{n}",
+            "source_time": (self.newest - timedelta(seconds=n)).isoformat() + "Z",
+        }
+
+    def batches(self):
+        start = time.perf_counter()
+        n = 0
+        while self.count is None or n < self.count:
+            size = self.batch_size if self.count is None else min(self.batch_size, self.count - n)
+            if self.rate:
+                pause = start + (n + size) / self.rate - time.perf_counter()
+                if pause > 0:
+                    time.sleep(pause)
+            yield [self.record(self.first + i) for i in range(n, n + size)]
+            n += size
+        self.stop_reason = "end_of_feed"
@@ -0,0 +1,125 @@
+# stats.py
+from datetime import datetime
+from sqlalchemy import text
+
+# Materialized counts for the summary views, so they cost O(categories) however many notifications
+# are stored. The notification_stats table holds one row per (list, category, importance level):
+# list is 'unsorted' (with category_id and importance_level 0) or 'sorted'. Every row also keeps
+# the newest fetched_at of the notifications ever counted into it, which gives the last fetch time
+# (deleting notifications doesn't turn it back).
+# Triggers keep the counts in step with every insert, delete and re-categorization, whichever
+# code path makes it (bulk moves, retention, imports, the ORM), the way search.py keeps its index.
+# On databases other than SQLite there are no triggers, and read_stats() counts the tables instead.
+
+STATS_TABLE = "notification_stats"
+
+# max() of SQLite returns NULL when any argument is NULL
+_NEWEST = "max(coalesce(last_fetched_at, excluded.last_fetched_at), coalesce(excluded.last_fetched_at, last_fetched_at))"
+
+
+def _add(list_name, category, importance):
+    return f"""INSERT INTO {STATS_TABLE} (list, category_id, importance_level, count, last_fetched_at)
+        VALUES ('{list_name}', {category}, {importance}, 1, new.fetched_at)
+        ON CONFLICT (list, category_id, importance_level)
+        DO UPDATE SET count = count + 1, last_fetched_at = {_NEWEST};"""
+
+
+def _remove(list_name, category, importance):
+    return f"""UPDATE {STATS_TABLE} SET count = count - 1
+        WHERE list = '{list_name}' AND category_id = {category} AND importance_level = {importance};"""
+
+
+STATS_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+        list VARCHAR(10) NOT NULL,
+        category_id INTEGER NOT NULL,
+        importance_level INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        last_fetched_at DATETIME,
+        PRIMARY KEY (list, category_id, importance_level)
+    ) WITHOUT ROWID""",
+    f"""CREATE TRIGGER IF NOT EXISTS unsorted_stats_insert AFTER INSERT ON unsorted BEGIN
+        {_add('unsorted', 0, 0)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS unsorted_stats_delete AFTER DELETE ON unsorted BEGIN
+        {_remove('unsorted', 0, 0)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_stats_insert AFTER INSERT ON sorted BEGIN
+        {_add('sorted', 'new.category_id', 'new.importance_level')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_stats_delete AFTER DELETE ON sorted BEGIN
+        {_remove('sorted', 'old.category_id', 'old.importance_level')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sorted_stats_update AFTER UPDATE OF category_id, importance_level ON sorted BEGIN
+        {_remove('sorted', 'old.category_id', 'old.importance_level')}
+        {_add('sorted', 'new.category_id', 'new.importance_level')}
+    END""",
+]
+
+# Recounts everything (used when the table is first created on an existing database, and by `stats --rebuild`)
+REBUILD_STATS = [
+    f"DELETE FROM {STATS_TABLE}",
+    f"""INSERT INTO {STATS_TABLE} (list, category_id, importance_level, count, last_fetched_at)
+        SELECT 'unsorted', 0, 0, count(*), max(fetched_at) FROM unsorted HAVING count(*) > 0""",
+    f"""INSERT INTO {STATS_TABLE} (list, category_id, importance_level, count, last_fetched_at)
+        SELECT 'sorted', category_id, importance_level, count(*), max(fetched_at) FROM sorted
+        GROUP BY category_id, importance_level""",
+]
+
+# The same counts straight from the notification tables, for databases without the stats table
+_COUNT_TABLES = """
+    SELECT 'unsorted' AS list, 0 AS category_id, 0 AS importance_level, count(*) AS count,
+           max(fetched_at) AS last_fetched_at
+    FROM unsorted
+    UNION ALL
+    SELECT 'sorted', category_id, importance_level, count(*), max(fetched_at)
+    FROM sorted GROUP BY category_id, importance_level"""
+
+
+def install_stats(connection):
+    '''
+    Creates the stats table and its triggers if they are missing, counting the existing rows
+    the first time. Does nothing on databases other than SQLite.
+    '''
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": STATS_TABLE}).first()
+    for statement in STATS_SCHEMA:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_stats(connection)
+
+
+def rebuild_stats(connection):
+    '''Recounts the stats table from the notification tables.'''
+    for statement in REBUILD_STATS:
+        connection.execute(text(statement))
+
+
+def _stats_rows(session):
+    source = STATS_TABLE if session.get_bind().dialect.name == "sqlite" else f"({_COUNT_TABLES}) AS counts"
+    return session.execute(text(
+        f"SELECT list, category_id, importance_level, count, last_fetched_at FROM {source}")).all()
+
+
+def _as_datetime(value):
+    # raw SQL hands SQLite DATETIME values back as strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def read_stats(session):
+    '''
+    The summary of both lists: {"unsorted": count, "sorted": count, "last_fetched_at": datetime
+    or None, "by_category": {category_id: {importance_level: count}}}.
+    '''
+    summary = {"unsorted": 0, "sorted": 0, "last_fetched_at": None, "by_category": {}}
+    for row in _stats_rows(session):
+        summary[row.list] += row.count
+        fetched_at = _as_datetime(row.last_fetched_at)
+        if fetched_at is not None and (summary["last_fetched_at"] is None or fetched_at > summary["last_fetched_at"]):
+            summary["last_fetched_at"] = fetched_at
+        if row.list == "sorted" and row.count:
+            summary["by_category"].setdefault(row.category_id, {})[row.importance_level] = row.count
+    return summary
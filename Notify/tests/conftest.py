@@ -0,0 +1,47 @@
+# conftest.py
+import pathlib
+import sys
+import pytest
+from sqlalchemy import event
+
+# The modules are imported flat (import db, import config, ...), as they are when run from Notify.
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import db
+import migrations
+from database_setup import Base, Category
+from utils import session_scope
+
+
+@pytest.fixture
+def database(tmp_path):
+    '''Points the shared engine at a fresh SQLite file in tmp_path with the schema created.'''
+    path = tmp_path / "notify_test.db"
+    db.configure(f"sqlite:///{path}")
+    Base.metadata.create_all(db.get_engine())
+    migrations.upgrade(db.get_engine(), Base.metadata)
+    yield path
+    db.configure(None)
+
+
+@pytest.fixture
+def categories(database):
+    '''Adds two categories and returns their ids.'''
+    with session_scope() as session:
+        session.add_all([Category(name="Work"), Category(name="Social")])
+    with session_scope() as session:
+        return [category.id for category in session.query(Category).order_by(Category.id)]
+
+
+@pytest.fixture
+def statements(database):
+    '''Collects the SQL statements run on the shared engine while the test runs.'''
+    executed = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = db.get_engine()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", on_execute)
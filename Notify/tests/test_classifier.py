@@ -0,0 +1,80 @@
+# test_classifier.py
+from datetime import datetime, timedelta
+import pytest
+pytest.importorskip("numpy")
+import classifier
+from database_setup import Sorted, Unsorted
+from ingest import ingest_notifications
+from utils import session_scope
+
+WORK = "Acme is hiring a senior python developer for the backend team, apply now (job {})"
+SOCIAL = "reacted to your vacation photo from the beach trip with friends ({})"
+
+
+def _sort(session, work_ids, social_ids, categories, start=datetime(2024, 1, 1)):
+    rows = [{"title": "Recruiter", "content": WORK.format(i), "category_id": categories[0], "importance_level": 4}
+            for i in work_ids]
+    rows += [{"title": "Friend", "content": SOCIAL.format(i), "category_id": categories[1], "importance_level": 1}
+             for i in social_ids]
+    for i, row in enumerate(rows):
+        row["sorted_at"] = start + timedelta(minutes=i)
+    session.execute(Sorted.__table__.insert(), rows)
+
+
+@pytest.fixture
+def trained(database, categories):
+    with session_scope() as session:
+        _sort(session, range(20), range(20), categories)
+    with session_scope() as session:
+        model, new = classifier.train(session)
+    assert new == 40
+    return model
+
+
+def test_suggests_category_and_importance(trained, categories):
+    assert trained.ready
+    work, social = trained.predict([("Recruiter", WORK.format(99)), ("Friend", SOCIAL.format(99))])
+    assert (work.category_id, work.importance_level) == (categories[0], 4)
+    assert (social.category_id, social.importance_level) == (categories[1], 1)
+    assert classifier.confidence(work) > 0.5
+
+
+def test_training_is_incremental(trained, categories):
+    with session_scope() as session:
+        assert classifier.train(session, trained) == (trained, 0)
+        _sort(session, range(20, 25), [], categories, start=datetime(2024, 2, 1))
+    with session_scope() as session:
+        model, new = classifier.train(session, trained)
+    assert new == 5
+    assert model.examples == 45
+
+
+def test_save_and_load(trained, tmp_path):
+    path = str(tmp_path / "model.npz")
+    trained.save(path)
+    loaded = classifier.Classifier.load(path)
+    texts = [("Recruiter", WORK.format(99)), ("Friend", SOCIAL.format(99))]
+    assert loaded.predict(texts) == trained.predict(texts)
+    assert loaded.trained_through == trained.trained_through
+    assert classifier.Classifier.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_removed_categories_are_not_suggested(trained, categories):
+    text = [("Recruiter", WORK.format(99))]
+    full = trained.predict(text)[0]
+    restricted = trained.predict(text, {categories[1]})[0]
+    assert restricted.category_id == categories[1]
+    # not renormalized: the model still thinks little of it
+    assert restricted.category_confidence == pytest.approx(1 - full.category_confidence, abs=1e-6)
+    assert trained.predict(text, set()) == [None]
+
+
+def test_accept_suggestions(trained, categories):
+    ingest_notifications([("Recruiter", WORK.format(100)), ("Friend", SOCIAL.format(100))])
+    with session_scope() as session:
+        assert classifier.accept_suggestions(session, trained, threshold=0.0, dry_run=True) == {"Work": 1, "Social": 1}
+        assert session.query(Unsorted).count() == 2
+        assert classifier.accept_suggestions(session, trained, threshold=0.0) == {"Work": 1, "Social": 1}
+    with session_scope() as session:
+        assert session.query(Unsorted).count() == 0
+        assert classifier.accept_suggestions(session, trained, threshold=1.01) == {}
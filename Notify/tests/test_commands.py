@@ -0,0 +1,32 @@
+# test_commands.py
+import json
+from selenium.common.exceptions import TimeoutException, WebDriverException
+import commands
+import driver_manager
+from ingest import ingest_notifications
+
+
+def _fail_with(exception):
+    def get(profile):
+        raise exception
+    return get
+
+
+def test_list_emits_json_lines(database, capsys):
+    ingest_notifications([("Jane", "liked your post"), ("John", "commented")])
+    assert commands.main(["list", "--limit", "1"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Jane"]
+
+
+def test_fetch_reports_browser_errors(database, capsys, monkeypatch):
+    discarded = []
+    monkeypatch.setattr(driver_manager.drivers, "discard", discarded.append)
+    monkeypatch.setattr(driver_manager.drivers, "get", _fail_with(WebDriverException("chrome not reachable")))
+    assert commands.main(["fetch"]) == 1
+    assert "error: Message: chrome not reachable" in capsys.readouterr().err
+    assert discarded == ["default"]
+
+    monkeypatch.setattr(driver_manager.drivers, "get", _fail_with(TimeoutException("page load")))
+    assert commands.main(["fetch"]) == 1
+    assert "error: Timed out loading LinkedIn" in capsys.readouterr().err
@@ -0,0 +1,52 @@
+# test_duplicates.py
+import pytest
+pytest.importorskip("numpy")
+import duplicates
+from database_setup import Unsorted, UnsortedBand, UnsortedSignature
+from ingest import ingest_notifications
+from utils import session_scope
+
+REACTIONS = [
+    ("Jane Doe", "Jane Doe and 12 others reacted to your post about the quarterly planning meeting"),
+    ("John Roe", "John Roe and 3 others reacted to your post about the quarterly planning meeting"),
+    ("Ann Lee", "Ann Lee and 40 others reacted to your post about the quarterly planning meeting"),
+    ("Bob Ray", "Bob Ray commented on a photo of the new office kitchen"),
+]
+
+
+def test_index_stores_signatures_and_buckets(database):
+    ingest_notifications(REACTIONS)
+    with session_scope() as session:
+        assert duplicates.index_unsorted(session) == 4
+        assert duplicates.index_unsorted(session) == 0
+        stored = duplicates._signatures_by_id(session, [1, 4])
+        assert (stored[1] == duplicates.signatures([REACTIONS[0]])[0]).all()
+        assert session.query(UnsortedSignature).count() == 4
+        assert session.query(UnsortedBand).count() == 4 * duplicates.BANDS
+
+
+def test_clusters_are_found_from_stored_signatures(database, monkeypatch):
+    ingest_notifications(REACTIONS)
+    with session_scope() as session:
+        duplicates.index_unsorted(session)
+
+    def no_hashing(texts):
+        raise AssertionError("signatures recomputed")
+
+    monkeypatch.setattr(duplicates, "signatures", no_hashing)
+    with session_scope() as session:
+        assert duplicates.find_clusters(session) == [[1, 2, 3]]
+        assert duplicates.cluster_of(session, 2) == [1, 2, 3]
+        assert duplicates.cluster_of(session, 4) == [4]
+        assert duplicates.cluster_of(session, 99) == []
+
+
+def test_deleted_notifications_leave_the_index(database):
+    ingest_notifications(REACTIONS)
+    with session_scope() as session:
+        duplicates.index_unsorted(session)
+        session.delete(session.get(Unsorted, 1))
+    with session_scope() as session:
+        assert session.query(UnsortedSignature).filter(UnsortedSignature.notification_id == 1).count() == 0
+        assert session.query(UnsortedBand).filter(UnsortedBand.notification_id == 1).count() == 0
+        assert duplicates.find_clusters(session) == [[2, 3]]
@@ -0,0 +1,70 @@
+# test_ingest.py
+from database_setup import Sorted, Unsorted
+from ingest import ingest_notifications, known_records, record_key
+from operations import move_to_sorted
+from utils import notification_fingerprint, session_scope
+
+
+def test_ingest_inserts_in_batches(database, statements):
+    records = [{"title": f"Person {i}", "content": f"Post {i}"} for i in range(1200)]
+    assert ingest_notifications(records, batch_size=500) == 1200
+    # one executemany per batch of 500
+    assert len([statement for statement in statements if statement.lstrip().upper().startswith("INSERT")]) == 3
+    with session_scope() as session:
+        assert session.query(Unsorted).count() == 1200
+
+
+def test_ingest_accepts_pairs(database):
+    assert ingest_notifications([("Jane", "liked your post"), ("John", "commented")]) == 2
+    with session_scope() as session:
+        assert [row.title for row in session.query(Unsorted).order_by(Unsorted.id)] == ["Jane", "John"]
+
+
+def test_fingerprint_collapses_whitespace():
+    assert notification_fingerprint("Jane  Doe", "liked\nyour  post ") == notification_fingerprint("Jane Doe", "liked your post")
+
+
+def test_fingerprint_depends_on_source_time():
+    assert notification_fingerprint("Jane", "liked", "2024-01-01") != notification_fingerprint("Jane", "liked", "2024-01-02")
+    assert record_key(("Jane", "liked")) == (None, notification_fingerprint("Jane", "liked"))
+
+
+def test_ingest_skips_known_notifications(database, categories):
+    assert ingest_notifications([("Jane", "liked your post"), ("Jane", "liked  your post")]) == 1
+    with session_scope() as session:
+        move_to_sorted(session, [1], categories[0], 2)
+    # already sorted, then new, then already unsorted
+    assert ingest_notifications([("Jane", "liked your post"), ("John", "commented")]) == 1
+    assert ingest_notifications([("John", "commented")]) == 0
+    with session_scope() as session:
+        assert session.query(Unsorted).count() == 1
+        assert session.query(Sorted).count() == 1
+
+
+def test_rows_stored_without_source_time_are_known(database):
+    # as fetched before source_time was hashed, or backfilled by the fingerprint migration
+    ingest_notifications([("Jane", "liked your post")])
+    scraped = [{"title": "Jane", "content": "liked your post", "source_time": "2024-01-01T10:00:00"},
+               {"title": "John", "content": "commented", "source_time": "2024-01-01T11:00:00"}]
+    with session_scope() as session:
+        assert known_records(session, scraped) == {record_key(scraped[0])}
+    assert ingest_notifications(scraped) == 1
+    with session_scope() as session:
+        assert session.query(Unsorted).count() == 2
+
+
+def test_each_account_keeps_its_own_copy(database):
+    records = [{"title": "Jane", "content": "liked your post", "source_time": "2024-01-01T10:00:00"}]
+    assert ingest_notifications([{**record, "account_id": "work"} for record in records]) == 1
+    assert ingest_notifications([{**record, "account_id": "personal"} for record in records]) == 1
+    assert ingest_notifications([{**record, "account_id": "personal"} for record in records]) == 0
+    with session_scope() as session:
+        assert sorted(row.account_id for row in session.query(Unsorted)) == ["personal", "work"]
+
+
+def test_rows_without_an_account_count_for_every_account(database):
+    # fetched before accounts existed, or from an offline source
+    ingest_notifications([("Jane", "liked your post")])
+    assert ingest_notifications([{"title": "Jane", "content": "liked your post", "account_id": "work"}]) == 0
+    ingest_notifications([{"title": "John", "content": "commented", "account_id": "work"}])
+    assert ingest_notifications([("John", "commented")]) == 0
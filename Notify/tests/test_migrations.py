@@ -0,0 +1,76 @@
+# test_migrations.py
+from sqlalchemy import inspect, text
+import db
+import migrations
+import stats
+from database_setup import Base
+from search import search
+from utils import notification_fingerprint, session_scope
+
+# the tables as they were before the first migration
+OLD_SCHEMA = [
+    "CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL)",
+    "CREATE TABLE unsorted (id INTEGER PRIMARY KEY, title VARCHAR(250) NOT NULL, content TEXT NOT NULL)",
+    """CREATE TABLE sorted (id INTEGER PRIMARY KEY, title VARCHAR(250) NOT NULL, content TEXT NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES category (id), importance_level INTEGER NOT NULL, note TEXT,
+        notification_id INTEGER REFERENCES unsorted (id))""",
+    "INSERT INTO category (name) VALUES ('Work')",
+    "INSERT INTO unsorted (title, content) VALUES ('Jane', 'liked your post'), ('Jane', 'liked your post')",
+    "INSERT INTO sorted (title, content, category_id, importance_level) VALUES ('John', 'shared an article', 1, 3)",
+]
+
+
+def _old_database(tmp_path):
+    db.configure(f"sqlite:///{tmp_path / 'old.db'}")
+    with db.get_engine().begin() as connection:
+        for statement in OLD_SCHEMA:
+            connection.execute(text(statement))
+
+
+def _upgrade():
+    # what setup_database() does for a database behind HEAD
+    Base.metadata.create_all(db.get_engine())
+    return migrations.upgrade(db.get_engine(), Base.metadata)
+
+
+def test_new_database_is_at_head(database):
+    with db.get_engine().connect() as connection:
+        assert migrations.current_version(connection) == migrations.HEAD
+    assert migrations.upgrade(db.get_engine(), Base.metadata) == []
+
+
+def test_upgrade_old_database(tmp_path):
+    _old_database(tmp_path)
+    try:
+        applied = _upgrade()
+        assert [number for number, _ in applied] == list(range(1, migrations.HEAD + 1))
+        with db.get_engine().connect() as connection:
+            assert migrations.current_version(connection) == migrations.HEAD
+            columns = {column["name"] for column in inspect(connection).get_columns("sorted")}
+            assert {"fingerprint", "fetched_at", "sorted_at", "account_id"} <= columns
+            # only the first of the two duplicate rows keeps the fingerprint
+            fingerprints = connection.execute(text("SELECT fingerprint FROM unsorted ORDER BY id")).scalars().all()
+            assert fingerprints == [notification_fingerprint("Jane", "liked your post"), None]
+        with session_scope() as session:
+            assert search(session, "article")[0]["title"] == "John"
+            summary = stats.read_stats(session)
+            assert (summary["unsorted"], summary["sorted"]) == (2, 1)
+    finally:
+        db.configure(None)
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    _old_database(tmp_path)
+    try:
+        _upgrade()
+        assert _upgrade() == []
+        # a step that runs again (e.g. after an interrupted upgrade) changes nothing
+        with db.get_engine().begin() as connection:
+            for _, _, step in migrations.MIGRATIONS:
+                step(connection, Base.metadata)
+        with session_scope() as session:
+            summary = stats.read_stats(session)
+            assert (summary["unsorted"], summary["sorted"]) == (2, 1)
+            assert len(search(session, "liked")) == 2
+    finally:
+        db.configure(None)
@@ -0,0 +1,68 @@
+# test_pipeline.py
+import threading
+import pytest
+from database_setup import Unsorted
+from pipeline import IngestWriter, ingest_source
+from sources import SyntheticSource
+from utils import session_scope
+
+
+def test_known_run_only_counts_the_same_account(database):
+    writer, stop_reason = ingest_source(SyntheticSource(count=50), account_id="work")
+    assert (writer.inserted, stop_reason) == (50, None)
+    # the same feed seen by another account is all new to it
+    writer, stop_reason = ingest_source(SyntheticSource(count=50), account_id="personal")
+    assert (writer.inserted, stop_reason) == (50, None)
+    writer, stop_reason = ingest_source(SyntheticSource(count=50), account_id="personal")
+    assert (writer.inserted, stop_reason) == (0, "known_items")
+    with session_scope() as session:
+        assert session.query(Unsorted).filter(Unsorted.account_id == "personal").count() == 50
+
+
+def test_writer_saves_every_batch(database):
+    with IngestWriter(max_pending=2) as writer:
+        for batch in SyntheticSource(count=95).batches():
+            writer.put(batch)
+        writer.put([])
+    assert (writer.received, writer.inserted) == (95, 95)
+    assert 1 <= writer.writes <= 10
+    with session_scope() as session:
+        assert session.query(Unsorted).count() == 95
+
+
+def test_writer_merges_queued_batches():
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def slow_ingest(records):
+        started.set()
+        release.wait(5)
+        written.append(len(records))
+        return len(records)
+
+    with IngestWriter(ingest=slow_ingest) as writer:
+        writer.put([{"n": 0}])
+        started.wait(5)  # the first batch is being written
+        for n in range(1, 5):
+            writer.put([{"n": n}])
+        release.set()
+    assert written == [1, 4]
+    assert writer.writes == 2
+
+
+def test_writer_errors_are_raised():
+    def failing_ingest(records):
+        raise ValueError("database is locked")
+
+    writer = IngestWriter(ingest=failing_ingest)
+    writer.put([{"n": 0}])
+    with pytest.raises(RuntimeError) as raised:
+        writer.close()
+    assert isinstance(raised.value.__cause__, ValueError)
+
+
+def test_source_stops_at_the_last_seen_item_and_max_items(database):
+    writer, stop_reason = ingest_source(SyntheticSource(count=50), since_last_seen="urn:synthetic:12")
+    assert (writer.inserted, stop_reason) == (12, "last_seen")
+    writer, stop_reason = ingest_source(SyntheticSource(count=50, first=100), max_items=25)
+    assert (writer.inserted, stop_reason) == (25, "max_items")
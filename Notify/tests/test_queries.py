@@ -0,0 +1,68 @@
+# test_queries.py
+from database_setup import Sorted, Unsorted
+from ingest import ingest_notifications
+from operations import move_to_sorted
+from queries import SORTED_LOAD_OPTIONS, category_counts, get_by_ordinal, iter_pages, keyset_page
+from utils import session_scope
+
+
+def _ingest(count):
+    ingest_notifications({"title": f"Person {i}", "content": f"Post number {i}"} for i in range(count))
+
+
+def _selects(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+def test_sorted_pages_load_categories_in_the_same_select(database, categories, statements):
+    _ingest(25)
+    with session_scope() as session:
+        move_to_sorted(session, range(1, 26), categories[0], 3)
+    with session_scope() as session:
+        statements.clear()
+        pages = list(iter_pages(session, Sorted, page_size=10, options=SORTED_LOAD_OPTIONS))
+        names = {row.category.name for page in pages for row in page}
+        # three full or partial pages plus the empty one that ends the iteration
+        assert len(_selects(statements)) == 4
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert names == {"Work"}
+
+
+def test_category_counts(database, categories):
+    _ingest(6)
+    with session_scope() as session:
+        move_to_sorted(session, [1, 2, 3], categories[0], 1)
+        move_to_sorted(session, [4], categories[1], 2)
+    with session_scope() as session:
+        assert [(category.name, count) for category, count in category_counts(session)] == [("Work", 3), ("Social", 1)]
+
+
+def test_ordinals_survive_deleted_rows(database):
+    _ingest(5)
+    with session_scope() as session:
+        session.delete(session.get(Unsorted, 2))
+    with session_scope() as session:
+        assert get_by_ordinal(session, Unsorted, 2).title == "Person 2"
+        assert get_by_ordinal(session, Unsorted, 2).id == 3
+        assert get_by_ordinal(session, Unsorted, 5) is None
+
+
+def test_keyset_page_is_one_select(database, statements):
+    _ingest(25)
+    with session_scope() as session:
+        statements.clear()
+        page = keyset_page(session, Unsorted, limit=10)
+        assert [row.title for row in page] == [f"Person {i}" for i in range(10)]
+        assert len(_selects(statements)) == 1
+
+
+def test_pages_continue_after_the_last_id(database):
+    _ingest(15)
+    with session_scope() as session:
+        session.delete(session.get(Unsorted, 11))
+    with session_scope() as session:
+        first = keyset_page(session, Unsorted, limit=10)
+        second = keyset_page(session, Unsorted, after_id=first[-1].id, limit=10)
+        assert [row.id for row in second] == [12, 13, 14, 15]
+        pages = list(iter_pages(session, Unsorted, page_size=4))
+        assert [len(page) for page in pages] == [4, 4, 4, 2]
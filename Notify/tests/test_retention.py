@@ -0,0 +1,71 @@
+# test_retention.py
+import gzip
+import json
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import db
+import migrations
+import retention
+from database_setup import Base, Unsorted
+from ingest import ingest_notifications
+from utils import session_scope
+
+
+def _age_rows(ids, days):
+    with session_scope() as session:
+        for notification in session.query(Unsorted).filter(Unsorted.id.in_(ids)):
+            notification.fetched_at = datetime.utcnow() - timedelta(days=days)
+
+
+def test_parse_age():
+    assert retention.parse_age("90d") == timedelta(days=90)
+    assert retention.parse_age(" 12H ") == timedelta(hours=12)
+    assert retention.parse_age("2w") == timedelta(weeks=2)
+    with pytest.raises(ValueError):
+        retention.parse_age("soon")
+
+
+def test_purge_archives_each_row_once(database, tmp_path):
+    ingest_notifications((f"Person {i}", f"Post {i}") for i in range(10))
+    _age_rows(range(1, 8), days=100)
+    archive = tmp_path / "archive.jsonl.gz"
+    assert retention.purge_older_than(Unsorted, timedelta(days=90), archive_path=archive, chunk_size=3) == 7
+    # a second run finds nothing left to purge and archives nothing more
+    assert retention.purge_older_than(Unsorted, timedelta(days=90), archive_path=archive, chunk_size=3) == 0
+    with gzip.open(archive, "rt", encoding="utf-8") as lines:
+        archived = [json.loads(line) for line in lines]
+    assert sorted(row["id"] for row in archived) == list(range(1, 8))
+    assert {row["table"] for row in archived} == {"unsorted"}
+    with session_scope() as session:
+        assert [row.id for row in session.query(Unsorted).order_by(Unsorted.id)] == [8, 9, 10]
+
+
+def _fill_and_empty(first):
+    ingest_notifications((f"Person {i}", "x" * 2000) for i in range(first, first + 200))
+    with session_scope() as session:
+        session.query(Unsorted).delete()
+
+
+def test_reclaim_space(database):
+    _fill_and_empty(0)
+    assert retention.reclaim_space() > 0
+    assert retention.enable_incremental_vacuum() is False
+
+
+def test_reclaim_space_waits_for_explicit_vacuum(tmp_path):
+    # a database created before auto_vacuum was configured: the pragma no longer applies once it has tables
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE placeholder (id INTEGER)")
+    db.configure(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(db.get_engine())
+        migrations.upgrade(db.get_engine(), Base.metadata)
+        _fill_and_empty(0)
+        assert retention.reclaim_space() == 0
+        assert retention.enable_incremental_vacuum() is True
+        _fill_and_empty(200)
+        assert retention.reclaim_space() > 0
+    finally:
+        db.configure(None)
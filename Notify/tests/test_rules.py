@@ -0,0 +1,53 @@
+# test_rules.py
+import pytest
+from database_setup import Rule, Sorted, Unsorted
+from ingest import ingest_notifications
+from rules import RuleMatcher, add_rule, apply_rules, validate_rule
+from utils import session_scope
+
+
+def _matcher(*rules):
+    return RuleMatcher([Rule(id=i, kind=kind, pattern=pattern) for i, (kind, pattern) in enumerate(rules, 1)])
+
+
+def test_keywords_match_whole_words_ignoring_case_and_spacing():
+    matcher = _matcher(("keyword", "job offer"))
+    assert matcher.classify("Recruiter", "A new JOB   offer for you").id == 1
+    assert matcher.classify("Recruiter", "jobs offered") is None
+
+
+def test_earliest_match_wins_then_lowest_id():
+    matcher = _matcher(("regex", "python|rust"), ("keyword", "hiring"), ("keyword", "hiring now"))
+    assert matcher.classify("Acme", "hiring python developers").id == 2
+    assert matcher.classify("Acme", "python developers: hiring").id == 1
+    assert matcher.classify("Acme", "hiring now").id == 2
+
+
+def test_sender_rules_look_at_the_title_only():
+    matcher = _matcher(("keyword", "newsletter"), ("sender", "^acme"))
+    assert matcher.classify("Acme Corp", "posted an update").id == 2
+    assert matcher.classify("Jane", "shared Acme Corp's post") is None
+    # a sender match and a text match: the lower rule id wins
+    assert matcher.classify("Acme Corp", "weekly newsletter").id == 1
+
+
+def test_validate_rule():
+    validate_rule("regex", r"hiring|jobs?")
+    with pytest.raises(ValueError):
+        validate_rule("regex", "(unclosed")
+    with pytest.raises(ValueError):
+        validate_rule("colour", "red")
+
+
+def test_apply_rules_moves_matches(database, categories):
+    ingest_notifications([("Recruiter", "We are hiring"), ("Jane", "liked your post"), ("Acme", "Hiring now")])
+    with session_scope() as session:
+        add_rule(session, "keyword", "hiring", categories[0], 4, note="jobs")
+        assert apply_rules(session, dry_run=True) == {"Work": 2}
+        assert session.query(Unsorted).count() == 3
+        assert apply_rules(session) == {"Work": 2}
+    with session_scope() as session:
+        assert [row.title for row in session.query(Unsorted)] == ["Jane"]
+        moved = session.query(Sorted).order_by(Sorted.id).all()
+        assert [(row.title, row.category_id, row.importance_level, row.note) for row in moved] == [
+            ("Recruiter", categories[0], 4, "jobs"), ("Acme", categories[0], 4, "jobs")]
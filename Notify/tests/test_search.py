@@ -0,0 +1,40 @@
+# test_search.py
+from database_setup import Unsorted
+from ingest import ingest_notifications
+from operations import delete_notifications, move_to_sorted, move_to_unsorted
+from search import build_match_query, search
+from utils import session_scope
+
+
+def test_build_match_query_quotes_words():
+    assert build_match_query('jane "doe" post*') == '"jane" "doe" "post"*'
+    assert build_match_query("jane doe", prefix=True) == '"jane"* "doe"*'
+    assert build_match_query("!!") == ""
+
+
+def test_search_finds_inserted_rows(database):
+    ingest_notifications([("Jane Doe", "reacted to your post about gardening"), ("John", "commented on a photo")])
+    with session_scope() as session:
+        results = search(session, "gardening")
+        assert [(result["kind"], result["title"]) for result in results] == [("unsorted", "Jane Doe")]
+        assert search(session, "garden*")[0]["title"] == "Jane Doe"
+        assert search(session, "cooking") == []
+
+
+def test_index_follows_moves_and_deletes(database, categories):
+    ingest_notifications([("Jane Doe", "reacted to your post about gardening"), ("John", "commented on a photo")])
+    with session_scope() as session:
+        move_to_sorted(session, [1], categories[1], 4)
+    with session_scope() as session:
+        results = search(session, "gardening")
+        assert len(results) == 1
+        assert results[0]["kind"] == "sorted"
+        assert results[0]["category"] == "Social"
+        assert search(session, "gardening", category_id=categories[0]) == []
+        move_to_unsorted(session, category_id=categories[1])
+    with session_scope() as session:
+        assert [result["kind"] for result in search(session, "gardening")] == ["unsorted"]
+        delete_notifications(session, Unsorted, [row.id for row in session.query(Unsorted)])
+    with session_scope() as session:
+        assert search(session, "gardening") == []
+        assert search(session, "photo") == []
@@ -0,0 +1,68 @@
+# test_sources.py
+import pathlib
+import pytest
+import sources
+from pipeline import ingest_source
+
+PAGE = str(pathlib.Path(__file__).resolve().parent.parent / "fixtures" / "notifications.html")
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, content):
+        self.content = content
+        self.requested = []
+
+    def get(self, url, timeout):
+        self.requested.append(url)
+        return FakeResponse(self.content)
+
+
+def test_html_source_parses_saved_pages():
+    pytest.importorskip("lxml")
+    with sources.HtmlSource([PAGE, PAGE]) as source:
+        batches = list(source.batches())
+    assert [len(batch) for batch in batches] == [4, 4]
+    assert source.stop_reason == "end_of_pages"
+    first, _, anonymous, _ = batches[0]
+    assert first["title"] == "Jane Doe"
+    assert first["content"].startswith('Jane Doe reacted to your post: "Shipping the new release today"')
+    assert (first["source_id"], first["source_time"]) == ("urn:li:activity:7160000000000000001", "2024-02-10T09:15:00Z")
+    assert anonymous["title"] == "General Notification"
+
+
+def test_html_source_downloads_urls():
+    pytest.importorskip("lxml")
+    with open(PAGE, "rb") as f:
+        session = FakeSession(f.read())
+    records = list(sources.HtmlSource(["https://example.com/notifications"], session=session))
+    assert session.requested == ["https://example.com/notifications"]
+    assert len(records) == 4
+
+
+def test_html_source_missing_page():
+    with pytest.raises(sources.SourceError):
+        list(sources.HtmlSource(["/nonexistent/page.html"]).batches())
+
+
+def test_synthetic_source_is_repeatable():
+    source = sources.SyntheticSource(count=25, batch_size=10, first=100)
+    batches = list(source.batches())
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert source.stop_reason == "end_of_feed"
+    assert batches[0][0] == source.record(100)
+    assert list(sources.SyntheticSource(count=25, batch_size=10, first=100)) == [record for batch in batches for record in batch]
+    assert len({record["source_id"] for batch in batches for record in batch}) == 25
+
+
+def test_sources_feed_the_pipeline(database):
+    pytest.importorskip("lxml")
+    writer, stop_reason = ingest_source(sources.HtmlSource([PAGE, PAGE]))
+    assert (writer.received, writer.inserted, stop_reason) == (8, 4, None)
@@ -0,0 +1,59 @@
+# test_stats.py
+from datetime import datetime
+import stats
+from database_setup import Sorted, Unsorted
+from ingest import ingest_notifications
+from operations import delete_notifications, move_to_sorted, move_to_unsorted
+from utils import session_scope
+
+
+def _summary():
+    with session_scope() as session:
+        return stats.read_stats(session)
+
+
+def _recounted():
+    with session_scope() as session:
+        stats.rebuild_stats(session.connection())
+    return _summary()
+
+
+def test_empty_database(database):
+    assert _summary() == {"unsorted": 0, "sorted": 0, "last_fetched_at": None, "by_category": {}}
+
+
+def test_counts_follow_every_change(database, categories):
+    work, social = categories
+    ingest_notifications((f"Person {i}", f"Post {i}") for i in range(10))
+    assert (_summary()["unsorted"], _summary()["sorted"]) == (10, 0)
+    with session_scope() as session:
+        move_to_sorted(session, [1, 2, 3], work, 4)
+        move_to_sorted(session, [4, 5], social, 1)
+    assert _summary()["by_category"] == {work: {4: 3}, social: {1: 2}}
+    with session_scope() as session:
+        notification = session.query(Sorted).filter(Sorted.category_id == work).first()
+        notification.category_id, notification.importance_level = social, 2
+    assert _summary()["by_category"] == {work: {4: 2}, social: {1: 2, 2: 1}}
+    with session_scope() as session:
+        move_to_unsorted(session, category_id=social)
+        delete_notifications(session, Unsorted, [6, 7])
+    summary = _summary()
+    assert (summary["unsorted"], summary["sorted"]) == (6, 2)
+    assert sum(summary["by_category"].get(social, {}).values()) == 0
+    recounted = _recounted()
+    assert (summary["unsorted"], summary["sorted"], summary["by_category"]) == (
+        recounted["unsorted"], recounted["sorted"], recounted["by_category"])
+
+
+def test_last_fetched_at(database, categories):
+    ingest_notifications([("Jane", "liked your post"), ("John", "commented")])
+    with session_scope() as session:
+        session.query(Unsorted).filter(Unsorted.id == 1).update({"fetched_at": datetime(2024, 1, 2)})
+        session.query(Unsorted).filter(Unsorted.id == 2).update({"fetched_at": datetime(2024, 3, 4)})
+    assert _recounted()["last_fetched_at"] == datetime(2024, 3, 4)
+    with session_scope() as session:
+        move_to_sorted(session, [2], categories[0], 3)
+    # moving keeps the fetch time, and deleting doesn't turn it back
+    with session_scope() as session:
+        session.query(Sorted).delete()
+    assert _summary()["last_fetched_at"] == datetime(2024, 3, 4)
@@ -0,0 +1,55 @@
+# test_transfer.py
+import io
+import pytest
+import transfer
+from database_setup import Category, Sorted
+from ingest import ingest_notifications
+from operations import move_to_sorted, notification_to_dict
+from utils import session_scope
+
+
+def _sorted_rows(session):
+    return [{**notification_to_dict(row), "fetched_at": row.fetched_at, "sorted_at": row.sorted_at}
+            for row in session.query(Sorted).order_by(Sorted.id)]
+
+
+@pytest.fixture
+def sorted_notifications(database, categories):
+    ingest_notifications([("Jane", "liked your post"), ("John", 'said "hi, there"\non your post'),
+                          {"title": "Ann", "content": "shared an article", "account_id": "work"}])
+    with session_scope() as session:
+        move_to_sorted(session, [1, 2], categories[0], 3, note="keep")
+        move_to_sorted(session, [3], categories[1], 1)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv", "parquet"])
+def test_round_trip(sorted_notifications, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    out = io.BytesIO()
+    with session_scope() as session:
+        assert transfer.export_table(session, "sorted", out, fmt) == 3
+        before = _sorted_rows(session)
+        session.query(Sorted).delete()
+    with session_scope() as session:
+        assert transfer.import_table(session, "sorted", io.BytesIO(out.getvalue()), fmt) == 3
+    with session_scope() as session:
+        assert _sorted_rows(session) == before
+        # rows already there are skipped
+        assert transfer.import_table(session, "sorted", io.BytesIO(out.getvalue()), fmt) == 0
+
+
+def test_gzip_files_and_format_guessing(sorted_notifications, tmp_path):
+    path = str(tmp_path / "category.csv.gz")
+    assert transfer.format_for(path) == "csv"
+    assert transfer.format_for("notifications.parquet") == "parquet"
+    assert transfer.format_for("notifications.txt") == "jsonl"
+    with session_scope() as session, transfer.open_file(path, "wb") as out:
+        transfer.export_table(session, "category", out, "csv")
+    with session_scope() as session:
+        session.query(Sorted).delete()
+        session.query(Category).delete()
+    with session_scope() as session, transfer.open_file(path, "rb") as infile:
+        assert transfer.import_table(session, "category", infile, "csv") == 2
+    with session_scope() as session:
+        assert [category.name for category in session.query(Category).order_by(Category.id)] == ["Work", "Social"]
@@ -0,0 +1,145 @@
+# transfer.py
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select, DateTime, Integer
+from database_setup import Category, Unsorted, Sorted
+from ingest import _UPSERT_INSERTS
+from utils import chunked
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet support is optional: pip install pyarrow
+    pyarrow = None
+
+# Streaming export and import of whole tables as JSON lines, CSV or Parquet. Exports read Core
+# rows with yield_per (a server-side cursor where the driver has one), so memory stays flat
+# however large the table is; imports parse the file lazily and bulk-insert it in chunks.
+# Files ending in .gz are compressed/decompressed on the fly (the retention archive written by
+# retention.py can be imported directly). Every column is exported, ids included, so an import
+# into another database keeps sorted.category_id pointing at the right category; rows whose id
+# or fingerprint already exists there are skipped.
+
+TABLES = {"category": Category, "unsorted": Unsorted, "sorted": Sorted}  # in import order
+FORMATS = ("jsonl", "csv", "parquet")
+DEFAULT_BATCH_SIZE = 1000
+
+
+def format_for(path, default="jsonl"):
+    '''Guesses the format from a file name such as notifications.csv.gz.'''
+    name = (path or "").lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for fmt in FORMATS:
+        if name.endswith("." + fmt):
+            return fmt
+    return default
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Parquet support needs pyarrow (pip install pyarrow).")
+
+
+def open_file(path, mode):
+    '''Opens path in binary mode, through gzip if it ends in .gz.'''
+    return gzip.open(path, mode) if path.lower().endswith(".gz") else open(path, mode)
+
+
+def _stream_rows(session, table, batch_size):
+    return session.execute(select(table).order_by(table.c.id).execution_options(yield_per=batch_size))
+
+
+def _text_value(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+
+def _arrow_schema(table):
+    types = {Integer: pyarrow.int64(), DateTime: pyarrow.timestamp("us")}
+    return pyarrow.schema([
+        (column.name, next((arrow for sql, arrow in types.items() if isinstance(column.type, sql)), pyarrow.string()))
+        for column in table.columns
+    ])
+
+
+def export_table(session, table_name, out, fmt="jsonl", batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Streams every row of a table to out (a binary file object) in the given format.
+    Returns the number of rows written.
+    '''
+    table = TABLES[table_name].__table__
+    rows = _stream_rows(session, table, batch_size)
+    written = 0
+    if fmt == "parquet":
+        _require_pyarrow()
+        schema = _arrow_schema(table)
+        with pyarrow.parquet.ParquetWriter(out, schema) as writer:
+            for chunk in rows.partitions():
+                writer.write_batch(pyarrow.RecordBatch.from_pylist([row._asdict() for row in chunk], schema=schema))
+                written += len(chunk)
+        return written
+    text_out = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    if fmt == "csv":
+        writer = csv.writer(text_out)
+        writer.writerow(table.columns.keys())
+        for row in rows:
+            writer.writerow(["" if value is None else _text_value(value) for value in row])
+            written += 1
+    else:
+        for row in rows:
+            text_out.write(json.dumps({key: _text_value(value) for key, value in row._asdict().items()}) + "\n")
+            written += 1
+    text_out.flush()
+    text_out.detach()  # leave out open for the caller
+    return written
+
+
+def _converters(table):
+    '''Per-column functions turning values read back from text (CSV, JSON) into column values.'''
+    def convert(column):
+        if isinstance(column.type, DateTime):
+            parse = lambda value: datetime.fromisoformat(value) if isinstance(value, str) else value
+        elif isinstance(column.type, Integer):
+            parse = int
+        else:
+            parse = lambda value: value
+        # CSV has no NULL, so an empty cell in a nullable column reads back as None
+        return lambda value: None if value is None or (value == "" and column.nullable) else parse(value)
+    return {column.name: convert(column) for column in table.columns}
+
+
+def _read_records(infile, fmt, batch_size):
+    '''Yields one dict per row of a binary file object in the given format.'''
+    if fmt == "parquet":
+        _require_pyarrow()
+        for batch in pyarrow.parquet.ParquetFile(infile).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+    text_in = io.TextIOWrapper(infile, encoding="utf-8", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text_in)
+    else:
+        for line in text_in:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_table(session, table_name, infile, fmt="jsonl", batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Bulk-loads rows from infile (a binary file object) into a table inside the caller's
+    transaction, batch_size rows per executemany. Keys that are not columns of the table are
+    ignored. Rows whose id (or fingerprint) already exists are skipped. Returns the number inserted.
+    '''
+    table = TABLES[table_name].__table__
+    converters = _converters(table)
+    upsert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    insert_stmt = upsert(table).on_conflict_do_nothing() if upsert is not None else table.insert()
+    rows = ({name: convert(record.get(name)) for name, convert in converters.items() if name in record}
+            for record in _read_records(infile, fmt, batch_size))
+    inserted = 0
+    for chunk in chunked(rows, batch_size):
+        inserted += session.execute(insert_stmt, chunk).rowcount
+    return inserted
@@ -1,12 +1,14 @@
 # utils.py
+import hashlib
 from contextlib import contextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from itertools import islice
 from sqlalchemy.exc import SQLAlchemyError
 from rich.console import Console
 from rich.table import Table
 from rich import print as rprint
 import config
+import db
+import profiling
 
 console = Console()
 
@@ -15,11 +17,11 @@ def session_scope():
     """
     Provides a transactional scope around a series of operations.
     """
-    session_local = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(config.DATABASE_URI))
-    session = session_local()
+    session = db.get_session_factory()()
     try:
-        yield session
-        session.commit()
+        with profiling.span("transaction", "db"):
+            yield session
+            session.commit()
     except SQLAlchemyError as e:
         session.rollback()
         console.print(f"[bold red]Database error occurred:[/] {e}", style="red")
@@ -31,6 +33,25 @@ def session_scope():
     finally:
         session.close()
         
+def chunked(iterable, size):
+    """
+    Yields lists of at most size items from iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def notification_fingerprint(title, content, source_time=None):
+    """
+    Returns a stable content hash (hex SHA-256) identifying a notification.
+    Whitespace is collapsed so the same notification scraped twice hashes the same.
+    """
+    parts = [" ".join((part or "").split()) for part in (title, content, source_time)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
 def prompt_for_integer_input(prompt_message):
     """
     Prompts the user for an integer input. Re-prompts until a valid integer is provided.
@@ -46,6 +67,25 @@ def prompt_for_integer_input(prompt_message):
         except ValueError:
             console.print("[bold red]Invalid input. Please enter a valid integer.[/bold red]")
 
+def parse_selection(text, count):
+    """
+    Parses a multi-select answer such as "1,3-5" or "all" against items numbered 1..count.
+    Returns the sorted list of selected numbers, or None if the answer is not a valid selection.
+    """
+    text = text.strip().lower()
+    if text == "all":
+        return list(range(1, count + 1))
+    selected = set()
+    for part in text.replace(" ", "").split(","):
+        first, _, last = part.partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        first, last = int(first), int(last or first)
+        if not 1 <= first <= last <= count:
+            return None
+        selected.update(range(first, last + 1))
+    return sorted(selected)
+
 def prompt_for_importance_level():
     """
     Prompts the user to enter an importance level until a valid one is provided.
@@ -76,14 +116,19 @@ def prompt_for_note():
     """
     return console.input("[bold]Enter a note (optional):[/]")
 
-def display_notifications(notifications, sorted=False, start=0, batch_size=10):
+def render_notifications(notifications, sorted=False, first_ordinal=1):
     """
-    Displays a list of notifications using rich for formatted output.
+    Renders one page of notifications as a rich table.
     If sorted is True, additional details are displayed.
-    Displays notifications in batches of 10, starting from the start index.
+    The '#' column is the display ordinal (position in the list, counting from first_ordinal),
+    the ID column is the stable primary key.
     """
-    console = Console()
+    with profiling.span("render", "ui", rows=len(notifications)):
+        _render_notifications(notifications, sorted, first_ordinal)
+
+def _render_notifications(notifications, sorted, first_ordinal):
     table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("#", width=6)
     table.add_column("ID", style="dim", width=8)
     table.add_column("Title")
 
@@ -96,19 +141,16 @@ def display_notifications(notifications, sorted=False, start=0, batch_size=10):
     else:
         # For unsorted notifications, just display the content
         table.add_column("Content", overflow="fold")
-        
-    end = start + batch_size
-    current_batch = notifications[start:end]
 
     # Populate the table with notification data
-    for notification in current_batch:
+    for ordinal, notification in enumerate(notifications, start=first_ordinal):
         if sorted:
             category_name = notification.category.name if notification.category else "No category"
-            content = (notification.content[:87] + '...') if len(notification.content) > 90 else notification.content
             note = notification.note or "N/A"
             note = (note[:87] + '...') if len(note) > 90 else note
             
             table.add_row(
+                str(ordinal),
                 str(notification.id),
                 notification.title,
                 category_name, # Display category name instead of ID
@@ -118,6 +160,7 @@ def display_notifications(notifications, sorted=False, start=0, batch_size=10):
         else:
             content = (notification.content[:87] + '...') if len(notification.content) > 90 else notification.content
             table.add_row(
+                str(ordinal),
                 str(notification.id),
                 notification.title,
                 content  # Only display content for unsorted notifications
@@ -125,13 +168,37 @@ def display_notifications(notifications, sorted=False, start=0, batch_size=10):
 
     # Print the table to the console
     console.print(table)
-    
-    if end < len(notifications):
+
+def page_notifications(pages, sorted=False, first_ordinal=1):
+    """
+    Displays an iterable of notification pages one page at a time.
+    Only the current page and the one after it are held in memory, so pages can come
+    straight from a keyset-paginated query (see queries.iter_pages).
+    'n' shows the next page, 'x' shows every remaining page, any other key returns.
+    """
+    pages = iter(pages)
+    page = next(pages, None)
+    ordinal = first_ordinal
+    show_all = False
+    while page:
+        render_notifications(page, sorted, first_ordinal=ordinal)
+        ordinal += len(page)
+        page = next(pages, None)  # look ahead so we only offer 'next' when there is one
+        if not page or show_all:
+            continue
         console.print("[bold green]Press 'n' to view the next batch of notifications, 'x' to view all, or any other key to return.[/bold green]")
         key = console.input()
-        if key.lower() == 'n':
-            display_notifications(notifications, sorted, start=end, batch_size=batch_size)
-        elif key.lower() == 'x':
-            display_notifications(notifications, sorted, start=0, batch_size=len(notifications))
-        else:
-            return
\ No newline at end of file
+        if key.lower() == 'x':
+            show_all = True
+        elif key.lower() != 'n':
+            return
+
+def display_notifications(notifications, sorted=False, start=0, batch_size=10):
+    """
+    Displays a list of notifications using rich for formatted output.
+    If sorted is True, additional details are displayed.
+    Displays notifications in batches of 10, starting from the start index.
+    """
+    page_notifications(
+        (notifications[i:i + batch_size] for i in range(start, len(notifications), batch_size)),
+        sorted, first_ordinal=start + 1)